@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# bench/bench_broadcast.py
+"""
+Micro-benchmark de ObserverRegistry: broadcast con send_json por subscriptor
+(json.dumps + header en cada socket) vs broadcast_frame (una sola codificación).
+
+Uso:
+    PYTHONPATH=. python bench/bench_broadcast.py [-n SUBS] [-f CAMPOS] [-r REPETICIONES]
+"""
+import argparse
+import time
+
+from common.net import send_json, pack_json
+from server.observer import ObserverRegistry
+
+
+class _NullSocket:
+    """Socket falso: solo cuenta bytes, para medir CPU de codificación y no de red."""
+    def __init__(self):
+        self.sent = 0
+
+    def sendall(self, data: bytes):
+        self.sent += len(data)
+
+
+def _event(fields: int) -> dict:
+    record = {"id": "UADER-FCyT-IS1"}
+    record.update({f"campo{i}": f"valor de prueba {i} " * 4 for i in range(fields)})
+    return {"ACTION": "change", "DATA": record, "ts": int(time.time() * 1000)}
+
+
+def _bench(fn, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - start) / reps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de broadcast (serializar una vez vs por subscriptor)")
+    ap.add_argument("-n", "--subs", type=int, default=500, help="Subscriptores (default 500)")
+    ap.add_argument("-f", "--fields", type=int, default=12, help="Campos del registro (default 12)")
+    ap.add_argument("-r", "--reps", type=int, default=200, help="Repeticiones (default 200)")
+    args = ap.parse_args()
+
+    registry = ObserverRegistry()
+    for i in range(args.subs):
+        registry.add(f"{i:012x}", _NullSocket())
+    event = _event(args.fields)
+
+    per_sub = _bench(lambda: registry.broadcast(event, send_json), args.reps)
+    once = _bench(lambda: registry.broadcast_frame(pack_json(event)), args.reps)
+
+    size = len(pack_json(event))
+    print(f"subscriptores={args.subs} trama={size} bytes repeticiones={args.reps}")
+    print(f"  broadcast(send_json)     : {per_sub * 1e3:8.3f} ms/evento")
+    print(f"  broadcast_frame(1 encode): {once * 1e3:8.3f} ms/evento")
+    print(f"  mejora                   : x{per_sub / once:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# bench/bench_codec.py
+"""
+Micro-benchmark del codec de las tramas: pack + decodificación de una respuesta de list
+grande en JSON vs msgpack (requiere 'pip install msgpack').
+
+Uso:
+    PYTHONPATH=. python bench/bench_codec.py [-n REGISTROS] [-f CAMPOS] [-r REPETICIONES]
+"""
+import argparse
+import struct
+import time
+
+from common.net import pack, codec_available, LENGTH_MASK, _decode
+
+
+def _bench(fn, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - start) / reps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de codecs (JSON vs msgpack)")
+    ap.add_argument("-n", "--items", type=int, default=5000, help="Registros en la respuesta (default 5000)")
+    ap.add_argument("-f", "--fields", type=int, default=12, help="Campos por registro (default 12)")
+    ap.add_argument("-r", "--reps", type=int, default=20, help="Repeticiones (default 20)")
+    args = ap.parse_args()
+
+    record = {f"campo{i}": f"valor de prueba {i}" for i in range(args.fields)}
+    resp = {"OK": True, "DATA": [dict(record, id=f"ID-{i:06d}", n=i, activo=True) for i in range(args.items)]}
+    print(f"registros={args.items} campos={args.fields} repeticiones={args.reps}")
+    for codec in ("json", "msgpack"):
+        if not codec_available(codec):
+            print(f"  {codec:<8}: no disponible")
+            continue
+        frame = pack(resp, codec)
+        (value,) = struct.unpack(">I", frame[:4])
+        body = frame[4:4 + (value & LENGTH_MASK)]
+        enc = _bench(lambda: pack(resp, codec), args.reps)
+        dec = _bench(lambda: _decode(value, body), args.reps)
+        print(f"  {codec:<8}: {len(frame):>9} bytes  pack {enc * 1e3:7.2f} ms  decode {dec * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# bench/bench_compress.py
+"""
+Micro-benchmark de la compresión de tramas: tasa de compresión y costo de CPU (pack y
+decodificación) de una respuesta de list con registros como los de samples/list_out.json,
+sin comprimir y con zlib en distintos niveles, para cada codec disponible.
+
+Uso:
+    PYTHONPATH=. python bench/bench_compress.py [-n REGISTROS] [-r REPETICIONES]
+"""
+import argparse
+import struct
+import time
+
+from common import net
+from common.net import pack, codec_available, CODECS, LENGTH_MASK, _decode
+
+
+def _bench(fn, reps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - start) / reps
+
+
+def _record(i: int) -> dict:
+    """Registro con las claves de samples/set.json (lo que devuelve list)."""
+    return {"id": f"UADER-FCyT-{i:06d}", "cp": str(3000 + i % 500), "CUIT": f"30-{70000000 + i}-8",
+            "domicilio": f"25 de Mayo {i % 2000}", "idreq": str(i), "idSeq": str(1000 + i),
+            "localidad": "Concepción del Uruguay", "provincia": "Entre Rios", "sede": "FCyT",
+            "seqID": str(i % 100), "telefono": f"03442 43-{i % 10000:04d}", "web": "http://www.uader.edu.ar"}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de compresión de tramas (zlib)")
+    ap.add_argument("-n", "--items", type=int, default=5000, help="Registros en la respuesta (default 5000)")
+    ap.add_argument("-r", "--reps", type=int, default=20, help="Repeticiones (default 20)")
+    args = ap.parse_args()
+
+    resp = {"OK": True, "DATA": [_record(i) for i in range(args.items)]}
+    print(f"registros={args.items} repeticiones={args.reps} (umbral default {net.COMPRESS_MIN_BYTES} bytes, "
+          f"nivel default {net.COMPRESS_LEVEL})")
+    default_level = net.COMPRESS_LEVEL
+    for codec in CODECS:
+        if not codec_available(codec):
+            print(f"  {codec:<8}: no disponible")
+            continue
+        raw = len(pack(resp, codec))
+        for level in (None, 1, 6, 9):
+            net.COMPRESS_LEVEL = level if level is not None else default_level
+            compress_min = None if level is None else 0
+            frame = pack(resp, codec, compress_min)
+            (value,) = struct.unpack(">I", frame[:4])
+            body = frame[4:4 + (value & LENGTH_MASK)]
+            enc = _bench(lambda: pack(resp, codec, compress_min), args.reps)
+            dec = _bench(lambda: _decode(value, body), args.reps)
+            label = f"{codec}" if level is None else f"{codec}+z{level}"
+            print(f"  {label:<11}: {len(frame):>9} bytes ({raw / len(frame):5.1f}x)  "
+                  f"pack {enc * 1e3:7.2f} ms  decode {dec * 1e3:7.2f} ms")
+    net.COMPRESS_LEVEL = default_level
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# bench/bench_list_stream.py
+"""
+Micro-benchmark de list en DynamoDB: una sola trama con todo DATA vs streaming
+(tramas CHUNK a medida que llegan las páginas del scan). Mide el tiempo hasta la
+primera trama lista para enviar y el pico de memoria (tracemalloc) del lado servidor.
+
+Uso:
+    PYTHONPATH=. python bench/bench_list_stream.py [-n REGISTROS] [--page N] [--chunk N] [--latency MS]
+"""
+import argparse
+import time
+import tracemalloc
+
+from common.net import pack_json
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+
+def _single_frame(data):
+    start = time.perf_counter()
+    frame = pack_json({"OK": True, "DATA": data.list_all()})
+    return time.perf_counter() - start, len(frame)
+
+
+def _streamed(data, chunk: int):
+    start = time.perf_counter()
+    first, sent, buf = None, 0, []
+    for page in data.iter_pages():
+        buf.extend(page)
+        while len(buf) >= chunk:
+            sent += len(pack_json({"OK": True, "CHUNK": buf[:chunk]}))
+            buf = buf[chunk:]
+            first = first or time.perf_counter() - start
+    if buf:
+        sent += len(pack_json({"OK": True, "CHUNK": buf}))
+    return first or time.perf_counter() - start, sent
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    ttfb, size = fn()
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de list: una trama vs streaming")
+    ap.add_argument("-n", "--items", type=int, default=20000, help="Registros en la tabla (default 20000)")
+    ap.add_argument("--page", type=int, default=500, help="Registros por página de scan (default 500)")
+    ap.add_argument("--chunk", type=int, default=100, help="Registros por trama CHUNK (default 100)")
+    ap.add_argument("--latency", type=float, default=5.0, help="Latencia por llamada en ms (default 5)")
+    args = ap.parse_args()
+
+    record = {f"campo{i}": f"valor de prueba {i} " * 3 for i in range(10)}
+    table = FakeTable([dict(record, id=f"ID-{i:06d}") for i in range(args.items)],
+                      page_size=args.page, latency=args.latency / 1000)
+    data = aws_corporate_data(table, cache_size=0)
+
+    print(f"registros={args.items} página={args.page} chunk={args.chunk} latencia={args.latency:g} ms/llamada")
+    for name, fn in (("una trama", lambda: _single_frame(data)),
+                     ("streaming", lambda: _streamed(data, args.chunk))):
+        ttfb, total, peak, size = _measure(fn)
+        print(f"  {name:<10} primera trama {ttfb * 1e3:8.1f} ms  total {total * 1e3:8.1f} ms  "
+              f"pico {peak / 2**20:7.1f} MiB  bytes {size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# bench/bench_scan.py
+"""
+Micro-benchmark de CorporateData.list_all en DynamoDB: scan secuencial vs scan paralelo
+por segmentos, contra una tabla falsa en memoria con latencia simulada por llamada.
+
+Uso:
+    PYTHONPATH=. python bench/bench_scan.py [-n REGISTROS] [--page N] [--latency MS] [-s 1,2,4,8]
+"""
+import argparse
+import time
+
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de list_all (scan secuencial vs paralelo)")
+    ap.add_argument("-n", "--items", type=int, default=5000, help="Registros en la tabla (default 5000)")
+    ap.add_argument("--page", type=int, default=100, help="Registros por página de scan (default 100)")
+    ap.add_argument("--latency", type=float, default=20.0, help="Latencia por llamada en ms (default 20)")
+    ap.add_argument("-s", "--segments", default="1,2,4,8,16", help="Segmentos a probar (default 1,2,4,8,16)")
+    args = ap.parse_args()
+
+    table = FakeTable([{"id": f"ID-{i:06d}", "nombre": f"registro {i}"} for i in range(args.items)],
+                      page_size=args.page, latency=args.latency / 1000)
+    print(f"registros={args.items} página={args.page} latencia={args.latency:g} ms/llamada")
+    base = None
+    for segments in (int(s) for s in args.segments.split(",")):
+        data = aws_corporate_data(table, scan_segments=segments, cache_size=0)
+        table.calls.clear()
+        start = time.perf_counter()
+        items = data.list_all()
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        assert len(items) == args.items
+        print(f"  segmentos={segments:<3} {elapsed * 1e3:9.1f} ms  scans={table.calls['scan']:<4} x{base / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import sys
 import time
 import uuid
 import re
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from common.logging_setup import setup
 from common.net import send_json, recv_json
@@ -25,11 +25,31 @@ def append_line(path: Optional[str], line: str) -> None:
         f.write(line + "\n")
 
 
-def run_once(host: str, port: int, out_path: Optional[str], uuid_str: str, retry_s: int, log) -> None:
+def fetch_snapshot(host: str, port: int, uuid_str: str, compress: bool = False) -> List[Dict[str, Any]]:
+    """list completo por una conexión aparte (resync cuando el hueco ya no está en el historial)."""
+    req = {"UUID": uuid_str, "ACTION": "list"}
+    if compress:
+        req["COMPRESS"] = True
+    with socket.create_connection((host, port), timeout=10.0) as sock:
+        send_json(sock, req)
+        resp = recv_json(sock)
+    if not resp or not resp.get("OK"):
+        raise RuntimeError(f"Fallo en list para resync. Respuesta: {json.dumps(resp, ensure_ascii=False)}")
+    return resp["DATA"]
+
+
+def run_once(host: str, port: int, out_path: Optional[str], uuid_str: str, retry_s: int, log,
+             ids: Optional[List[str]] = None, delta: bool = False,
+             cursor: Optional[Dict[str, Any]] = None, compress: bool = False) -> None:
     """
     Abre un socket TCP, envía la suscripción, espera el acuse y
     luego queda escuchando notificaciones hasta que el socket se cierre.
+    `cursor` guarda el último SEQ recibido entre reconexiones: al volver a
+    suscribirse se piden los eventos perdidos (SINCE).
+    `compress`: pedir las notificaciones grandes comprimidas (recv_json las descomprime).
     """
+    if cursor is None:
+        cursor = {}
     sock = None
     try:
         if log:
@@ -37,6 +57,14 @@ def run_once(host: str, port: int, out_path: Optional[str], uuid_str: str, retry
         sock = socket.create_connection((host, port), timeout=10.0)
         # armamos la solicitud de suscripción
         req = {"UUID": uuid_str, "ACTION": "subscribe"}
+        if ids:
+            req["IDS"] = ids  # solo eventos de esos IDs / prefijos
+        if delta:
+            req["MODE"] = "delta"  # solo campos cambiados + versión
+        if cursor.get("seq") is not None:
+            req["SINCE"] = cursor["seq"]  # reenviar lo ocurrido mientras estuvimos desconectados
+        if compress:
+            req["COMPRESS"] = True  # tramas grandes (lotes, snapshots) comprimidas con zlib
 
         # enviamos y esperamos primer acuse
         send_json(sock, req)
@@ -65,6 +93,14 @@ def run_once(host: str, port: int, out_path: Optional[str], uuid_str: str, retry
                     log.warning("Conexión cerrada por el servidor.")
                 break
 
+            if msg.get("ACTION") == "resync":
+                # el hueco ya no está en el historial del servidor: estado completo vía list
+                if log:
+                    log.warning("Eventos perdidos fuera del historial; resincronizando con list…")
+                msg = {"ACTION": "snapshot", "SEQ": msg.get("SEQ"), "DATA": fetch_snapshot(host, port, uuid_str, compress)}
+            if msg.get("SEQ") is not None:
+                cursor["seq"] = msg["SEQ"]
+
             # formateo consistente de salida
             line = json.dumps(msg, ensure_ascii=False)
             append_line(out_path, line)
@@ -108,6 +144,11 @@ def main():
     ap.add_argument("-p", "--port", type=int, default=8080, help="Puerto del servidor TCP (default 8080)")
     ap.add_argument("-o", "--output", help="Archivo de salida (append) para las notificaciones")
     ap.add_argument("-r", "--retry", type=int, default=30, help="Segundos entre reintentos (default 30)")
+    ap.add_argument("--ids", help="(opcional) IDs o prefijos a observar, separados por coma (ej: UADER-FCyT-IS1,UADER-*)")
+    ap.add_argument("--delta", action="store_true",
+                    help="Recibir solo los campos cambiados/eliminados y la versión del registro")
+    ap.add_argument("--compress", action="store_true",
+                    help="Pedir comprimidas (zlib) las notificaciones grandes")
     ap.add_argument("--uuid", help="(opcional) UUID/node id en hex (12 dígitos) para pruebas")
     ap.add_argument("-v", "--verbose", action="store_true", help="Salida detallada")
     args = ap.parse_args()
@@ -120,6 +161,8 @@ def main():
         print("UUID inválido: debe ser 12 hex (ej: a1b2c3d4e5f6). Valor:", uuid_str, file=sys.stderr)
         sys.exit(2)
 
+    ids = [x.strip() for x in args.ids.split(",") if x.strip()] if args.ids else None
+
     if args.verbose:
         log.debug(f"UUID: {uuid_str}")
         log.debug(f"Servidor: {args.host}:{args.port}")
@@ -127,10 +170,12 @@ def main():
             log.debug(f"Output: {args.output}")
         log.debug(f"Retry: {args.retry}s")
 
-    # bucle de reconexión permanente
+    # bucle de reconexión permanente (cursor: último SEQ visto, para recuperar lo perdido)
+    cursor: Dict[str, Any] = {}
     try:
         while True:
-            run_once(args.host, args.port, args.output, uuid_str, args.retry, log)
+            run_once(args.host, args.port, args.output, uuid_str, args.retry, log, ids, args.delta, cursor,
+                     args.compress)
             # si salimos del run_once sin excepción: servidor cerró; esperamos y reintentamos
             if args.verbose:
                 log.info("Reintentando en %ss…", args.retry)
@@ -6,21 +6,21 @@ import socket
 import sys
 import uuid
 import re
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from common.logging_setup import setup
-from common.net import send_json, recv_json
+from common.net import send_json, recv_json, codec_available, CODECS, COMPRESS_MIN_BYTES
 
 UUID_HEX_RE = re.compile(r"^[0-9a-f]{12}$")
-ALLOWED_ACTIONS = {"get", "set", "list"}
+ALLOWED_ACTIONS = {"get", "mget", "set", "mset", "list"}
 
 
-def load_json(path: str) -> Dict[str, Any]:
+def load_json(path: str) -> Any:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def save_json(path: str, obj: Dict[str, Any]) -> None:
+def save_json(path: str, obj: Any) -> None:
     with open(path, "w", encoding="utf-8") as f:
         json.dump(obj, f, ensure_ascii=False, indent=2)
 
@@ -29,7 +29,7 @@ def normalize_payload(raw: Dict[str, Any], log) -> Dict[str, Any]:
     """
     Normaliza el JSON de entrada para hablar con el servidor.
     - Asegura UUID (12 hex); si falta, usa uuid.getnode().
-    - Normaliza ACTION (get/set/list).
+    - Normaliza ACTION (get/mget/set/mset/list).
     - Para SET: si no hay DATA, arma DATA con todos los campos excepto UUID/ACTION/ID/DATA.
       (esto hace compatible el formato 'plano' pedido en la consigna)
     - Para LIST: elimina ID si vino por error.
@@ -85,6 +85,19 @@ def normalize_payload(raw: Dict[str, Any], log) -> Dict[str, Any]:
         if not req.get("ID"):
             raise ValueError("Missing 'ID' para ACTION 'get'.")
 
+    # MGET → IDS requerido (lista de IDs)
+    if action == "mget":
+        ids = req.get("IDS")
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("Missing 'IDS' (lista de IDs) para ACTION 'mget'.")
+        req.pop("ID", None)
+
+    # MSET → DATA requerido (lista de registros, cada uno con su id)
+    if action == "mset":
+        if not isinstance(req.get("DATA"), list) or not req["DATA"]:
+            raise ValueError("Missing 'DATA' (lista de registros) para ACTION 'mset'.")
+        req.pop("ID", None)
+
     # LIST → ignorar ID si vino
     if action == "list":
         req.pop("ID", None)
@@ -92,14 +105,22 @@ def normalize_payload(raw: Dict[str, Any], log) -> Dict[str, Any]:
     return req
 
 
-def run_once(server: str, port: int, payload: Dict[str, Any], log, out_path: str | None) -> int:
+def _send(sock: socket.socket, req: Dict[str, Any], codec: str, compress: bool) -> None:
+    """send_json con COMPRESS: pide respuestas comprimidas y comprime también las solicitudes grandes."""
+    if compress:
+        req = dict(req, COMPRESS=True)
+    send_json(sock, req, codec, COMPRESS_MIN_BYTES if compress else None)
+
+
+def run_once(server: str, port: int, payload: Dict[str, Any], log, out_path: str | None,
+             codec: str = "json", compress: bool = False) -> int:
     """Abre socket TCP, envía payload JSON (framing common.net) y guarda/imprime la respuesta."""
     try:
         with socket.create_connection((server, port), timeout=10.0) as sock:
             if log:
                 log.debug(f"Conectado a {server}:{port}")
                 log.debug(f"Request: {json.dumps(payload, ensure_ascii=False)}")
-            send_json(sock, payload)
+            _send(sock, payload, codec, compress)
             resp = recv_json(sock)
 
         if resp is None:
@@ -131,6 +152,148 @@ def run_once(server: str, port: int, payload: Dict[str, Any], log, out_path: str
         return 3
 
 
+def run_batch(server: str, port: int, payloads: List[Dict[str, Any]], log, out_path: str | None,
+              codec: str = "json", compress: bool = False) -> int:
+    """Envía el arreglo como una sola solicitud 'batch' e imprime el arreglo de respuestas (en orden)."""
+    envelope = {"UUID": payloads[0]["UUID"], "ACTION": "batch",
+                "DATA": [{k: v for k, v in p.items() if k != "UUID"} for p in payloads]}
+    try:
+        with socket.create_connection((server, port), timeout=10.0) as sock:
+            if log:
+                log.debug(f"Conectado a {server}:{port} (batch de {len(payloads)} solicitudes)")
+            _send(sock, envelope, codec, compress)
+            resp = recv_json(sock)
+        if resp is None:
+            resp = {"OK": False, "Error": "No response"}
+        if not isinstance(resp.get("DATA"), list):
+            # el envoltorio completo fue rechazado (p. ej. Busy o servidor sin 'batch')
+            print(json.dumps(resp, ensure_ascii=False, indent=2))
+            return 1
+        responses = resp["DATA"]
+        print(json.dumps(responses, ensure_ascii=False, indent=2))
+        if out_path:
+            save_json(out_path, responses)
+        return 0 if resp.get("OK") else 1
+
+    except (ConnectionRefusedError, socket.timeout, OSError) as e:
+        if log:
+            log.error(f"Error de conexión: {e}")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 2
+    except Exception as e:
+        if log:
+            log.exception("Fallo inesperado:")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 3
+
+
+def run_pipelined(server: str, port: int, payloads: List[Dict[str, Any]], log, out_path: str | None,
+                  codec: str = "json", compress: bool = False) -> int:
+    """
+    Envía varias solicitudes por una sola conexión KEEPALIVE, sin esperar cada
+    respuesta (pipelining), y las recibe en el mismo orden.
+    """
+    try:
+        with socket.create_connection((server, port), timeout=10.0) as sock:
+            if log:
+                log.debug(f"Conectado a {server}:{port} ({len(payloads)} solicitudes encadenadas)")
+            for i, payload in enumerate(payloads):
+                req = dict(payload)
+                req["KEEPALIVE"] = i < len(payloads) - 1  # la última pide cerrar
+                _send(sock, req, codec, compress)
+            responses = [recv_json(sock) for _ in payloads]
+
+        responses = [r if r is not None else {"OK": False, "Error": "No response"} for r in responses]
+        print(json.dumps(responses, ensure_ascii=False, indent=2))
+        if out_path:
+            save_json(out_path, responses)
+        return 0 if all(r.get("OK") for r in responses) else 1
+
+    except (ConnectionRefusedError, socket.timeout, OSError) as e:
+        if log:
+            log.error(f"Error de conexión: {e}")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 2
+    except Exception as e:
+        if log:
+            log.exception("Fallo inesperado:")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 3
+
+
+class _ListWriter:
+    """Escribe {"OK": true, "DATA": [...]} de a un registro, sin juntar la lista en memoria."""
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+        out.write('{\n  "OK": true,\n  "DATA": [')
+
+    def add(self, items):
+        for item in items:
+            self.out.write(("\n    " if self.count == 0 else ",\n    ") + json.dumps(item, ensure_ascii=False))
+            self.count += 1
+
+    def finish(self):
+        self.out.write("\n  ]\n}\n")
+
+
+def run_list_incremental(server: str, port: int, payload: Dict[str, Any], log, out_path: str | None,
+                         page_size: int | None = None, stream: bool = False, codec: str = "json",
+                         compress: bool = False) -> int:
+    """
+    list sin armar la respuesta completa en memoria; los registros se escriben a medida que llegan.
+      - stream=True: una solicitud con STREAM; el servidor responde tramas CHUNK hasta una con END
+      - page_size:   páginas de LIMIT=page_size siguiendo NEXT/CURSOR por una conexión KEEPALIVE
+    """
+    out = open(out_path, "w", encoding="utf-8") if out_path else sys.stdout
+    try:
+        with socket.create_connection((server, port), timeout=10.0) as sock:
+            writer = _ListWriter(out)
+            if stream:
+                req = dict(payload, STREAM=True)
+                if page_size:
+                    req["CHUNK"] = page_size
+                _send(sock, req, codec, compress)
+                while True:
+                    frame = recv_json(sock)
+                    if frame is None or not frame.get("OK"):
+                        raise RuntimeError(f"Stream interrumpido: {json.dumps(frame, ensure_ascii=False)}")
+                    if frame.get("END"):
+                        break
+                    writer.add(frame.get("CHUNK", []))
+            else:
+                cursor = None
+                while True:
+                    req = dict(payload, LIMIT=page_size, KEEPALIVE=True)
+                    if cursor is not None:
+                        req["CURSOR"] = cursor
+                    _send(sock, req, codec, compress)
+                    resp = recv_json(sock)
+                    if not resp or not resp.get("OK"):
+                        raise RuntimeError(f"Fallo en una página de list: {json.dumps(resp, ensure_ascii=False)}")
+                    writer.add(resp.get("DATA", []))
+                    cursor = resp.get("NEXT")
+                    if not cursor:
+                        break
+            writer.finish()
+        if log:
+            log.debug(f"list incremental: {writer.count} registros")
+        return 0
+    except (ConnectionRefusedError, socket.timeout, OSError) as e:
+        if log:
+            log.error(f"Error de conexión: {e}")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 2
+    except Exception as e:
+        if log:
+            log.exception("Fallo inesperado:")
+        print(json.dumps({"OK": False, "Error": f"{type(e).__name__}: {e}"}, ensure_ascii=False, indent=2))
+        return 3
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
 def main():
     ap = argparse.ArgumentParser(description="SingletonClient (TCP)")
     ap.add_argument("-i", "--input", required=True, help="Archivo JSON de entrada")
@@ -139,24 +302,56 @@ def main():
     ap.add_argument("-s", "--server", "-H", "--host", dest="host", default="127.0.0.1",
                     help="Hostname del servidor (default 127.0.0.1)")
     ap.add_argument("-p", "--port", type=int, default=8080, help="Puerto TCP del servidor (default 8080)")
+    ap.add_argument("--page-size", type=int,
+                    help="list: pedir los registros en páginas de N (LIMIT/CURSOR) e ir escribiéndolos "
+                         "(con --stream: registros por trama)")
+    ap.add_argument("--batch", action="store_true",
+                    help="Con un arreglo de solicitudes: enviarlas juntas en una sola solicitud 'batch' "
+                         "(en vez de encadenarlas por KEEPALIVE)")
+    ap.add_argument("--stream", action="store_true",
+                    help="list: respuesta en streaming (varias tramas), escrita a medida que llega")
+    ap.add_argument("--codec", choices=CODECS, default="json",
+                    help="Codec de las tramas: json (default) o msgpack (más compacto; requiere 'pip install msgpack'). "
+                         "El servidor responde en el mismo codec")
+    ap.add_argument("--compress", action="store_true",
+                    help="Pedir las respuestas grandes comprimidas (zlib) y comprimir las solicitudes grandes")
     ap.add_argument("-v", "--verbose", action="store_true", help="Salida detallada")
     args = ap.parse_args()
 
     log = setup(args.verbose)
 
+    if not codec_available(args.codec):
+        print(f"[ERROR] Codec '{args.codec}' no disponible (pip install {args.codec})", file=sys.stderr)
+        sys.exit(2)
+
     try:
         raw = load_json(args.input)
     except Exception as e:
         print(f"[ERROR] No se pudo leer {args.input}: {e}", file=sys.stderr)
         sys.exit(2)
 
+    # Un arreglo de solicitudes se envía encadenado por una sola conexión
     try:
-        payload = normalize_payload(raw, log)
+        if isinstance(raw, list):
+            if not raw:
+                raise ValueError("El arreglo de solicitudes está vacío.")
+            payloads = [normalize_payload(r, log) for r in raw]
+        else:
+            payload = normalize_payload(raw, log)
     except Exception as e:
         print(f"[ERROR] {e}", file=sys.stderr)
         sys.exit(2)
 
-    rc = run_once(args.host, args.port, payload, log, args.output)
+    if isinstance(raw, list) and args.batch:
+        rc = run_batch(args.host, args.port, payloads, log, args.output, args.codec, args.compress)
+    elif isinstance(raw, list):
+        rc = run_pipelined(args.host, args.port, payloads, log, args.output, args.codec, args.compress)
+    elif (args.stream or args.page_size) and payload["ACTION"] == "list":
+        rc = run_list_incremental(args.host, args.port, payload, log, args.output,
+                                  page_size=args.page_size, stream=args.stream, codec=args.codec,
+                                  compress=args.compress)
+    else:
+        rc = run_once(args.host, args.port, payload, log, args.output, args.codec, args.compress)
     sys.exit(rc)
 
 
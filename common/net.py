@@ -1,20 +1,116 @@
-import struct, json, socket
+import struct, json, socket, asyncio, zlib
+try:
+    import msgpack  # type: ignore
+except Exception:  # msgpack opcional
+    msgpack = None
 
-def send_json(sock: socket.socket, obj: dict):
-    data = json.dumps(obj).encode("utf-8")
-    header = struct.pack(">I", len(data))  # 4 bytes big-endian
-    sock.sendall(header + data)
+# Los bits altos del header de longitud indican el codec del cuerpo y si va comprimido. Un
+# cliente viejo nunca los enciende (sus tramas miden < 1 GiB): para él el header sigue siendo
+# solo la longitud, y el servidor solo le comprime la respuesta a quien lo pide.
+FLAG_MSGPACK = 0x80000000
+FLAG_ZLIB = 0x40000000       # cuerpo comprimido con zlib (se descomprime antes de decodificar)
+LENGTH_MASK = 0x3FFFFFFF
+CODECS = ("json", "msgpack")
+COMPRESS_MIN_BYTES = 1024    # por debajo de esto comprimir no compensa el CPU
+COMPRESS_LEVEL = 1           # JSON repetitivo ya comprime bien con el nivel más rápido
+# Tope al descomprimir las solicitudes que recibe el servidor: una trama chica no puede
+# inflarse hasta 1 GiB antes del json.loads (bomba de descompresión)
+MAX_REQUEST_INFLATED = 8 * 1024 * 1024
+
+
+def codec_available(codec: str) -> bool:
+    """True si el codec se puede usar en este proceso (msgpack es una dependencia opcional)."""
+    return codec == "json" or (codec == "msgpack" and msgpack is not None)
+
+
+def pack(obj: dict, codec: str = "json", compress_min: int | None = None) -> bytes:
+    """
+    Devuelve la trama completa (header de 4 bytes big-endian + cuerpo en el codec pedido).
+    Con `compress_min` el cuerpo se comprime si mide al menos eso y la compresión lo achica.
+    """
+    if codec == "json":
+        data, flags = json.dumps(obj).encode("utf-8"), 0
+    elif codec == "msgpack":
+        if msgpack is None:
+            raise ValueError("Codec 'msgpack' no disponible (pip install msgpack)")
+        data, flags = msgpack.packb(obj, use_bin_type=True), FLAG_MSGPACK
+    else:
+        raise ValueError(f"Codec desconocido '{codec}' (opciones: {', '.join(CODECS)})")
+    return _frame(flags, data, compress_min)
+
+def _frame(flags: int, data: bytes, compress_min: int | None) -> bytes:
+    if compress_min is not None and len(data) >= compress_min:
+        packed = zlib.compress(data, COMPRESS_LEVEL)
+        if len(packed) < len(data):
+            data, flags = packed, flags | FLAG_ZLIB
+    if len(data) > LENGTH_MASK:
+        raise ValueError(f"Trama demasiado grande ({len(data)} bytes)")
+    header = struct.pack(">I", flags | len(data))  # 4 bytes big-endian
+    return header + data
+
+def compress_frame(frame: bytes, compress_min: int) -> bytes:
+    """Variante comprimida de una trama ya codificada (misma regla que pack); si no conviene, la misma."""
+    (value,) = struct.unpack(">I", frame[:4])
+    if value & FLAG_ZLIB:
+        return frame
+    return _frame(value & FLAG_MSGPACK, frame[4:], compress_min)
+
+def pack_json(obj: dict) -> bytes:
+    """Devuelve la trama completa (header de 4 bytes big-endian + JSON UTF-8)."""
+    return pack(obj, "json")
+
+def _decode(header_value: int, body: bytes, max_inflated: int = LENGTH_MASK):
+    """
+    (objeto, codec) a partir del valor del header y el cuerpo. Un cuerpo comprimido se
+    descomprime hasta `max_inflated` bytes; si queda algo sin descomprimir, ValueError.
+    """
+    if header_value & FLAG_ZLIB:
+        inflater = zlib.decompressobj()
+        try:
+            body = inflater.decompress(body, max_inflated)
+        except zlib.error as e:
+            raise ValueError(f"Trama comprimida inválida: {e}")
+        if inflater.unconsumed_tail:
+            raise ValueError(f"Trama comprimida demasiado grande (más de {max_inflated} bytes descomprimida)")
+        if not inflater.eof:
+            raise ValueError("Trama comprimida inválida (incompleta)")
+    if header_value & FLAG_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Trama msgpack recibida pero msgpack no está instalado")
+        return msgpack.unpackb(body, raw=False), "msgpack"
+    return json.loads(body.decode("utf-8")), "json"
+
+def send_json(sock: socket.socket, obj: dict, codec: str = "json", compress_min: int | None = None):
+    sock.sendall(pack(obj, codec, compress_min))
+
+def recv_message(sock: socket.socket, max_inflated: int = LENGTH_MASK):
+    """
+    Lee una trama y devuelve (objeto, codec); (None, None) si la conexión se cerró.
+    `max_inflated`: tope del cuerpo descomprimido (el servidor usa MAX_REQUEST_INFLATED).
+    """
+    header = _recvall(sock, 4)
+    if not header:
+        return None, None
+    (value,) = struct.unpack(">I", header)
+    body = _recvall(sock, value & LENGTH_MASK)
+    if body is None:
+        return None, None
+    return _decode(value, body, max_inflated)
 
 def recv_json(sock: socket.socket):
-    # Read 4-byte length
+    """Lee una trama en cualquier codec (según el header) y devuelve el objeto."""
+    return recv_message(sock)[0]
+
+def recv_frame(sock: socket.socket) -> bytes | None:
+    """Lee una trama completa (header incluido) sin decodificarla, para reenviarla tal cual."""
     header = _recvall(sock, 4)
     if not header:
         return None
-    (length,) = struct.unpack(">I", header)
-    body = _recvall(sock, length)
+    (value,) = struct.unpack(">I", header)
+    body = _recvall(sock, value & LENGTH_MASK)
     if body is None:
         return None
-    return json.loads(body.decode("utf-8"))
+    return header + body
 
 def _recvall(sock: socket.socket, n: int) -> bytes | None:
     data = bytearray()
@@ -24,3 +120,19 @@ def _recvall(sock: socket.socket, n: int) -> bytes | None:
             return None
         data.extend(chunk)
     return bytes(data)
+
+# ---------- Variantes asyncio (mismo framing) ----------
+
+async def recv_message_async(reader: asyncio.StreamReader, max_inflated: int = LENGTH_MASK):
+    try:
+        header = await reader.readexactly(4)
+        (value,) = struct.unpack(">I", header)
+        body = await reader.readexactly(value & LENGTH_MASK)
+    except asyncio.IncompleteReadError:
+        return None, None
+    return _decode(value, body, max_inflated)
+
+async def send_json_async(writer: asyncio.StreamWriter, obj: dict, codec: str = "json",
+                          compress_min: int | None = None):
+    writer.write(pack(obj, codec, compress_min))
+    await writer.drain()
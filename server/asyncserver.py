@@ -0,0 +1,194 @@
+import asyncio
+import concurrent.futures
+import socket
+from typing import List, Optional
+
+from common.net import recv_message_async, send_json_async, pack, MAX_REQUEST_INFLATED
+from server.service import Service, dispatch, validate, wants_keepalive, \
+    subscription_filter, subscription_mode, subscription_since
+from server.subscribers import OutboundPolicy
+
+
+class _AsyncSubscriber:
+    """
+    Adapta un StreamWriter a la interfaz de socket que usa ObserverRegistry
+    (sendall / send_frame / shutdown / close). Los broadcasts llegan desde otros
+    hilos: la trama se encola (cola acotada con política de desborde) en el event
+    loop y una tarea propia del subscriptor la escribe, esperando drain().
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter, policy: OutboundPolicy):
+        self._loop = loop
+        self._writer = writer
+        self._queue = policy.new_queue()
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def sendall(self, data: bytes):
+        self.send_frame(data)
+
+    def send_frame(self, frame: bytes, key: Optional[str] = None, droppable: bool = True):
+        if self.closed:
+            raise OSError("Subscriptor desconectado")
+        self._loop.call_soon_threadsafe(self._push, frame, key, droppable)
+
+    def _push(self, frame: bytes, key: Optional[str], droppable: bool = True):
+        if self.closed:
+            return
+        if not self._queue.push(frame, key, droppable):
+            self.close()  # política 'disconnect': subscriptor lento
+            return
+        self._ready.set()
+
+    async def run_sender(self):
+        """Tarea dedicada: vacía la cola respetando el ritmo del cliente (drain)."""
+        while not self.closed:
+            await self._ready.wait()
+            self._ready.clear()
+            while not self.closed:
+                frame = self._queue.pop()
+                if frame is None:
+                    break
+                self._writer.write(frame)
+                await self._writer.drain()
+
+    def shutdown(self, how=None):
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._loop.call_soon_threadsafe(self._ready.set)
+            self._loop.call_soon_threadsafe(self._writer.close)
+
+
+class AsyncServer:
+    """
+    Motor de un solo event loop (asyncio): lee/escribe tramas de common.net sin un
+    hilo por conexión. Las llamadas al Service (bloqueantes: storage y auditoría)
+    se delegan al pool del Service (cola acotada, puede responder Busy).
+    """
+    def __init__(self, service: Service, idle_timeout: float = 30.0, policy: Optional[OutboundPolicy] = None):
+        self.service = service
+        self.idle_timeout = idle_timeout
+        self.policy = policy if policy is not None else OutboundPolicy()
+        self.log = service.log
+
+    async def _call(self, action: str, fn, *args):
+        return await asyncio.wrap_future(self.service.submit(action, fn, *args))
+
+    def _frame_sender(self, writer: asyncio.StreamWriter, codec: str, compress: Optional[int]):
+        """
+        send(objeto) para usar desde el pool: codifica en ese hilo, escribe en el loop y
+        espera drain() (contrapresión) hasta idle_timeout; si el cliente no lee, TimeoutError
+        y el hilo del pool queda libre.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.idle_timeout
+
+        async def write(frame: bytes):
+            writer.write(frame)
+            await asyncio.wait_for(writer.drain(), timeout)
+
+        def send(obj: dict):
+            future = asyncio.run_coroutine_threadsafe(write(pack(obj, codec, compress)), loop)
+            try:
+                future.result(timeout + 1.0)
+            except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+                future.cancel()
+                raise TimeoutError(f"el cliente no leyó el stream en {timeout}s")
+        return send
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        addr = writer.get_extra_info("peername")
+        log = self.log
+        keepalive = False
+        try:
+            while True:
+                try:
+                    # cada respuesta sale en el codec de la solicitud (flag del header; JSON por defecto)
+                    if keepalive:
+                        req, codec = await asyncio.wait_for(recv_message_async(reader, MAX_REQUEST_INFLATED),
+                                                            self.idle_timeout)
+                    else:
+                        req, codec = await recv_message_async(reader, MAX_REQUEST_INFLATED)
+                except asyncio.TimeoutError:
+                    log.debug(f"Conexión {addr} inactiva por {self.idle_timeout}s; cerrando.")
+                    return
+                if not req:
+                    return
+
+                log.debug(f"REQ {addr}: {req}")
+                keepalive = wants_keepalive(req, keepalive)
+                # COMPRESS=true: las tramas grandes de la respuesta salen comprimidas
+                compress = self.service.compress_for(req)
+
+                try:
+                    uuid_cli, action = validate(req)
+
+                    # ---- SUBSCRIBE ----
+                    if action == "subscribe":
+                        ids = subscription_filter(req)
+                        mode = subscription_mode(req)
+                        since = subscription_since(req)
+                        ack = await self._call(action, self.service.do_subscribe_ack, uuid_cli)
+                        if ack.get("OK"):
+                            await self._subscribe(uuid_cli, ids, mode, since, compress, ack, addr, reader, writer)
+                            return
+                        resp = ack
+
+                    # ---- GET / LIST / SET / STATS ----
+                    else:
+                        resp = await self._call(action, dispatch, self.service, uuid_cli, action, req,
+                                                self._frame_sender(writer, codec, compress))
+                except ValueError as ve:
+                    resp = {"OK": False, "Error": str(ve)}
+
+                await send_json_async(writer, resp, codec, compress)
+                if not keepalive:
+                    return
+
+        except TimeoutError:
+            # el cliente dejó de leer la respuesta: se corta sin esperar a vaciar el buffer
+            log.warning(f"Conexión {addr}: el cliente no lee la respuesta en {self.idle_timeout}s; cerrando.")
+            writer.transport.abort()
+        except Exception as e:
+            log.error(f"Error con {addr}: {e}")
+            try:
+                await send_json_async(writer, {"OK": False, "Error": f"{type(e).__name__}: {e}"})
+            except Exception:
+                pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _subscribe(self, uuid_cli: str, ids: Optional[List[str]], mode: str, since: Optional[int],
+                         compress: Optional[int], ack: dict, addr,
+                         reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sub = _AsyncSubscriber(asyncio.get_running_loop(), writer, self.policy)
+        # el acuse se escribe ya; lo que encole register_subscriber (replay, no descartable) sale después
+        self.service.register_subscriber(uuid_cli, sub, ids, mode, since, compress)
+        await send_json_async(writer, ack)
+        self.log.info(f"[SUBSCRIBE] {uuid_cli} @{addr} suscripto (filtro: {ids or 'todos'}, modo: {mode}); conexión queda abierta.")
+        sender = asyncio.create_task(sub.run_sender())
+        try:
+            # Sin hilo bloqueado: solo esperamos EOF para liberar el registro
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.service.observers.remove(uuid_cli, sub)
+            sub.closed = True
+            sender.cancel()
+
+    async def serve(self, srv: socket.socket):
+        """Atiende sobre un socket ya enlazado y en escucha (mismo bind que el motor de hilos)."""
+        srv.setblocking(False)
+        server = await asyncio.start_server(self.handle, sock=srv)
+        async with server:
+            await server.serve_forever()
+
+    def run(self, srv: socket.socket):
+        asyncio.run(self.serve(srv))
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+AUDIT_MODES = ("durable", "fast")
+
+
+class AuditWriter:
+    """
+    Auditoría fuera del camino de la solicitud (group commit): las entradas van a una
+    cola acotada y un hilo las escribe en lotes con CorporateLog.write_batch
+    (mock: un único append; DynamoDB: batch_writer).
+      - max_batch: entradas por lote como máximo
+      - linger:    segundos que se espera a que se sumen más entradas al lote (0 = solo lo encolado)
+      - mode:      durable → submit espera a que su lote esté escrito (la respuesta sale auditada)
+                   fast    → submit no espera; con la cola llena la entrada se descarta
+    """
+    def __init__(self, log_db, max_batch: int = 100, linger: float = 0.0, mode: str = "durable",
+                 max_pending: int = 10000, log=None):
+        if mode not in AUDIT_MODES:
+            raise ValueError(f"Modo de auditoría inválido '{mode}' (opciones: {', '.join(AUDIT_MODES)})")
+        if max_batch < 1:
+            raise ValueError("El lote de auditoría debe ser >= 1")
+        self._log_db = log_db
+        self.max_batch = max_batch
+        self.linger = linger
+        self.mode = mode
+        self._log = log
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._counters = {"flushed": 0, "dropped": 0, "failed": 0, "batches": 0, "max_batch_seen": 0}
+        self._thread = threading.Thread(target=self._run, name="audit", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict, exact: bool = False) -> None:
+        """Encola la entrada (exact=True: append_exact). En modo durable espera a que esté escrita."""
+        if self.mode == "fast":
+            try:
+                self._queue.put_nowait((record, exact, None))
+            except queue.Full:
+                self._count("dropped")
+                if self._log:
+                    self._log.warning("Cola de auditoría llena; entrada descartada.")
+            return
+        done: Future = Future()
+        self._queue.put((record, exact, done))  # durable: con la cola llena se espera (no se descarta)
+        done.result()  # propaga el error de escritura al que auditó
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "max_batch": self.max_batch, "pending": self._queue.qsize(),
+                    **self._counters}
+
+    def stop(self):
+        """Escribe lo pendiente y detiene el hilo."""
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _next_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        stop = False
+        while len(batch) < self.max_batch:
+            try:
+                timeout = deadline - time.monotonic()
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                stop = True
+                break
+            batch.append(entry)
+        return batch, stop
+
+    def _write(self, batch):
+        items, waiters = [], []
+        for record, exact, done in batch:
+            try:
+                items.append(self._log_db.prepare(record, exact))
+                waiters.append(done)
+            except ValueError as e:
+                self._count("failed")
+                if done is not None:
+                    done.set_exception(e)
+        try:
+            self._log_db.write_batch(items)
+        except Exception as e:
+            self._count("failed", len(items))
+            if self._log:
+                self._log.error(f"Error escribiendo lote de auditoría ({len(items)} entradas): {e}")
+            for done in waiters:
+                if done is not None:
+                    done.set_exception(e)
+            return
+        with self._lock:
+            self._counters["flushed"] += len(items)
+            self._counters["batches"] += 1
+            self._counters["max_batch_seen"] = max(self._counters["max_batch_seen"], len(items))
+        for done in waiters:
+            if done is not None:
+                done.set_result(None)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._next_batch(first)
+            self._write(batch)
+            if stop:
+                return
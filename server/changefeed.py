@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+from collections import deque
+from typing import List, Optional
+
+
+class ChangeFeed:
+    """
+    Historial acotado de eventos 'change' con número de secuencia (SEQ) monótono.
+    Un subscriptor que se reconecta pide los eventos posteriores a su último SEQ;
+    si parte del hueco ya salió del buffer debe hacer resync (list completo).
+    Con `path` los eventos se agregan a un archivo JSONL y se recargan al arrancar,
+    así la numeración sobrevive a un reinicio del servidor.
+    """
+    def __init__(self, capacity: int = 1024, path: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("La capacidad del historial debe ser >= 1")
+        self.capacity = capacity
+        self.path = path
+        self._events = deque(maxlen=capacity)
+        self._seq = 0
+        self._file_lines = 0
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def append(self, event: dict) -> dict:
+        """Registra el evento; si no trae SEQ (lo asigna el bus con --workers) le da el siguiente."""
+        with self._lock:
+            if event.get("SEQ") is None:
+                event = dict(event, SEQ=self._seq + 1)
+            self._seq = max(self._seq, event["SEQ"])
+            self._events.append(event)
+            if self.path:
+                self._persist(event)
+        return event
+
+    def since(self, seq: int) -> Optional[List[dict]]:
+        """Eventos con SEQ > seq, en orden; None si el hueco ya no está completo en el buffer."""
+        with self._lock:
+            if seq >= self._seq:
+                # seq mayor al último: el historial se reinició (sin archivo) y no se puede reconstruir
+                return [] if seq == self._seq else None
+            oldest = self._events[0]["SEQ"] if self._events else self._seq + 1
+            if seq < oldest - 1:
+                return None
+            return [e for e in self._events if e["SEQ"] > seq]
+
+    def replica(self) -> "ChangeFeed":
+        """Copia en memoria (sin archivo): la usa cada worker, el que persiste es el proceso principal."""
+        copy = ChangeFeed(self.capacity)
+        with self._lock:
+            copy._events.extend(self._events)
+            copy._seq = self._seq
+        return copy
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"last_seq": self._seq, "buffered": len(self._events), "capacity": self.capacity}
+
+    # ---------- persistencia (JSONL) ----------
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # línea truncada por un corte: se ignora
+                self._file_lines += 1
+                self._events.append(event)
+                self._seq = max(self._seq, event.get("SEQ", 0))
+
+    def _persist(self, event: dict):
+        if self._file_lines >= 2 * self.capacity:
+            # compactar: el archivo conserva solo lo que sigue en el buffer
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in self._events:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+            self._file_lines = len(self._events)
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._file_lines += 1
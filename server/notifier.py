@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+_WAKE = object()   # despierta al hilo para recalcular el próximo vencimiento
+
+
+def _fold(prev: dict, new: dict) -> dict:
+    """Combina dos eventos 'change' del mismo id: queda el estado más nuevo y MERGED cuenta los sets."""
+    folded = dict(new)
+    folded["MERGED"] = prev.get("MERGED", 1) + 1
+    d0, d1 = prev.get("DELTA"), new.get("DELTA")
+    if d0 and d1:
+        folded["DELTA"] = dict(d1, changed={**d0["changed"], **d1["changed"]})
+    return folded
+
+
+class Notifier:
+    """
+    Hilo de notificación: do_set solo encola el evento y responde; el fan-out
+    (bus o subscriptores locales) lo hace este hilo, en orden de llegada.
+    Con `coalesce_window` (segundos) los eventos de un mismo id que llegan dentro
+    de la ventana se combinan en uno solo con el estado final y MERGED = cantidad
+    de sets; `suppressed` cuenta los eventos que no se enviaron por eso.
+    """
+    def __init__(self, sink, log=None, max_pending: int = 10000, coalesce_window: float = 0.0):
+        self._sink = sink
+        self._log = log
+        self._queue = queue.Queue(max_pending)
+        self.coalesce_window = coalesce_window
+        self._held: "OrderedDict[str, list]" = OrderedDict()   # id -> [vencimiento, evento]
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.suppressed = 0
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def submit(self, event: dict):
+        key = event.get("DATA", {}).get("id") if self.coalesce_window > 0 else None
+        if self.coalesce_window > 0 and "EVENTS" in event:
+            # lote (mset): lo retenido sale antes, para no entregar un estado viejo después del lote
+            with self._lock:
+                held = [e for _, e in self._held.values()]
+                self._held.clear()
+            for e in held:
+                self._put(e)
+        if key is not None:
+            with self._lock:
+                held = self._held.get(key)
+                if held is not None:
+                    held[1] = _fold(held[1], event)
+                    self.suppressed += 1
+                    return
+                first = not self._held
+                self._held[key] = [time.monotonic() + self.coalesce_window, event]
+            if first:
+                self._put(_WAKE)
+            return
+        self._put(event)
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._queue.qsize() + len(self._held)
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if item is _WAKE:
+                return  # el hilo ya tiene trabajo pendiente y va a revisar los vencimientos
+            self.dropped += 1
+            if self._log:
+                self._log.warning("Cola de notificaciones llena; evento descartado.")
+
+    def _next_timeout(self) -> Optional[float]:
+        with self._lock:
+            if not self._held:
+                return None
+            deadline = next(iter(self._held.values()))[0]
+        return max(0.0, deadline - time.monotonic())
+
+    def _take_due(self, everything: bool = False) -> list:
+        """Saca los eventos retenidos cuya ventana venció (en orden de llegada)."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._held:
+                key, (deadline, event) = next(iter(self._held.items()))
+                if not everything and deadline > now:
+                    break
+                del self._held[key]
+                due.append(event)
+        return due
+
+    def _emit(self, event: dict):
+        try:
+            self._sink(event)
+        except Exception as e:
+            if self._log:
+                self._log.warning(f"Broadcast error: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                item = _WAKE
+            if item is None:
+                for event in self._take_due(everything=True):
+                    self._emit(event)
+                return
+            if item is not _WAKE:
+                self._emit(item)
+            for event in self._take_due():
+                self._emit(event)
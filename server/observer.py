@@ -1,13 +1,34 @@
 import threading, socket, json
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from common.net import compress_frame
 
 class ObserverRegistry:
-    """Registro simple de subscriptores: UUID -> socket"""
+    """
+    Registro de subscriptores: UUID -> socket.
+    Un subscriptor puede filtrar por IDs exactos o prefijos ("UADER-*"); para que un
+    set toque solo a los interesados se mantiene un índice id -> UUIDs y prefijo -> UUIDs.
+    Los subscriptores sin filtro reciben todo. En modo "delta" un subscriptor recibe
+    solo los campos cambiados/eliminados y la versión del registro, en vez del registro completo.
+    Los subscriptores que pidieron compresión reciben la variante comprimida de cada trama,
+    que se calcula una sola vez por envío.
+    """
     def __init__(self):
         self._subs: Dict[str, socket.socket] = {}
+        self._filters: Dict[str, Tuple[List[str], List[str]]] = {}   # uuid -> (ids, prefijos)
+        self._unfiltered: Set[str] = set()
+        self._by_id: Dict[str, Set[str]] = {}
+        self._by_prefix: Dict[str, Set[str]] = {}
+        self._delta: Set[str] = set()                                # uuids en modo delta
+        self._compress: Dict[str, int] = {}                          # uuid -> umbral de compresión
         self._lock = threading.Lock()
 
-    def add(self, uuid: str, sock: socket.socket):
+    def add(self, uuid: str, sock: socket.socket, ids: Optional[Iterable[str]] = None, mode: str = "full",
+            compress_min: Optional[int] = None):
+        """
+        `ids`: IDs exactos o prefijos terminados en '*'; None = sin filtro. `mode`: "full" o "delta".
+        `compress_min`: comprimir las tramas de al menos esos bytes; None = sin comprimir.
+        """
         with self._lock:
             # Si ya existe, cerramos la conexión anterior
             old = self._subs.get(uuid)
@@ -20,21 +41,189 @@ class ObserverRegistry:
                     old.close()
                 except Exception:
                     pass
+            self._unindex(uuid)
             self._subs[uuid] = sock
+            self._index(uuid, ids)
+            if mode == "delta":
+                self._delta.add(uuid)
+            if compress_min is not None:
+                self._compress[uuid] = compress_min
+
+    def remove(self, uuid: str, sock=None):
+        """Quita el subscriptor; si se indica sock, solo si sigue siendo el registrado."""
+        with self._lock:
+            if sock is None or self._subs.get(uuid) is sock:
+                self._subs.pop(uuid, None)
+                self._unindex(uuid)
+
+    def close_all(self):
+        with self._lock:
+            items = list(self._subs.values())
+            self._subs.clear()
+            self._filters.clear()
+            self._unfiltered.clear()
+            self._by_id.clear()
+            self._by_prefix.clear()
+            self._delta.clear()
+            self._compress.clear()
+        for sock in items:
+            try:
+                sock.shutdown(1)
+            except Exception:
+                pass
+            try:
+                sock.close()
+            except Exception:
+                pass
 
-    def remove(self, uuid: str):
+    def __len__(self):
         with self._lock:
-            self._subs.pop(uuid, None)
+            return len(self._subs)
+
+    # ---------- índice de filtros (llamar con el lock tomado) ----------
+
+    def _index(self, uuid: str, ids: Optional[Iterable[str]]):
+        if ids is None:
+            self._unfiltered.add(uuid)
+            return
+        exact, prefixes = [], []
+        for pattern in ids:
+            if pattern.endswith("*"):
+                prefixes.append(pattern[:-1])
+                self._by_prefix.setdefault(pattern[:-1], set()).add(uuid)
+            else:
+                exact.append(pattern)
+                self._by_id.setdefault(pattern, set()).add(uuid)
+        self._filters[uuid] = (exact, prefixes)
+
+    def _unindex(self, uuid: str):
+        self._unfiltered.discard(uuid)
+        self._delta.discard(uuid)
+        self._compress.pop(uuid, None)
+        exact, prefixes = self._filters.pop(uuid, ((), ()))
+        for index, keys in ((self._by_id, exact), (self._by_prefix, prefixes)):
+            for k in keys:
+                bucket = index.get(k)
+                if bucket is not None:
+                    bucket.discard(uuid)
+                    if not bucket:
+                        del index[k]
+
+    def _targets(self, item_id: Optional[str]) -> List[Tuple[str, socket.socket]]:
+        """Subscriptores interesados en item_id: O(interesados + largo del id), no O(todos)."""
+        if item_id is None:
+            return list(self._subs.items())
+        uuids = set(self._unfiltered)
+        uuids.update(self._by_id.get(item_id, ()))
+        if self._by_prefix:
+            for i in range(len(item_id) + 1):
+                uuids.update(self._by_prefix.get(item_id[:i], ()))
+        return [(u, self._subs[u]) for u in uuids if u in self._subs]
+
+    def _matches(self, uuid: str, item_id: Optional[str]) -> bool:
+        if item_id is None or uuid in self._unfiltered:
+            return True
+        exact, prefixes = self._filters.get(uuid, ((), ()))
+        return item_id in exact or any(item_id.startswith(p) for p in prefixes)
+
+    # ---------- envío ----------
+
+    def broadcast_frame(self, frame: bytes, key: Optional[str] = None, delta_frame: Optional[bytes] = None):
+        """
+        Envía la misma trama ya codificada (header + JSON) a los interesados: se serializa una sola vez.
+        `key` (id del registro) selecciona a los subscriptores por su filtro y permite a las
+        colas por subscriptor coalescer tramas del mismo id. Sin key se envía a todos.
+        Los subscriptores en modo delta reciben `delta_frame` (si es None, nada): esas tramas
+        no se coalescen, porque reemplazar un delta por otro perdería cambios.
+        """
+        with self._lock:
+            items = [(u, s, u in self._delta, self._compress.get(u)) for u, s in self._targets(key)]
+        zipped = {}
+        dead = [(u, s) for u, s, delta, cmin in items
+                if not self._send(s, delta, frame, key, delta_frame, cmin, zipped)]
+        for uuid, sock in dead:
+            self.remove(uuid, sock)
+
+    def broadcast_batch(self, frame: bytes, delta_frame: Optional[bytes], parts: List[tuple],
+                        only: Optional[str] = None):
+        """
+        Evento agregado de varios registros (mset). Los subscriptores sin filtro reciben una sola
+        trama (`frame` o `delta_frame` según el modo); los filtrados, la trama individual de cada
+        registro que les interesa. `parts`: (id, trama, trama delta o None) por registro.
+        `only`: enviar solo a ese subscriptor (replay: las tramas no se descartan).
+        """
+        with self._lock:
+            plan: Dict[str, list] = {}
+            for u in ([only] if only is not None else self._unfiltered):
+                if u in self._unfiltered and u in self._subs:
+                    plan[u] = [(frame, None, delta_frame)]
+            for item_id, f, d in parts:
+                for u, _ in self._targets(item_id):
+                    if u not in self._unfiltered and (only is None or u == only):
+                        plan.setdefault(u, []).append((f, item_id, d))
+            items = [(u, self._subs[u], u in self._delta, self._compress.get(u), frames)
+                     for u, frames in plan.items()]
+        zipped = {}
+        dead = []
+        for uuid, sock, delta, cmin, frames in items:
+            for f, key, d in frames:
+                if not self._send(sock, delta, f, key, d, cmin, zipped, droppable=only is None):
+                    dead.append((uuid, sock))
+                    break
+        for uuid, sock in dead:
+            self.remove(uuid, sock)
+
+    def send_to(self, uuid: str, frame: bytes, key: Optional[str] = None, delta_frame: Optional[bytes] = None):
+        """
+        Como broadcast_frame pero para un solo subscriptor (replay de eventos perdidos o aviso
+        de resync): la trama no se descarta aunque la cola del subscriptor esté llena.
+        """
+        with self._lock:
+            sock = self._subs.get(uuid)
+            if sock is None or not self._matches(uuid, key):
+                return
+            delta = uuid in self._delta
+            cmin = self._compress.get(uuid)
+        if not self._send(sock, delta, frame, key, delta_frame, cmin, {}, droppable=False):
+            self.remove(uuid, sock)
+
+    @staticmethod
+    def _send(sock, delta: bool, frame: bytes, key: Optional[str], delta_frame: Optional[bytes],
+              compress_min: Optional[int] = None, zipped: Optional[dict] = None, droppable: bool = True) -> bool:
+        """
+        Envía la variante que corresponde al modo (comprimida si el subscriptor la pidió);
+        False si el subscriptor falló. `zipped` guarda las tramas ya comprimidas en este envío.
+        `droppable=False`: la cola del subscriptor no puede descartarla (replay).
+        """
+        data, frame_key = (delta_frame, None) if delta else (frame, key)
+        if data is None:
+            return True
+        if compress_min is not None:
+            cached = zipped.get(id(data)) if zipped is not None else None
+            if cached is None:
+                cached = compress_frame(data, compress_min)
+                if zipped is not None:
+                    zipped[id(data)] = cached
+            data = cached
+        try:
+            send_frame = getattr(sock, "send_frame", None)
+            if send_frame is not None:
+                send_frame(data, frame_key, droppable)
+            else:
+                sock.sendall(data)
+        except Exception:
+            return False
+        return True
 
-    def broadcast(self, payload: dict, send_fn):
+    def broadcast(self, payload: dict, send_fn, item_id: Optional[str] = None):
         # copia para iterar sin bloquear
         with self._lock:
-            items = list(self._subs.items())
+            items = self._targets(item_id)
         dead = []
         for uuid, sock in items:
             try:
                 send_fn(sock, payload)
             except Exception:
-                dead.append(uuid)
-        for uuid in dead:
-            self.remove(uuid)
+                dead.append((uuid, sock))
+        for uuid, sock in dead:
+            self.remove(uuid, sock)
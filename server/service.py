@@ -0,0 +1,592 @@
+import base64
+import json
+import os
+import time
+import uuid
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from common.net import pack_json, COMPRESS_MIN_BYTES
+from storage.adapter import CorporateData, CorporateLog
+from server.observer import ObserverRegistry
+from server.workerpool import WorkerPool, Busy
+from server.notifier import Notifier
+from server.changefeed import ChangeFeed
+from server.audit import AuditWriter
+
+# ======= Validaciones =======
+UUID_HEX_RE = re.compile(r"^[0-9a-f]{12}$")
+ALLOWED = {"subscribe", "get", "mget", "list", "set", "mset", "batch", "stats"}
+# Acciones que no pasan por la cola del pool (deben responder aun con el servidor saturado)
+UNQUEUED = {"stats"}
+BUSY = {"OK": False, "Error": "Busy"}
+SUBSCRIBE_MODES = {"full", "delta"}
+# Paginación de list: registros por página si llega CURSOR sin LIMIT, y tope de LIMIT
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+# IDs por solicitud mget / registros por solicitud mset
+MGET_MAX_IDS = 1000
+MSET_MAX_ITEMS = 1000
+# batch: subsolicitudes por envoltorio, acciones admitidas (las de escritura hacen de barrera)
+# e hilos para correr en paralelo las lecturas consecutivas
+BATCH_MAX_REQUESTS = 100
+BATCH_ACTIONS = {"get", "mget", "list", "set", "mset"}
+BATCH_WRITES = {"set", "mset"}
+BATCH_WORKERS = 8
+
+
+def _require_uuid(req: dict) -> str:
+    val = str(req.get("UUID", "")).strip().lower()
+    if not UUID_HEX_RE.fullmatch(val):
+        raise ValueError("Falta 'UUID' o no es válido (12 hex, ej: 'a1b2c3d4e5f6').")
+    return val
+
+
+def _require_action(req: dict) -> str:
+    action = str(req.get("ACTION", "")).strip().lower()
+    if action not in ALLOWED:
+        raise ValueError("ACTION debe ser 'subscribe', 'get', 'mget', 'list', 'set', 'mset', 'batch' o 'stats'.")
+    return action
+
+
+def validate(req: dict) -> tuple[str, str]:
+    """Valida UUID y ACTION de una solicitud; lanza ValueError con el mensaje para el cliente."""
+    return _require_uuid(req), _require_action(req)
+
+
+def wants_keepalive(req: dict, current: bool = False) -> bool:
+    """KEEPALIVE=true deja la conexión abierta para más solicitudes; false la cierra tras responder."""
+    if "KEEPALIVE" not in req:
+        return current
+    return bool(req.get("KEEPALIVE"))
+
+
+def subscription_filter(req: dict) -> Optional[List[str]]:
+    """IDS opcional de subscribe: IDs exactos o prefijos terminados en '*' (ej: 'UADER-*')."""
+    ids = req.get("IDS")
+    if ids is None:
+        return None
+    if isinstance(ids, str):
+        ids = [ids]
+    if not isinstance(ids, list) or not ids or not all(isinstance(x, str) and x.strip() for x in ids):
+        raise ValueError("IDS debe ser una lista no vacía de IDs o prefijos (terminados en '*').")
+    return [x.strip() for x in ids]
+
+
+def subscription_mode(req: dict) -> str:
+    """MODE opcional de subscribe: "full" (registro completo, default) o "delta" (solo lo que cambió)."""
+    mode = str(req.get("MODE", "full")).strip().lower()
+    if mode not in SUBSCRIBE_MODES:
+        raise ValueError("MODE debe ser 'full' o 'delta'.")
+    return mode
+
+
+def subscription_since(req: dict) -> Optional[int]:
+    """SINCE opcional de subscribe: último SEQ recibido; se reenvían los eventos posteriores."""
+    since = req.get("SINCE")
+    if since is None:
+        return None
+    if isinstance(since, bool) or not isinstance(since, int) or since < 0:
+        raise ValueError("SINCE debe ser un entero >= 0 (último SEQ recibido).")
+    return since
+
+
+def encode_cursor(key: dict) -> str:
+    """Cursor opaco para el cliente a partir de la última clave leída."""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor) -> dict:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(str(cursor).encode("ascii")))
+    except (ValueError, UnicodeError):
+        key = None
+    if not isinstance(key, dict) or not isinstance(key.get("id"), str):
+        raise ValueError("CURSOR inválido (usar el valor NEXT de la respuesta anterior).")
+    return {"id": key["id"]}
+
+
+def list_page_args(req: dict) -> Optional[Tuple[int, Optional[dict]]]:
+    """
+    LIMIT y CURSOR opcionales de list. Sin ninguno de los dos: None (list completo).
+    Con alguno: (registros por página, clave de inicio o None); LIMIT se acota a LIST_MAX_LIMIT.
+    """
+    limit, cursor = req.get("LIMIT"), req.get("CURSOR")
+    if limit is None and cursor is None:
+        return None
+    if limit is None:
+        limit = LIST_DEFAULT_LIMIT
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise ValueError("LIMIT debe ser un entero >= 1.")
+    return min(limit, LIST_MAX_LIMIT), decode_cursor(cursor) if cursor is not None else None
+
+
+def list_stream_chunk(req: dict) -> Optional[int]:
+    """STREAM=true en list: registros por trama (CHUNK, default LIST_DEFAULT_LIMIT); None = sin streaming."""
+    if not req.get("STREAM"):
+        return None
+    if req.get("LIMIT") is not None or req.get("CURSOR") is not None:
+        raise ValueError("STREAM no se combina con LIMIT/CURSOR.")
+    chunk = req.get("CHUNK", LIST_DEFAULT_LIMIT)
+    if isinstance(chunk, bool) or not isinstance(chunk, int) or chunk < 1:
+        raise ValueError("CHUNK debe ser un entero >= 1.")
+    return min(chunk, LIST_MAX_LIMIT)
+
+
+def mget_ids(req: dict) -> List[str]:
+    """IDS de mget: lista no vacía de IDs (sin repetidos, en el orden pedido)."""
+    ids = req.get("IDS")
+    if not isinstance(ids, list) or not ids or not all(isinstance(x, str) and x.strip() for x in ids):
+        raise ValueError("Missing 'IDS' for ACTION 'mget' (lista no vacía de IDs).")
+    ids = list(dict.fromkeys(x.strip() for x in ids))
+    if len(ids) > MGET_MAX_IDS:
+        raise ValueError(f"IDS admite hasta {MGET_MAX_IDS} IDs por solicitud.")
+    return ids
+
+
+def mset_items(req: dict) -> list:
+    """DATA de mset: lista no vacía de objetos (cada uno con su 'id'; se validan uno por uno en do_mset)."""
+    items = req.get("DATA")
+    if not isinstance(items, list) or not items:
+        raise ValueError("DATA must be a non-empty list of objects for ACTION 'mset'.")
+    if len(items) > MSET_MAX_ITEMS:
+        raise ValueError(f"mset admite hasta {MSET_MAX_ITEMS} registros por solicitud.")
+    return items
+
+
+def batch_requests(req: dict) -> list:
+    """DATA de batch: lista no vacía de subsolicitudes (se validan una por una en do_batch)."""
+    subs = req.get("DATA")
+    if not isinstance(subs, list) or not subs:
+        raise ValueError("DATA must be a non-empty list of requests for ACTION 'batch'.")
+    if len(subs) > BATCH_MAX_REQUESTS:
+        raise ValueError(f"batch admite hasta {BATCH_MAX_REQUESTS} solicitudes.")
+    return subs
+
+
+def request_fields(req: dict) -> Optional[List[str]]:
+    """FIELDS opcional de get/list: campos a devolver (el id siempre se incluye); None = todos."""
+    fields = req.get("FIELDS")
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [fields]
+    if not isinstance(fields, list) or not fields or not all(isinstance(x, str) and x.strip() for x in fields):
+        raise ValueError("FIELDS debe ser una lista no vacía de nombres de campo.")
+    names = ["id"]
+    for x in fields:
+        x = x.strip()
+        if x not in names:
+            names.append(x)
+    return names
+
+
+def _extract_id(req: dict) -> Optional[str]:
+    """Devuelve el ID desde el nivel superior o desde DATA.id / DATA.ID."""
+    if "ID" in req and str(req["ID"]).strip():
+        return str(req["ID"]).strip()
+    data = req.get("DATA")
+    if isinstance(data, dict):
+        if data.get("id"):
+            return str(data["id"]).strip()
+        if data.get("ID"):
+            return str(data["ID"]).strip()
+    return None
+
+
+# ======= Servicio (Proxy a la capa de datos + auditoría + observer) =======
+
+class Service:
+    def __init__(self, data_db: CorporateData, log_db: CorporateLog, observers: ObserverRegistry, log,
+                 subscribers=None, pool: Optional[WorkerPool] = None, bus=None, feed: Optional[ChangeFeed] = None,
+                 coalesce_window: float = 0.0, audit: Optional[AuditWriter] = None,
+                 compress_min: int = COMPRESS_MIN_BYTES):
+        self.data_db = data_db
+        self.log_db = log_db
+        self.observers = observers
+        self.log = log
+        # SubscriberManager (motor por hilos): dueño de los sockets suscriptos
+        self.subscribers = subscribers
+        # Pool fijo con cola acotada: limita la concurrencia contra storage
+        self.pool = pool if pool is not None else WorkerPool()
+        # Auditoría en lotes (group commit) en vez de un put_item por solicitud
+        self.audit = audit if audit is not None else AuditWriter(log_db, log=log)
+        # Bus entre procesos (--workers N): los eventos se publican ahí y vuelven por deliver()
+        self.bus = bus
+        # Historial de eventos con SEQ para que un subscriptor que se reconecta recupere lo perdido
+        self.feed = feed if feed is not None else ChangeFeed()
+        # deliver y el replay de register_subscriber no se intercalan: no hay eventos perdidos ni duplicados
+        self._deliver_lock = threading.Lock()
+        # Fan-out fuera del camino de la respuesta (opcionalmente combinando sets seguidos del mismo id)
+        self.notifier = Notifier(self._route, log, coalesce_window=coalesce_window)
+        # Lecturas en paralelo dentro de un batch (aparte del pool: la tarea del batch espera por ellas)
+        self._batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+        # Bytes a partir de los que se comprimen las tramas para quien manda COMPRESS (0 = nunca)
+        self.compress_min = compress_min
+
+    def compress_for(self, req: dict) -> Optional[int]:
+        """Umbral de compresión de las tramas para quien envió `req` (None: sin comprimir)."""
+        if req.get("COMPRESS") and self.compress_min > 0:
+            return self.compress_min
+        return None
+
+    def submit(self, action: str, fn, *args) -> Future:
+        """
+        Encola fn(*args) en el pool. El Future siempre resuelve a una respuesta:
+        si la cola está llena (o la tarea fue desplazada por otra más prioritaria)
+        resuelve a {"OK": False, "Error": "Busy"} sin esperar.
+        """
+        if action in UNQUEUED:
+            fut: Future = Future()
+            fut.set_result(fn(*args))
+            return fut
+        try:
+            inner = self.pool.submit(action, fn, *args)
+        except Busy:
+            inner = Future()
+            inner.set_result(dict(BUSY))
+            return inner
+        outer: Future = Future()
+
+        def _done(f: Future):
+            exc = f.exception()
+            if isinstance(exc, Busy):
+                outer.set_result(dict(BUSY))
+            elif exc is not None:
+                outer.set_exception(exc)
+            else:
+                outer.set_result(f.result())
+        inner.add_done_callback(_done)
+        return outer
+
+    def _audit(self, uuid_cli: str, action: str, item_id: Optional[str] = None) -> int:
+        """Registra en CorporateLog (modo general) y devuelve timestamp en ms."""
+        now = int(time.time() * 1000)
+        entry = {"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": action, "ts": now}
+        if item_id is not None:
+            entry["id"] = item_id  # GET debe registrar "ID solicitado"
+        self.audit.submit(entry)
+        return now
+
+    def do_get(self, uuid_cli: str, item_id: str, fields: Optional[List[str]] = None) -> dict:
+        self._audit(uuid_cli, "get", item_id)
+        item = self.data_db.get(item_id, fields)
+        if item:
+            return {"OK": True, "DATA": item}
+        return {"OK": False, "Error": "NotFound"}
+
+    def do_mget(self, uuid_cli: str, ids: List[str], fields: Optional[List[str]] = None) -> dict:
+        """Varios get en una solicitud: una sola entrada de auditoría con todos los IDs."""
+        now = int(time.time() * 1000)
+        self.audit.submit({"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": "mget", "ids": ids, "ts": now})
+        found = self.data_db.get_many(ids, fields)
+        return {"OK": True, "DATA": [found[k] for k in ids if k in found],
+                "MISSING": [k for k in ids if k not in found]}
+
+    def do_list(self, uuid_cli: str, page: Optional[Tuple[int, Optional[dict]]] = None,
+                fields: Optional[List[str]] = None) -> dict:
+        self._audit(uuid_cli, "list")  # sin id
+        if page is None:
+            return {"OK": True, "DATA": self.data_db.list_all(fields)}
+        items, last_key = self.data_db.list_page(*page, fields)
+        return {"OK": True, "DATA": items, "NEXT": encode_cursor(last_key) if last_key else None}
+
+    def do_list_stream(self, uuid_cli: str, chunk: int, send, fields: Optional[List[str]] = None) -> dict:
+        """
+        list en streaming: envía tramas {"OK": true, "CHUNK": [...]} con `send(objeto)` a medida
+        que el storage entrega páginas, y devuelve la trama final {"OK": true, "END": true, "COUNT": n}.
+        Si falla a mitad de camino la trama final es {"OK": false, "END": true, "Error": ...}.
+        `send` corre en el hilo del pool: debe tener un tope de tiempo y lanzar OSError
+        (p. ej. TimeoutError) si el cliente no lee, para no retener al hilo.
+        """
+        self._audit(uuid_cli, "list")  # sin id
+        count, buf = 0, []
+        pages = self.data_db.iter_pages(fields)
+        try:
+            for page in pages:
+                for item in page:
+                    buf.append(item)
+                    if len(buf) >= chunk:
+                        send({"OK": True, "CHUNK": buf})
+                        count += len(buf)
+                        buf = []
+            if buf:
+                send({"OK": True, "CHUNK": buf})
+                count += len(buf)
+        except OSError:
+            raise  # el cliente se desconectó o no lee (timeout de send): no hay a quién avisar
+        except Exception as e:
+            self.log.error(f"list en streaming interrumpido tras {count} registros: {e}")
+            return {"OK": False, "END": True, "COUNT": count, "Error": f"{type(e).__name__}: {e}"}
+        finally:
+            pages.close()  # corta el scan (y sus hilos) si se abandonó a mitad de camino
+        return {"OK": True, "END": True, "COUNT": count}
+
+    def do_set(self, uuid_cli: str, item_id: str, value_obj: dict) -> dict:
+        if not isinstance(value_obj, dict):
+            return {"OK": False, "Error": "DATA must be an object with fields to update."}
+
+        # Normalizar payload (si llega 'ID' dentro de DATA, lo homogenizamos a 'id')
+        payload = dict(value_obj)
+        payload["id"] = item_id          # ← asegurar clave correcta para upsert
+        payload.pop("ID", None)
+
+        ts = self._audit(uuid_cli, "set")  # ← sin id en la auditoría
+        saved, delta = self.data_db.upsert_delta(payload)
+
+        # Respuesta al solicitante
+        resp = {"OK": True, "DATA": saved}
+
+        # Notificación a todos los suscriptores (DELTA se separa en deliver según el modo)
+        event = {"ACTION": "change", "DATA": saved, "ts": ts, "DELTA": delta}
+        try:
+            self.notify(event)
+            self.log.debug(f"[BROADCAST] id='{item_id}' notificado a suscriptores")
+        except Exception as be:
+            self.log.warning(f"Broadcast error: {be}")
+
+        return resp
+
+    def do_mset(self, uuid_cli: str, items: list) -> dict:
+        """
+        Varios set en una solicitud: una entrada de auditoría, un upsert en lote y un solo
+        evento agregado. RESULTS trae el estado de cada registro (en el orden recibido).
+        """
+        results: list = [None] * len(items)
+        payloads, positions = [], []
+        for i, value_obj in enumerate(items):
+            item_id = _extract_id({"DATA": value_obj}) if isinstance(value_obj, dict) else None
+            if not item_id:
+                results[i] = {"OK": False, "Error": "Each item must be an object with 'id'."}
+                continue
+            payload = dict(value_obj)
+            payload["id"] = item_id
+            payload.pop("ID", None)
+            payloads.append(payload)
+            positions.append(i)
+
+        now = int(time.time() * 1000)
+        self.audit.submit({"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": "mset",
+                           "ids": [p["id"] for p in payloads], "ts": now})
+        changes = []
+        for i, payload, outcome in zip(positions, payloads, self.data_db.upsert_many(payloads) if payloads else []):
+            if isinstance(outcome, Exception):
+                self.log.error(f"mset: fallo al guardar id='{payload['id']}': {outcome}")
+                results[i] = {"id": payload["id"], "OK": False, "Error": f"{type(outcome).__name__}: {outcome}"}
+                continue
+            saved, delta = outcome
+            results[i] = {"id": saved["id"], "OK": True, "VERSION": delta["version"]}
+            changes.append({"ACTION": "change", "DATA": saved, "ts": now, "DELTA": delta})
+
+        if changes:
+            try:
+                self.notify({"ACTION": "batch", "EVENTS": changes, "ts": now})
+            except Exception as be:
+                self.log.warning(f"Broadcast error: {be}")
+        failed = sum(1 for r in results if not r["OK"])
+        return {"OK": failed == 0, "RESULTS": results, "FAILED": failed}
+
+    def do_batch(self, uuid_cli: str, subs: list) -> dict:
+        """
+        Varias solicitudes get/mget/list/set/mset en un solo viaje; las respuestas vuelven en orden.
+        Las lecturas seguidas corren en paralelo; cada escritura espera a las anteriores y las
+        siguientes a ella, así una lectura ve los set que la preceden en el lote.
+        Cada subsolicitud se audita como si hubiera llegado sola (con el UUID del lote).
+        """
+        responses: list = [None] * len(subs)
+
+        def run(i: int, sub: dict, action: str):
+            try:
+                responses[i] = dispatch(self, uuid_cli, action, sub)
+            except ValueError as ve:
+                responses[i] = {"OK": False, "Error": str(ve)}
+            except Exception as e:
+                self.log.error(f"batch: fallo en la solicitud {i} ({action}): {e}")
+                responses[i] = {"OK": False, "Error": f"{type(e).__name__}: {e}"}
+
+        reads: list = []
+        for i, sub in enumerate(subs):
+            action = str(sub.get("ACTION", "")).strip().lower() if isinstance(sub, dict) else ""
+            if action not in BATCH_ACTIONS:
+                responses[i] = {"OK": False, "Error": "Each batch item must be a get, mget, list, set or mset request."}
+                continue
+            if action in BATCH_WRITES:
+                for fut in reads:
+                    fut.result()
+                reads = []
+                run(i, sub, action)
+            else:
+                reads.append(self._batch_pool.submit(run, i, sub, action))
+        for fut in reads:
+            fut.result()
+        return {"OK": all(r.get("OK") for r in responses), "DATA": responses}
+
+    def notify(self, event: dict):
+        """Encola el evento para el Notifier; la respuesta del set no espera el fan-out."""
+        self.notifier.submit(event)
+
+    def _route(self, event: dict):
+        """Con varios procesos el evento va al bus (que lo reparte a todos, este incluido); si no, se entrega acá."""
+        if self.bus is not None:
+            self.bus.publish(event)
+        else:
+            self.deliver(event)
+
+    def deliver(self, event: dict):
+        """
+        Registra el evento en el historial (le asigna SEQ si no viene del bus) y lo entrega
+        a los subscriptores conectados a este proceso. Cada variante (registro completo /
+        delta) se codifica una sola vez; un set que no cambió nada no genera delta.
+        """
+        for change in event.get("EVENTS") or [event]:
+            data, delta = change.get("DATA"), change.get("DELTA")
+            if isinstance(data, dict) and delta:
+                # con --workers el set pudo venir de otro proceso
+                self.data_db.cache_update(data, delta["version"])
+        with self._deliver_lock:
+            event = self.feed.append(event)
+            self._publish(event)
+
+    def _publish(self, event: dict, only: Optional[str] = None):
+        """
+        Codifica el evento del historial y lo envía a los subscriptores (o solo a `only`, en el replay).
+        Un evento "batch" (mset) va como una sola trama a los subscriptores sin filtro y como
+        un "change" por id a los filtrados; todas las tramas llevan el SEQ del lote.
+        """
+        if event.get("ACTION") != "batch":
+            item_id, frame, delta_frame = self._frames(event)
+            if only is None:
+                self.observers.broadcast_frame(frame, key=item_id, delta_frame=delta_frame)
+            else:
+                self.observers.send_to(only, frame, key=item_id, delta_frame=delta_frame)
+            return
+        seq, parts, changes, deltas = event.get("SEQ"), [], [], []
+        for change in event["EVENTS"]:
+            change = dict(change, SEQ=seq)
+            parts.append(self._frames(change))
+            changes.append({k: v for k, v in change.items() if k not in ("DELTA", "SEQ")})
+            compact = self._compact_delta(change)
+            if compact is not None:
+                deltas.append({k: v for k, v in compact.items() if k != "SEQ"})
+        frame = pack_json({"ACTION": "batch", "EVENTS": changes, "ts": event.get("ts"), "SEQ": seq})
+        delta_frame = None
+        if deltas:
+            delta_frame = pack_json({"ACTION": "batch", "MODE": "delta", "EVENTS": deltas,
+                                     "ts": event.get("ts"), "SEQ": seq})
+        self.observers.broadcast_batch(frame, delta_frame, parts, only=only)
+
+    @staticmethod
+    def _compact_delta(event: dict) -> Optional[dict]:
+        """Evento delta de un "change" (None si el set no cambió nada)."""
+        delta = event.get("DELTA")
+        if not delta or not delta["changed"]:
+            return None
+        compact = {"ACTION": "change", "MODE": "delta", "ID": delta["id"], "VERSION": delta["version"],
+                   "CHANGED": delta["changed"], "ts": event.get("ts"), "SEQ": event.get("SEQ")}
+        if "MERGED" in event:
+            compact["MERGED"] = event["MERGED"]
+        return compact
+
+    @classmethod
+    def _frames(cls, event: dict):
+        """Devuelve (id, trama completa, trama delta o None) de un evento "change" del historial."""
+        compact = cls._compact_delta(event)
+        event = dict(event)
+        event.pop("DELTA", None)
+        item_id = event.get("DATA", {}).get("id")
+        return item_id, pack_json(event), pack_json(compact) if compact is not None else None
+
+    def register_subscriber(self, uuid_cli: str, sub, ids: Optional[List[str]] = None, mode: str = "full",
+                            since: Optional[int] = None, compress_min: Optional[int] = None):
+        """
+        Registra el subscriptor en ObserverRegistry. Con `since` le reenvía primero los eventos
+        posteriores a ese SEQ o, si el hueco ya no está en el historial, un aviso
+        {"ACTION": "resync", "SEQ": último} para que haga un list completo. Las tramas del replay
+        no se descartan ni cuentan para --max-pending (el historial ya las acota a --feed-size).
+        `compress_min`: el subscriptor recibe comprimidas las tramas de al menos ese tamaño.
+        """
+        with self._deliver_lock:
+            self.observers.add(uuid_cli, sub, ids, mode, compress_min)
+            if since is None:
+                return
+            missed = self.feed.since(since)
+            if missed is None:
+                self.log.info(f"[SUBSCRIBE] {uuid_cli} pidió SEQ>{since}, fuera del historial: resync.")
+                self.observers.send_to(uuid_cli, pack_json({"ACTION": "resync", "SEQ": self.feed.last_seq}))
+                return
+            for event in missed:
+                self._publish(event, only=uuid_cli)
+            if missed:
+                self.log.info(f"[SUBSCRIBE] {uuid_cli}: {len(missed)} evento(s) reenviados desde SEQ {since}.")
+
+    def do_stats(self) -> dict:
+        """Métricas internas para ajustar el servidor (no se audita)."""
+        subs = {"count": len(self.observers), "notifier_pending": self.notifier.pending(),
+                "notifier_dropped": self.notifier.dropped, "notifier_suppressed": self.notifier.suppressed}
+        if self.subscribers is not None:
+            subs.update(self.subscribers.policy.stats())
+        return {"OK": True, "DATA": {"pid": os.getpid(), "pool": self.pool.stats(), "subscribers": subs,
+                                     "feed": self.feed.stats(), "audit": self.audit.stats(),
+                                     "cache": self.data_db.cache_stats()}}
+
+    def do_subscribe_ack(self, uuid_cli: str) -> dict:
+        """Audita 'subscribe' con append_exact para que el adapter pueda formar la PK técnica UUID#subscribe#session."""
+        now = int(time.time() * 1000)
+        entry = {"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": "subscribe", "ts": now}
+        self.audit.submit(entry, exact=True)  # ← clave: append_exact, no append()
+        return {"OK": True, "ACTION": "subscribe"}
+
+
+# ======= Despacho (común a todos los motores) =======
+
+def dispatch(service: Service, uuid_cli: str, action: str, req: dict, send=None) -> dict:
+    """
+    Ejecuta get / mget / list / set / mset / batch y devuelve la respuesta (bloqueante: accede a storage).
+    `send(objeto)` lo aporta el motor para las respuestas en varias tramas (list con STREAM):
+    envía el objeto en el codec de la conexión.
+    """
+    # ---- GET ----
+    if action == "get":
+        item_id = _extract_id(req)
+        if not item_id:
+            return {"OK": False, "Error": "Missing 'ID' for ACTION 'get'."}
+        return service.do_get(uuid_cli, item_id, request_fields(req))
+
+    # ---- MGET ----
+    if action == "mget":
+        return service.do_mget(uuid_cli, mget_ids(req), request_fields(req))
+
+    # ---- MSET ----
+    if action == "mset":
+        return service.do_mset(uuid_cli, mset_items(req))
+
+    # ---- BATCH ----
+    if action == "batch":
+        return service.do_batch(uuid_cli, batch_requests(req))
+
+    # ---- LIST ----
+    if action == "list":
+        # Si vino ID por error, lo ignoramos (la consigna indica que list no requiere ID)
+        fields = request_fields(req)
+        chunk = list_stream_chunk(req)
+        if chunk is not None:
+            if send is None:
+                raise ValueError("STREAM no está disponible en este contexto.")
+            return service.do_list_stream(uuid_cli, chunk, send, fields)
+        return service.do_list(uuid_cli, list_page_args(req), fields)
+
+    # ---- SET ----
+    if action == "set":
+        item_id = _extract_id(req)
+        if not item_id:
+            return {"OK": False, "Error": "Missing 'ID' for ACTION 'set'."}
+        return service.do_set(uuid_cli, item_id, req.get("DATA"))
+
+    # ---- STATS ----
+    if action == "stats":
+        return service.do_stats()
+
+    # ---- Desconocido (por si las dudas) ----
+    return {"OK": False, "Error": f"Unknown ACTION '{req.get('ACTION')}'"}
@@ -1,194 +1,97 @@
 import argparse
+import os
+import signal
 import socket
 import threading
-import json
-import uuid
-import time
 import sys
-import re
 from typing import Optional
 
 from common.logging_setup import setup
-from common.net import send_json, recv_json
-from storage.adapter import CorporateData, CorporateLog
+from common.net import send_json, recv_message, pack, pack_json, COMPRESS_MIN_BYTES, MAX_REQUEST_INFLATED
+from storage.adapter import CorporateData, CorporateLog, mock_enabled
 from server.observer import ObserverRegistry
-
-# ======= Validaciones =======
-UUID_HEX_RE = re.compile(r"^[0-9a-f]{12}$")
-ALLOWED = {"subscribe", "get", "list", "set"}
-
-
-def _require_uuid(req: dict) -> str:
-    val = str(req.get("UUID", "")).strip().lower()
-    if not UUID_HEX_RE.fullmatch(val):
-        raise ValueError("Falta 'UUID' o no es válido (12 hex, ej: 'a1b2c3d4e5f6').")
-    return val
-
-
-def _require_action(req: dict) -> str:
-    action = str(req.get("ACTION", "")).strip().lower()
-    if action not in ALLOWED:
-        raise ValueError("ACTION debe ser 'subscribe', 'get', 'list' o 'set'.")
-    return action
-
-
-def _extract_id(req: dict) -> Optional[str]:
-    """Devuelve el ID desde el nivel superior o desde DATA.id / DATA.ID."""
-    if "ID" in req and str(req["ID"]).strip():
-        return str(req["ID"]).strip()
-    data = req.get("DATA")
-    if isinstance(data, dict):
-        if data.get("id"):
-            return str(data["id"]).strip()
-        if data.get("ID"):
-            return str(data["ID"]).strip()
-    return None
-
-
-# ======= Servicio (Proxy a la capa de datos + auditoría + observer) =======
-
-class Service:
-    def __init__(self, data_db: CorporateData, log_db: CorporateLog, observers: ObserverRegistry, log):
-        self.data_db = data_db
-        self.log_db = log_db
-        self.observers = observers
-        self.log = log
-
-    def _audit(self, uuid_cli: str, action: str, item_id: Optional[str] = None) -> int:
-        """Registra en CorporateLog (modo general) y devuelve timestamp en ms."""
-        now = int(time.time() * 1000)
-        entry = {"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": action, "ts": now}
-        if item_id is not None:
-            entry["id"] = item_id  # GET debe registrar "ID solicitado"
-        self.log_db.append(entry)
-        return now
-
-    def do_get(self, uuid_cli: str, item_id: str) -> dict:
-        self._audit(uuid_cli, "get", item_id)
-        item = self.data_db.get(item_id)
-        if item:
-            return {"OK": True, "DATA": item}
-        return {"OK": False, "Error": "NotFound"}
-
-    def do_list(self, uuid_cli: str) -> dict:
-        self._audit(uuid_cli, "list")  # sin id
-        items = self.data_db.list_all()
-        return {"OK": True, "DATA": items}
-
-    def do_set(self, uuid_cli: str, item_id: str, value_obj: dict) -> dict:
-        if not isinstance(value_obj, dict):
-            return {"OK": False, "Error": "DATA must be an object with fields to update."}
-
-        # Normalizar payload (si llega 'ID' dentro de DATA, lo homogenizamos a 'id')
-        payload = dict(value_obj)
-        payload["id"] = item_id          # ← asegurar clave correcta para upsert
-        payload.pop("ID", None)
-
-        ts = self._audit(uuid_cli, "set")  # ← sin id en la auditoría
-        saved = self.data_db.upsert(payload)
-
-        # Respuesta al solicitante
-        resp = {"OK": True, "DATA": saved}
-
-        # Notificación a todos los suscriptores
-        event = {"ACTION": "change", "DATA": saved, "ts": ts}
-        try:
-            self.observers.broadcast(event, send_json)
-            self.log.debug(f"[BROADCAST] id='{item_id}' notificado a suscriptores")
-        except Exception as be:
-            self.log.warning(f"Broadcast error: {be}")
-
-        return resp
-
-    def do_subscribe_ack(self, uuid_cli: str) -> dict:
-        """Audita 'subscribe' con append_exact para que el adapter pueda formar la PK técnica UUID#subscribe#session."""
-        now = int(time.time() * 1000)
-        entry = {"UUID": uuid_cli, "session": str(uuid.uuid4()), "action": "subscribe", "ts": now}
-        self.log_db.append_exact(entry)  # ← clave: no usamos append()
-        return {"OK": True, "ACTION": "subscribe"}
+from server.service import Service, dispatch, validate, wants_keepalive, \
+    subscription_filter, subscription_mode, subscription_since
+from server.asyncserver import AsyncServer
+from server.subscribers import SubscriberManager, OutboundPolicy, OVERFLOW_POLICIES
+from server.workerpool import WorkerPool, parse_priorities
+from server.changefeed import ChangeFeed
+from server.audit import AuditWriter, AUDIT_MODES
+from server import workers
 
 
 # ======= Handler por conexión TCP =======
 
-def handle_client(conn: socket.socket, addr, service: Service):
+def handle_client(conn: socket.socket, addr, service: Service, idle_timeout: float = 30.0):
     """
-    Maneja una única solicitud por conexión:
-      - get / list / set → responde una vez y cierra
-      - subscribe        → acuse, registra el socket y mantiene la conexión abierta
+    Maneja las solicitudes de una conexión:
+      - get / list / set → responde y cierra, salvo que el cliente pida KEEPALIVE
+      - subscribe        → acuse y el socket pasa al SubscriberManager
+    Con KEEPALIVE las solicitudes sucesivas (incluso encadenadas sin esperar
+    respuesta) se atienden en orden hasta que el cliente cierre o pasen
+    `idle_timeout` segundos sin actividad.
     """
     log = service.log
-    req = None
+    subscribed = False
+    keepalive = False
+    codec = "json"
     try:
-        req = recv_json(conn)
-        if not req:
-            return
-
-        log.debug(f"REQ {addr}: {req}")
-
-        uuid_cli = _require_uuid(req)
-        action = _require_action(req)
-
-        # ---- SUBSCRIBE ----
-        if action == "subscribe":
-            # 1) Auditoría con append_exact
-            ack = service.do_subscribe_ack(uuid_cli)
-            # 2) Registrar el socket en ObserverRegistry
-            service.observers.add(uuid_cli, conn)
-            # 3) Enviar acuse
-            send_json(conn, ack)
-            log.info(f"[SUBSCRIBE] {uuid_cli} @{addr} suscripto; conexión queda abierta.")
-
-            # 4) Mantener la conexión viva (las notificaciones las envía observers.broadcast)
+        while True:
             try:
-                while True:
-                    time.sleep(3600)
-            except Exception:
-                # cierre remoto o interrupción
-                pass
-            finally:
-                # remover del registry si existe API; sino, close_all() en shutdown
-                try:
-                    service.observers.remove(uuid_cli, conn)
-                except Exception:
-                    pass
-            return
-
-        # ---- GET ----
-        if action == "get":
-            item_id = _extract_id(req)
-            if not item_id:
-                send_json(conn, {"OK": False, "Error": "Missing 'ID' for ACTION 'get'."})
+                # cada respuesta sale en el codec de la solicitud (flag del header; JSON por defecto)
+                req, codec = recv_message(conn, MAX_REQUEST_INFLATED)
+            except socket.timeout:
+                log.debug(f"Conexión {addr} inactiva por {idle_timeout}s; cerrando.")
                 return
-            resp = service.do_get(uuid_cli, item_id)
-            send_json(conn, resp)
-            return
-
-        # ---- LIST ----
-        if action == "list":
-            # Si vino ID por error, lo ignoramos (la consigna indica que list no requiere ID)
-            resp = service.do_list(uuid_cli)
-            send_json(conn, resp)
-            return
-
-        # ---- SET ----
-        if action == "set":
-            item_id = _extract_id(req)
-            if not item_id:
-                send_json(conn, {"OK": False, "Error": "Missing 'ID' for ACTION 'set'."})
+            if not req:
                 return
-            resp = service.do_set(uuid_cli, item_id, req.get("DATA"))
-            send_json(conn, resp)
-            return
 
-        # ---- Desconocido (por si las dudas) ----
-        send_json(conn, {"OK": False, "Error": f"Unknown ACTION '{req.get('ACTION')}'"})
-        return
+            log.debug(f"REQ {addr}: {req}")
+            keepalive = wants_keepalive(req, keepalive)
+            # COMPRESS=true: las tramas grandes de la respuesta salen comprimidas
+            compress = service.compress_for(req)
 
-    except ValueError as ve:
-        try:
-            send_json(conn, {"OK": False, "Error": str(ve)})
-        except Exception:
-            pass
+            try:
+                uuid_cli, action = validate(req)
+
+                # ---- SUBSCRIBE ----
+                if action == "subscribe":
+                    ids = subscription_filter(req)
+                    mode = subscription_mode(req)
+                    since = subscription_since(req)
+                    # 1) Auditoría con append_exact (vía pool: puede volver Busy)
+                    ack = service.submit(action, service.do_subscribe_ack, uuid_cli).result()
+                    if ack.get("OK"):
+                        # 2) Entregar el socket al SubscriberManager (el acuse sale antes que cualquier evento)
+                        conn.settimeout(None)
+                        sub = service.subscribers.attach(uuid_cli, conn, greeting=pack_json(ack))
+                        subscribed = True
+                        # 3) Registrar el subscriptor (y reenviarle lo perdido desde SINCE)
+                        service.register_subscriber(uuid_cli, sub, ids, mode, since, compress)
+                        log.info(f"[SUBSCRIBE] {uuid_cli} @{addr} suscripto (filtro: {ids or 'todos'}, modo: {mode}); "
+                                 "conexión queda abierta.")
+                        # 4) El hilo termina: EOF/errores y escrituras quedan a cargo del manager
+                        return
+                    resp = ack
+
+                # ---- GET / LIST / SET / STATS (en el pool) ----
+                else:
+                    # las tramas de STREAM se escriben desde el hilo del pool: un cliente que no
+                    # lee no puede retenerlo más de idle_timeout por escritura
+                    conn.settimeout(idle_timeout)
+                    resp = service.submit(action, dispatch, service, uuid_cli, action, req,
+                                          lambda obj: conn.sendall(pack(obj, codec, compress))).result()
+            except ValueError as ve:
+                resp = {"OK": False, "Error": str(ve)}
+
+            send_json(conn, resp, codec, compress)
+            if not keepalive:
+                return
+            conn.settimeout(idle_timeout)
+
+    except TimeoutError:
+        # el cliente dejó de leer la respuesta: se corta sin intentar otra escritura
+        log.warning(f"Conexión {addr}: el cliente no lee la respuesta en {idle_timeout}s; cerrando.")
     except Exception as e:
         log.error(f"Error con {addr}: {e}")
         try:
@@ -196,61 +99,76 @@ def handle_client(conn: socket.socket, addr, service: Service):
         except Exception:
             pass
     finally:
-        # Para subscribe dejamos abierto; para el resto, cerramos acá
-        try:
-            if not (req and str(req.get("ACTION", "")).strip().lower() == "subscribe"):
+        # Para subscribe el socket ya es del manager; para el resto, cerramos acá
+        if not subscribed:
+            try:
                 conn.close()
-        except Exception:
-            pass
+            except Exception:
+                pass
 
 
-# ======= Main (servidor TCP) =======
+# ======= Motor por hilos (un hilo por conexión) =======
 
-def main():
-    ap = argparse.ArgumentParser(description="SingletonProxyObserverTPFI (TCP puro)")
-    ap.add_argument("-p", "--port", type=int, default=8080, help="Puerto TCP (default 8080)")
-    ap.add_argument("-v", "--verbose", action="store_true", help="Log detallado")
-    args = ap.parse_args()
+def serve_threads(srv: socket.socket, service: Service, log, idle_timeout: float = 30.0):
+    srv.settimeout(1.0)
+    while True:
+        try:
+            conn, addr = srv.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            break
 
-    log = setup(args.verbose)
+        t = threading.Thread(
+            target=handle_client,
+            name=f"client@{addr[0]}:{addr[1]}",
+            args=(conn, addr, service, idle_timeout),
+            daemon=True,
+        )
+        t.start()
 
+
+# ======= Main (servidor TCP) =======
+
+def serve(args, log, srv: socket.socket, bus_sock: Optional[socket.socket] = None,
+          feed: Optional[ChangeFeed] = None):
+    """Arma los Singletons y el Service y atiende sobre `srv` hasta Ctrl+C (un proceso o un worker)."""
     # Singletons de datos y log (requisito)
-    data_db = CorporateData()
+    data_db = CorporateData(flush_interval=args.flush_interval, cache_size=args.cache_size,
+                            cache_ttl=args.cache_ttl, cache_negative=args.cache_negative,
+                            scan_segments=args.scan_segments, shared=args.workers > 1 and mock_enabled())
     log_db = CorporateLog()
 
     # Observer para manejar suscripciones (requisito)
     observers = ObserverRegistry()
 
-    # Servicio (Proxy): valida, audita, accede a datos y notifica (requisito)
-    service = Service(data_db, log_db, observers, log)
+    # Un único hilo (selectors) para todos los sockets suscriptos, con colas acotadas por subscriptor
+    policy = OutboundPolicy(args.max_pending, args.on_overflow)
+    subscribers = SubscriberManager(observers, log, policy)
+    subscribers.start()
 
-    # Servidor TCP
-    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    srv.bind(("", args.port))
-    srv.listen(128)
-    srv.settimeout(1.0)
+    # Pool fijo con cola acotada (admisión y prioridades por acción)
+    pool = WorkerPool(args.pool_size, args.queue_size, args.priorities)
 
-    log.info(f"Servidor escuchando en *:{args.port}")
-    log.info("Acciones soportadas: subscribe / get / list / set")
-    log.info("Ctrl+C para detenerlo.")
+    # Servicio (Proxy): valida, audita, accede a datos y notifica (requisito)
+    # Historial de eventos con SEQ (con --workers lo numera el proceso principal y cada worker tiene una copia)
+    if feed is None:
+        feed = ChangeFeed(args.feed_size, args.feed_file)
+    # Auditoría en lotes desde una cola acotada (modo durable: la respuesta espera a su lote)
+    audit = AuditWriter(log_db, args.audit_batch, args.audit_linger / 1000.0, args.audit_mode, log=log)
+    service = Service(data_db, log_db, observers, log, subscribers=subscribers, pool=pool, feed=feed,
+                      coalesce_window=args.coalesce_window / 1000.0, audit=audit, compress_min=args.compress_min)
+
+    # Con --workers: bus local para que un set notifique también a los subscriptores de otros procesos
+    if bus_sock is not None:
+        service.bus = workers.BusClient(bus_sock, service.deliver, log)
+        service.bus.start()
 
     try:
-        while True:
-            try:
-                conn, addr = srv.accept()
-            except socket.timeout:
-                continue
-            except OSError:
-                break
-
-            t = threading.Thread(
-                target=handle_client,
-                name=f"client@{addr[0]}:{addr[1]}",
-                args=(conn, addr, service),
-                daemon=True,
-            )
-            t.start()
+        if args.engine == "asyncio":
+            AsyncServer(service, idle_timeout=args.idle_timeout, policy=policy).run(srv)
+        else:
+            serve_threads(srv, service, log, idle_timeout=args.idle_timeout)
 
     except KeyboardInterrupt:
         log.info("Cancelación manual detectada (Ctrl+C). Cerrando servidor…")
@@ -261,12 +179,106 @@ def main():
         except Exception:
             pass
         try:
+            service.notifier.stop()
             observers.close_all()  # asegurar cierre de sockets suscriptos
+            subscribers.stop()
+            pool.shutdown()
         except Exception as e:
             log.warning(f"Error al cerrar suscriptores: {e}")
+        try:
+            audit.stop()     # escribe las entradas pendientes antes de cerrar el log
+            data_db.close()  # volcado final del mock (write-behind)
+            log_db.close()
+        except Exception as e:
+            log.error(f"Error al persistir CorporateData/CorporateLog: {e}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SingletonProxyObserverTPFI (TCP puro)")
+    ap.add_argument("-p", "--port", type=int, default=8080, help="Puerto TCP (default 8080)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Log detallado")
+    ap.add_argument("--engine", choices=("threads", "asyncio"), default="threads",
+                    help="Motor de atención: un hilo por conexión o un único event loop asyncio (default threads)")
+    ap.add_argument("--pool-size", "--executor-workers", dest="pool_size", type=int, default=16,
+                    help="Hilos del pool que ejecuta las acciones contra storage (default 16)")
+    ap.add_argument("--queue-size", type=int, default=128,
+                    help="Solicitudes en espera admitidas; con la cola llena se responde Busy (default 128)")
+    ap.add_argument("--priorities", type=parse_priorities, default={},
+                    help="Prioridad por acción, menor = antes (ej: set=0,get=1,list=2; default todas 0)")
+    ap.add_argument("--idle-timeout", type=float, default=30.0,
+                    help="Segundos sin actividad antes de cerrar una conexión KEEPALIVE (default 30)")
+    ap.add_argument("--max-pending", type=int, default=256,
+                    help="Notificaciones pendientes por subscriptor antes de aplicar --on-overflow (default 256)")
+    ap.add_argument("--on-overflow", choices=OVERFLOW_POLICIES, default="drop_oldest",
+                    help="Con la cola de un subscriptor llena: drop_oldest, coalesce (por id) o disconnect")
+    ap.add_argument("--coalesce-window", type=float, default=0.0,
+                    help="Milisegundos en que los sets del mismo id se combinan en un solo evento (default 0 = sin combinar)")
+    ap.add_argument("--feed-size", type=int, default=1024,
+                    help="Eventos recientes que se guardan para reenviar a subscriptores que se reconectan (default 1024)")
+    ap.add_argument("--feed-file",
+                    help="(opcional) Archivo JSONL donde persistir el historial de eventos entre reinicios")
+    ap.add_argument("--flush-interval", type=float, default=None,
+                    help="Mock: segundos entre volcados de CorporateData al archivo (write-behind); "
+                         "0 = escribir en cada set (default: $MOCK_FLUSH_INTERVAL o 0)")
+    ap.add_argument("--cache-size", type=int, default=1024,
+                    help="DynamoDB: registros de CorporateData en la caché LRU de get (default 1024; 0 = sin caché)")
+    ap.add_argument("--cache-ttl", type=float, default=0.0,
+                    help="DynamoDB: segundos de validez de cada entrada cacheada (default 0 = sin vencimiento)")
+    ap.add_argument("--cache-negative", action="store_true",
+                    help="DynamoDB: cachear también los NotFound")
+    ap.add_argument("--scan-segments", type=int, default=1,
+                    help="DynamoDB: segmentos del scan paralelo de list, un hilo por segmento (default 1 = secuencial)")
+    ap.add_argument("--audit-mode", choices=AUDIT_MODES, default="durable",
+                    help="durable: la respuesta espera a que su entrada de auditoría esté escrita; "
+                         "fast: no espera y descarta si la cola está llena (default durable)")
+    ap.add_argument("--audit-batch", type=int, default=100,
+                    help="Entradas de auditoría por lote como máximo (default 100)")
+    ap.add_argument("--audit-linger", type=float, default=0.0,
+                    help="Milisegundos que se espera a completar un lote de auditoría (default 0)")
+    ap.add_argument("--compress-min", type=int, default=COMPRESS_MIN_BYTES,
+                    help=f"Bytes a partir de los que se comprimen (zlib) las tramas para los clientes que envían "
+                         f"COMPRESS (default {COMPRESS_MIN_BYTES}; 0 = nunca)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Procesos que comparten el puerto con SO_REUSEPORT (default 1; solo Unix)")
+    args = ap.parse_args()
+
+    log = setup(args.verbose)
+
+    if args.workers > 1:
+        if not workers.supported():
+            print("[ERROR] --workers requiere fork() y SO_REUSEPORT (Linux/macOS).", file=sys.stderr)
+            sys.exit(2)
+        flush_interval = args.flush_interval
+        if flush_interval is None:
+            flush_interval = float(os.getenv("MOCK_FLUSH_INTERVAL", "0"))
+        if mock_enabled() and flush_interval > 0:
+            print("[ERROR] En modo mock, --workers no admite write-behind (--flush-interval / "
+                  "MOCK_FLUSH_INTERVAL): cada proceso pisaría los cambios de los otros.", file=sys.stderr)
+            sys.exit(2)
+        log.info("Acciones soportadas: subscribe / get / mget / list / set / mset / batch / stats")
+        feed = ChangeFeed(args.feed_size, args.feed_file)
+        rc = workers.run_workers(args.workers, args.port, log,
+                                 lambda srv, bus_sock: serve(args, log, srv, bus_sock, feed.replica()),
+                                 feed=feed)
         log.info("Servidor detenido correctamente.")
-        sys.exit(0)
+        sys.exit(rc)
+
+    # Servidor TCP
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("", args.port))
+    srv.listen(128)
+
+    log.info(f"Servidor escuchando en *:{args.port} (motor {args.engine})")
+    log.info("Acciones soportadas: subscribe / get / mget / list / set / mset / batch / stats")
+    log.info("Ctrl+C para detenerlo.")
+
+    # SIGTERM apaga igual que Ctrl+C (vuelca lo pendiente antes de salir)
+    signal.signal(signal.SIGTERM, workers.raise_interrupt)
+    serve(args, log, srv)
+    log.info("Servidor detenido correctamente.")
+    sys.exit(0)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,320 @@
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Optional
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class OutboundPolicy:
+    """
+    Configuración y métricas de las colas de salida por subscriptor.
+      - max_pending: tramas pendientes admitidas por subscriptor
+      - on_overflow: qué hacer con la cola llena
+          drop_oldest → se descarta la trama más vieja
+          coalesce    → si hay una trama pendiente del mismo id se reemplaza por la nueva
+                        (si no hay, se descarta la más vieja)
+          disconnect  → se desconecta al subscriptor lento
+    """
+    def __init__(self, max_pending: int = 256, on_overflow: str = "drop_oldest"):
+        if on_overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política inválida '{on_overflow}' (opciones: {', '.join(OVERFLOW_POLICIES)})")
+        self.max_pending = max_pending
+        self.on_overflow = on_overflow
+        self._lock = threading.Lock()
+        self._counters = {"dropped": 0, "coalesced": 0, "disconnected": 0}
+
+    def new_queue(self) -> "OutboundQueue":
+        return OutboundQueue(self)
+
+    def count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"max_pending": self.max_pending, "on_overflow": self.on_overflow, **self._counters}
+
+
+class OutboundQueue:
+    """
+    Cola acotada de tramas de un subscriptor. No es thread-safe: la protege quien la usa.
+    Una trama ya empezada a escribir (head fijada) o marcada como no descartable
+    (el acuse, el replay de SINCE) nunca se descarta ni se reemplaza, y no cuenta
+    para max_pending: el límite y la política se aplican a las notificaciones en vivo.
+    """
+    def __init__(self, policy: OutboundPolicy):
+        self._policy = policy
+        self._items = deque()   # [trama, clave, descartable]
+        self._droppable = 0     # tramas descartables en la cola
+        self._head_pinned = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def push(self, frame: bytes, key: Optional[str] = None, droppable: bool = True) -> bool:
+        """Encola la trama; devuelve False si la política indica desconectar al subscriptor."""
+        pol = self._policy
+        if not droppable or self._droppable < pol.max_pending:
+            self._append(frame, key, droppable)
+            return True
+        if pol.on_overflow == "disconnect":
+            pol.count("disconnected")
+            return False
+        start = 1 if self._head_pinned else 0
+        if pol.on_overflow == "coalesce" and key is not None:
+            for i in range(start, len(self._items)):
+                entry = self._items[i]
+                if entry[2] and entry[1] == key:
+                    entry[0] = frame
+                    pol.count("coalesced")
+                    return True
+        for i in range(start, len(self._items)):
+            if self._items[i][2]:
+                del self._items[i]
+                self._droppable -= 1
+                pol.count("dropped")
+                break
+        self._append(frame, key, droppable)
+        return True
+
+    def _append(self, frame: bytes, key: Optional[str], droppable: bool):
+        self._items.append([frame, key, droppable])
+        if droppable:
+            self._droppable += 1
+
+    def _popleft(self) -> bytes:
+        frame, _, droppable = self._items.popleft()
+        if droppable:
+            self._droppable -= 1
+        return frame
+
+    def peek(self) -> Optional[bytes]:
+        """Devuelve la trama a escribir y la fija (ya no se puede descartar)."""
+        if not self._items:
+            return None
+        self._head_pinned = True
+        return self._items[0][0]
+
+    def consume(self, n: int):
+        """Marca n bytes de la trama fijada como escritos."""
+        head = self._items[0]
+        if n < len(head[0]):
+            head[0] = head[0][n:]
+        else:
+            self._popleft()
+            self._head_pinned = False
+
+    def pop(self) -> Optional[bytes]:
+        """Saca la trama completa (para escritores que la toman entera, como asyncio)."""
+        if not self._items:
+            return None
+        self._head_pinned = False
+        return self._popleft()
+
+
+class _ManagedSubscriber:
+    """
+    Subscriptor administrado por SubscriberManager. Expone la interfaz de socket que
+    usa ObserverRegistry (sendall / shutdown / close), pero sendall solo encola en
+    su cola acotada: la escritura real la hace el hilo del manager.
+    """
+    def __init__(self, manager: "SubscriberManager", uuid: str, sock: socket.socket):
+        self._manager = manager
+        self.uuid = uuid
+        self.sock = sock
+        self.out = manager.policy.new_queue()   # tramas pendientes de escribir
+        self.closed = False
+
+    def sendall(self, data: bytes):
+        self.send_frame(data)
+
+    def send_frame(self, frame: bytes, key: Optional[str] = None, droppable: bool = True):
+        if self.closed:
+            raise OSError("Subscriptor desconectado")
+        self._manager._submit(self, frame, key, droppable)
+
+    def shutdown(self, how=None):
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self._manager._call_soon(self._manager._drop, self)
+
+
+class SubscriberManager:
+    """
+    Un único hilo (selectors/epoll) para todos los subscriptores:
+      - detecta EOF o errores apenas ocurren y libera el socket y el registro
+      - hace las escrituras no bloqueantes de las notificaciones
+    Así cada subscriptor cuesta un file descriptor, no un hilo.
+    """
+    def __init__(self, registry, log=None, policy: Optional[OutboundPolicy] = None):
+        self._registry = registry
+        self._log = log
+        self.policy = policy if policy is not None else OutboundPolicy()
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._lock = threading.Lock()
+        self._ops = deque()       # callables a ejecutar en el hilo del manager
+        self._dirty = set()       # subscriptores con datos nuevos para escribir
+        self._subs = set()
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name="subscribers", daemon=True)
+
+    # ---------- API (cualquier hilo) ----------
+
+    def start(self):
+        self._running = True
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread.start()
+
+    def stop(self):
+        self._call_soon(self._shutdown)
+        self._thread.join(timeout=2.0)
+
+    def attach(self, uuid: str, sock: socket.socket, greeting: bytes = b"") -> _ManagedSubscriber:
+        """Toma posesión del socket; `greeting` (p. ej. el acuse) se escribe antes que cualquier evento."""
+        sub = _ManagedSubscriber(self, uuid, sock)
+        if greeting:
+            sub.out.push(greeting, droppable=False)
+        self._call_soon(self._register, sub)
+        return sub
+
+    def __len__(self):
+        return len(self._subs)
+
+    # ---------- internos ----------
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # ya hay un despertar pendiente
+
+    def _call_soon(self, fn, *args):
+        with self._lock:
+            self._ops.append((fn, args))
+        self._wake()
+
+    def _submit(self, sub: _ManagedSubscriber, frame: bytes, key: Optional[str] = None, droppable: bool = True):
+        with self._lock:
+            accepted = sub.out.push(frame, key, droppable)
+            if accepted:
+                self._dirty.add(sub)
+        if not accepted:
+            if self._log:
+                self._log.warning(f"[SUBSCRIBE] {sub.uuid} no consume sus notificaciones; se desconecta.")
+            self._call_soon(self._drop, sub)
+            raise OSError("Subscriptor lento desconectado")
+        self._wake()
+
+    def _register(self, sub: _ManagedSubscriber):
+        if sub.closed:
+            return
+        try:
+            sub.sock.setblocking(False)
+            self._sel.register(sub.sock, selectors.EVENT_READ, sub)
+        except (OSError, ValueError):
+            self._drop(sub)
+            return
+        self._subs.add(sub)
+        self._flush(sub)
+
+    def _drop(self, sub: _ManagedSubscriber):
+        if sub.closed:
+            return
+        sub.closed = True
+        self._subs.discard(sub)
+        try:
+            self._sel.unregister(sub.sock)
+        except (KeyError, ValueError, OSError):
+            pass
+        try:
+            sub.sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+        try:
+            sub.sock.close()
+        except Exception:
+            pass
+        self._registry.remove(sub.uuid, sub)
+        if self._log:
+            self._log.info(f"[SUBSCRIBE] {sub.uuid} desconectado; recursos liberados.")
+
+    def _flush(self, sub: _ManagedSubscriber):
+        if sub.closed or sub not in self._subs:
+            return
+        while True:
+            with self._lock:
+                buf = sub.out.peek()
+            if buf is None:
+                break
+            try:
+                n = sub.sock.send(buf)
+            except BlockingIOError:
+                break
+            except OSError:
+                self._drop(sub)
+                return
+            with self._lock:
+                sub.out.consume(n)
+            if n < len(buf):
+                break
+        with self._lock:
+            pending = bool(sub.out)
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+        try:
+            self._sel.modify(sub.sock, events, sub)
+        except (KeyError, ValueError, OSError):
+            pass
+
+    def _on_readable(self, sub: _ManagedSubscriber):
+        try:
+            data = sub.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop(sub)
+            return
+        if not data:
+            self._drop(sub)  # EOF: el cliente cerró
+        # cualquier otro dato del subscriptor se ignora
+
+    def _shutdown(self):
+        for sub in list(self._subs):
+            self._drop(sub)
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            for key, mask in self._sel.select():
+                sub = key.data
+                if sub is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._on_readable(sub)
+                if mask & selectors.EVENT_WRITE and not sub.closed:
+                    self._flush(sub)
+
+            with self._lock:
+                ops = list(self._ops)
+                self._ops.clear()
+                dirty = list(self._dirty)
+                self._dirty.clear()
+            for fn, args in ops:
+                fn(*args)
+            for sub in dirty:
+                self._flush(sub)
+        try:
+            self._sel.close()
+        except Exception:
+            pass
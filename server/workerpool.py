@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+
+class Busy(Exception):
+    """La cola del pool está llena: la solicitud se rechaza en el acto."""
+
+
+def parse_priorities(text: str) -> Dict[str, int]:
+    """'set=0,list=2' -> {'set': 0, 'list': 2}. Menor número = se atiende antes."""
+    prios: Dict[str, int] = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        action, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Prioridad inválida '{part}' (formato accion=numero)")
+        prios[action.strip().lower()] = int(value)
+    return prios
+
+
+class WorkerPool:
+    """
+    Pool fijo de hilos con cola acotada y prioridades por acción.
+      - submit() nunca bloquea: si la cola está llena lanza Busy, salvo que la
+        nueva tarea tenga mejor prioridad que la peor encolada; en ese caso
+        esa tarea se descarta (su Future recibe Busy) y entra la nueva.
+      - A igual prioridad se respeta el orden de llegada.
+    """
+    def __init__(self, workers: int = 16, queue_size: int = 128, priorities: Optional[Dict[str, int]] = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.priorities = dict(priorities or {})
+        self._heap = []  # (prioridad, secuencia, future, fn, args)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        # métricas
+        self._submitted = 0
+        self._rejected = 0
+        self._shed = 0
+        self._completed = 0
+        self._max_depth = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"pool-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, action: str, fn, *args) -> Future:
+        prio = self.priorities.get(action, 0)
+        fut: Future = Future()
+        shed = None
+        with self._cond:
+            if not self._running:
+                raise Busy()
+            if len(self._heap) >= self.queue_size:
+                worst = max(self._heap) if self._heap else None
+                if worst is None or worst[0] <= prio:
+                    self._rejected += 1
+                    raise Busy()
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self._shed += 1
+                shed = worst[2]
+            heapq.heappush(self._heap, (prio, next(self._seq), fut, fn, args))
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, len(self._heap))
+            self._cond.notify()
+        if shed is not None:
+            shed.set_exception(Busy())
+        return fut
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "depth": len(self._heap),
+                "max_depth": self._max_depth,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "shed": self._shed,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            pending = [entry[2] for entry in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+        for fut in pending:
+            fut.set_exception(Busy())
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and not self._heap:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, fut, fn, args = heapq.heappop(self._heap)
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args))
+            except BaseException as e:
+                fut.set_exception(e)
+            with self._cond:
+                self._completed += 1
@@ -0,0 +1,181 @@
+import json
+import os
+import selectors
+import signal
+import socket
+import tempfile
+import threading
+from typing import Callable, List, Optional
+
+from common.net import send_json, recv_json, recv_frame, pack_json
+from server.changefeed import ChangeFeed
+
+
+def raise_interrupt(signum, frame):
+    """Handler de señal: SIGTERM se atiende como Ctrl+C (apagado ordenado)."""
+    raise KeyboardInterrupt
+
+
+def supported() -> bool:
+    return hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")
+
+
+def acquire_port_lock(port: int):
+    """
+    Con SO_REUSEPORT una segunda instancia podría enlazar el mismo puerto sin error;
+    este lock (flock) conserva la garantía de una sola instancia por puerto.
+    """
+    import fcntl
+    path = os.path.join(tempfile.gettempdir(), f"is2tpfi-{port}.lock")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        raise OSError(f"El puerto {port} ya está en uso por otra instancia del servidor")
+    return fd
+
+
+class BusClient:
+    """
+    Extremo de un worker en el bus local. publish() envía el evento al proceso
+    padre, que lo reenvía a todos los workers (también al de origen); cada
+    evento recibido se entrega con on_event (Service.deliver).
+    """
+    def __init__(self, sock: socket.socket, on_event: Callable[[dict], None], log=None):
+        self._sock = sock
+        self._on_event = on_event
+        self._log = log
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="bus", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def publish(self, event: dict):
+        with self._lock:
+            send_json(self._sock, event)
+
+    def _run(self):
+        while True:
+            try:
+                event = recv_json(self._sock)
+            except OSError:
+                event = None
+            if event is None:
+                # el proceso padre terminó: este worker también se detiene
+                if self._log:
+                    self._log.warning("Bus cerrado por el proceso principal; deteniendo worker.")
+                os.kill(os.getpid(), signal.SIGINT)
+                return
+            try:
+                self._on_event(event)
+            except Exception as e:
+                if self._log:
+                    self._log.warning(f"Error entregando evento del bus: {e}")
+
+
+class _BusHub:
+    """
+    Proceso padre: reenvía cada trama recibida de un worker a todos los workers.
+    Con `feed` el hub numera los eventos (SEQ) y los guarda: así todos los workers
+    comparten la misma secuencia y un subscriptor puede reconectarse a cualquiera.
+    """
+    def __init__(self, socks: List[socket.socket], log=None, feed: Optional[ChangeFeed] = None):
+        self._socks = list(socks)
+        self._log = log
+        self._feed = feed
+        self._thread = threading.Thread(target=self._run, name="bus-hub", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        sel = selectors.DefaultSelector()
+        for s in self._socks:
+            sel.register(s, selectors.EVENT_READ)
+        while self._socks:
+            for key, _ in sel.select():
+                frame = recv_frame(key.fileobj)
+                if frame is None:
+                    sel.unregister(key.fileobj)
+                    self._socks.remove(key.fileobj)
+                    continue
+                if self._feed is not None:
+                    # hay que estampar el SEQ: se decodifica y se re-codifica una vez por evento
+                    event = self._feed.append(json.loads(frame[4:].decode("utf-8")))
+                    frame = pack_json(event)
+                for s in list(self._socks):
+                    try:
+                        s.sendall(frame)  # la misma trama para todos los workers
+                    except OSError:
+                        pass
+
+
+def run_workers(n: int, port: int, log, serve_fn: Callable[[socket.socket, socket.socket], None],
+                feed: Optional[ChangeFeed] = None):
+    """
+    Lanza `n` procesos (fork) que comparten el puerto con SO_REUSEPORT y atienden
+    cada uno con serve_fn(listener, bus_sock). El padre solo hace de bus de eventos
+    (numerándolos con `feed`, si se indica) y espera a los hijos; SIGTERM/Ctrl+C los
+    detiene a todos. Devuelve el código de salida (1 si algún worker terminó con error).
+    """
+    lock_fd = acquire_port_lock(port)
+    signal.signal(signal.SIGTERM, raise_interrupt)
+
+    pairs = [socket.socketpair() for _ in range(n)]
+    pids = []
+    for i, (parent_end, child_end) in enumerate(pairs):
+        pid = os.fork()
+        if pid == 0:
+            # ---- hijo ----
+            os.close(lock_fd)
+            for j, (p, c) in enumerate(pairs):
+                p.close()
+                if j != i:
+                    c.close()
+            code = 0
+            try:
+                srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                srv.bind(("", port))
+                srv.listen(128)
+                log.info(f"Worker {i} (pid {os.getpid()}) escuchando en *:{port}")
+                serve_fn(srv, child_end)
+            except KeyboardInterrupt:
+                pass
+            except BaseException as e:
+                log.error(f"Worker {i} terminó con error: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        pids.append(pid)
+
+    # ---- padre ----
+    for _, child_end in pairs:
+        child_end.close()
+    _BusHub([p for p, _ in pairs], log, feed).start()
+    log.info(f"{n} workers lanzados (SO_REUSEPORT) en *:{port}; pids {pids}")
+
+    failed = 0
+    try:
+        for _ in pids:
+            _, status = os.wait()
+            if os.waitstatus_to_exitcode(status) != 0:
+                failed += 1
+    except KeyboardInterrupt:
+        log.info("Cancelación detectada. Deteniendo workers…")
+    finally:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        os.close(lock_fd)
+    return 1 if failed else 0
@@ -1,9 +1,17 @@
-import os, json, threading, time
-from typing import Any, Dict, List, Optional
+import os, json, threading, time, glob, queue, heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 try:
     import boto3  # type: ignore
 except Exception:  # boto3 opcional
     boto3 = None
+try:
+    import fcntl  # lock entre procesos del mock compartido (--workers, solo Unix)
+except ImportError:
+    fcntl = None
+
+from storage.cache import LRUCache, NOT_FOUND
 
 # Normalizar Decimals de DynamoDB -> tipos nativos
 try:
@@ -14,6 +22,11 @@ except Exception:
 _MOCK = os.getenv("MOCK_DB") == "1"
 
 
+def mock_enabled() -> bool:
+    """True si los Singletons usarán el backend mock (MOCK_DB=1 o boto3 no instalado)."""
+    return _MOCK or boto3 is None
+
+
 def _to_native(obj):
     """
     Convierte recursivamente:
@@ -30,6 +43,95 @@ def _to_native(obj):
     return obj
 
 
+# Registros por página al recorrer el mock con iter_pages
+MOCK_PAGE_SIZE = 500
+
+# BatchGetItem: claves por llamada (límite de DynamoDB) y reintentos de UnprocessedKeys
+BATCH_GET_MAX = 100
+BATCH_GET_RETRIES = 5
+BATCH_GET_BACKOFF = 0.05
+
+# UpdateItem concurrentes por upsert_many
+UPSERT_MANY_WORKERS = 8
+
+# Versión por registro: se incrementa solo si el upsert cambia algún campo (en DynamoDB,
+# atómicamente con el UpdateItem). Es interna: no se devuelve en los registros que ve el cliente.
+VERSION_FIELD = "_version"
+
+
+def _merge(existing: Optional[Dict[str, Any]], patch: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Aplica el merge parcial de `patch` sobre `existing` (como dict.update: un None se guarda)
+    y devuelve (registro, cambio). El cambio es {"id", "version", "changed": {campo: valor}};
+    la versión solo aumenta si el registro es nuevo o cambió algún campo.
+    """
+    old = existing or {}
+    merged = dict(old)
+    changed: Dict[str, Any] = {}
+    for k, v in patch.items():
+        if k == VERSION_FIELD:
+            continue
+        if k not in old or old[k] != v:
+            merged[k] = v
+            changed[k] = v
+    version = old.get(VERSION_FIELD, 0)
+    if existing is None or changed:
+        version += 1
+    merged[VERSION_FIELD] = version
+    return merged, {"id": merged.get("id"), "version": version, "changed": changed}
+
+
+def _update_expression(patch: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Argumentos de UpdateItem equivalentes a _merge: SET de los campos (un None se guarda como
+    NULL) y ADD de 1 a la versión, con una ConditionExpression que solo deja pasar la escritura
+    si el registro no existe o algún campo es distinto; si no, DynamoDB la rechaza y la versión
+    no cambia. Los nombres van como #placeholders (evita choques con palabras reservadas).
+    """
+    names: Dict[str, str] = {"#id": "id", "#ver": VERSION_FIELD}
+    values: Dict[str, Any] = {":one": 1}
+    sets: List[str] = []
+    differs: List[str] = ["attribute_not_exists(#id)"]
+    for i, (k, v) in enumerate(patch.items()):
+        if k in ("id", VERSION_FIELD):
+            continue
+        names[f"#f{i}"] = k
+        values[f":v{i}"] = v
+        sets.append(f"#f{i} = :v{i}")
+        if v is None:
+            values[":null"] = "NULL"
+            differs.append(f"NOT attribute_type(#f{i}, :null)")
+        else:
+            differs += [f"attribute_not_exists(#f{i})", f"#f{i} <> :v{i}"]
+    expr = ""
+    if sets:
+        expr += "SET " + ", ".join(sets) + " "
+    expr += "ADD #ver :one"
+    return {"UpdateExpression": expr, "ConditionExpression": " OR ".join(differs),
+            "ExpressionAttributeNames": names, "ExpressionAttributeValues": values}
+
+
+def _condition_failed(e: Exception) -> bool:
+    """True si `e` es el ConditionalCheckFailedException de botocore (el set no cambiaba nada)."""
+    error = getattr(e, "response", None) or {}
+    return error.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _project(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Copia de `item` con solo `fields` (None = todos los campos), sin la versión interna."""
+    if fields is None:
+        return {k: v for k, v in item.items() if k != VERSION_FIELD}
+    return {k: item[k] for k in fields if k in item and k != VERSION_FIELD}
+
+
+def _projection(fields: Optional[List[str]]) -> Dict[str, Any]:
+    """ProjectionExpression (con #placeholders) para get_item/scan; {} si no hay proyección."""
+    if fields is None:
+        return {}
+    names = {f"#p{i}": k for i, k in enumerate(fields)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+
 class _Singleton(type):
     _instances = {}
     _lock = threading.Lock()
@@ -43,88 +145,448 @@ class _Singleton(type):
 # ========================= CorporateData =========================
 
 class CorporateData(metaclass=_Singleton):
-    def __init__(self):
-        if _MOCK or boto3 is None:
+    """
+    Mock: el archivo se carga una vez en un dict id -> registro y las lecturas se
+    sirven desde memoria. Cada escritura se persiste reescribiendo el archivo de forma
+    atómica (temporal + os.replace): con flush_interval=0 (default) antes de responder;
+    con flush_interval>0 un hilo lo hace cada tantos segundos si hubo cambios
+    (write-behind), y close() hace el último volcado.
+    Con shared=True (mock con --workers) varios procesos usan el mismo archivo: cada
+    lectura lo recarga si otro proceso lo reemplazó, y cada escritura toma un lock de
+    archivo (flock), recarga, aplica y vuelca antes de soltarlo (solo write-through).
+    AWS: get pasa por una caché LRU (TTL y cacheo de NotFound opcionales) que upsert
+    actualiza con el registro guardado; cache_size=0 la desactiva. Con scan_segments>1
+    list_all/iter_pages recorren la tabla con un scan paralelo (Segment/TotalSegments),
+    un hilo por segmento.
+    """
+    def __init__(self, flush_interval: Optional[float] = None, cache_size: int = 1024,
+                 cache_ttl: Optional[float] = None, cache_negative: bool = False, table=None,
+                 scan_segments: int = 1, dynamodb=None, shared: bool = False):
+        if scan_segments < 1:
+            raise ValueError("La cantidad de segmentos de scan debe ser >= 1")
+        self.scan_segments = scan_segments
+        self._cache: Optional[LRUCache] = None
+        if table is None and (_MOCK or boto3 is None):
             self.path = os.path.join(os.path.dirname(__file__), "..", "mock_db", "corporate_data.json")
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
             if not os.path.exists(self.path):
-                with open(self.path, "w", encoding="utf-8") as f:
+                # temporal + replace: otro proceso (--workers) nunca lee el archivo a medio crear
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
                     json.dump([], f)
+                os.replace(tmp, self.path)
             self.backend = "mock"
+            self._items: Dict[str, Dict[str, Any]] = {}
+            self._file_sig = None
+            self._load()
+            if flush_interval is None:
+                flush_interval = float(os.getenv("MOCK_FLUSH_INTERVAL", "0"))
+            if shared and flush_interval > 0:
+                raise ValueError("El mock compartido entre procesos (--workers) no admite write-behind")
+            if shared and fcntl is None:
+                raise ValueError("El mock compartido entre procesos requiere fcntl (Unix)")
+            self.shared = shared
+            self.flush_interval = flush_interval
+            self._dirty = False
+            self._file_lock = threading.Lock()      # un solo volcado a la vez
+            self._stop = threading.Event()
+            self._flusher = None
+            if flush_interval > 0:
+                self._flusher = threading.Thread(target=self._flush_loop, name="mock-flush", daemon=True)
+                self._flusher.start()
         else:
-            self.dynamodb = boto3.resource("dynamodb")
-            self.table = self.dynamodb.Table("CorporateData")
+            if table is None:
+                dynamodb = dynamodb or boto3.resource("dynamodb")
+                table = dynamodb.Table("CorporateData")
+            self.dynamodb = dynamodb  # recurso: BatchGetItem (None con una tabla inyectada sin recurso)
+            self.table = table
             self.backend = "aws"
+            if cache_size > 0:
+                self._cache = LRUCache(cache_size, cache_ttl, cache_negative)
+        # mock: serializa leer-modificar-escribir de upsert (en AWS lo hace atómico el UpdateItem)
+        self._write_lock = threading.Lock()
 
-    def get(self, id_: str) -> Optional[Dict[str, Any]]:
+    def get(self, id_: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Registro por id; con `fields` solo esos campos (proyección)."""
         if self.backend == "mock":
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for item in data:
-                if item.get("id") == id_:
-                    return item
+            self._refresh()
+            item = self._items.get(id_)
+            return _project(item, fields) if item is not None else None
+        if self._cache is None:
+            item = self._fetch(id_, fields)
+            return _project(item, None) if item is not None else None
+        # con caché se lee el registro completo (el costo en DynamoDB es el mismo) y se proyecta acá
+        cached = self._cache.get(id_)
+        if cached is NOT_FOUND:
             return None
-        resp = self.table.get_item(Key={"id": id_})
+        if cached is not None:
+            return _project(cached, fields)
+        item = self._fetch(id_)
+        self._cache.fill(id_, item, item.get(VERSION_FIELD, 0) if item else 0)
+        return _project(item, fields) if item is not None else None
+
+    def _fetch(self, id_: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """GetItem directo, sin caché."""
+        resp = self.table.get_item(Key={"id": id_}, **_projection(fields))
         item = resp.get("Item")
         return _to_native(item) if item is not None else None
 
-    def list_all(self) -> List[Dict[str, Any]]:
+    def get_many(self, ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Varios registros por id en una sola pasada: {id: registro} con los encontrados.
+        Mock: una pasada en memoria. AWS: caché y, para el resto, BatchGetItem de a
+        BATCH_GET_MAX claves, reintentando UnprocessedKeys.
+        """
         if self.backend == "mock":
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        items: List[Dict[str, Any]] = []
-        scan_kwargs: Dict[str, Any] = {}
+            self._refresh()
+            with self._write_lock:
+                return {k: _project(self._items[k], fields) for k in ids if k in self._items}
+        found: Dict[str, Dict[str, Any]] = {}
+        pending = list(dict.fromkeys(ids))
+        if self._cache is not None:
+            misses = []
+            for k in pending:
+                cached = self._cache.get(k)
+                if cached is NOT_FOUND:
+                    continue
+                if cached is not None:
+                    found[k] = _project(cached, fields)
+                else:
+                    misses.append(k)
+            pending = misses
+            fetch_fields = None  # a la caché va el registro completo
+        else:
+            fetch_fields = fields
+        for i in range(0, len(pending), BATCH_GET_MAX):
+            chunk = pending[i:i + BATCH_GET_MAX]
+            items = self._batch_get(chunk, fetch_fields)
+            for k in chunk:
+                item = items.get(k)
+                if self._cache is not None:
+                    self._cache.fill(k, item, item.get(VERSION_FIELD, 0) if item else 0)
+                if item is not None:
+                    found[k] = _project(item, fields)
+        return found
+
+    def _batch_get(self, ids: List[str], fields: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+        if self.dynamodb is None:
+            # tabla inyectada sin recurso: GetItem uno por uno
+            fetched = {k: self._fetch(k, fields) for k in ids}
+            return {k: it for k, it in fetched.items() if it is not None}
+        name = self.table.name
+        request = {name: {"Keys": [{"id": k} for k in ids], **_projection(fields)}}
+        items: Dict[str, Dict[str, Any]] = {}
+        for attempt in range(BATCH_GET_RETRIES + 1):
+            resp = self.dynamodb.batch_get_item(RequestItems=request)
+            for item in resp.get("Responses", {}).get(name, []):
+                item = _to_native(item)
+                items[item["id"]] = item
+            request = resp.get("UnprocessedKeys") or {}
+            if not request.get(name, {}).get("Keys"):
+                return items
+            if attempt < BATCH_GET_RETRIES:
+                time.sleep(min(BATCH_GET_BACKOFF * 2 ** attempt, 1.0))  # throttling: backoff exponencial
+        raise RuntimeError(f"BatchGetItem: {len(request[name]['Keys'])} claves sin procesar tras "
+                           f"{BATCH_GET_RETRIES} reintentos")
+
+    def cache_update(self, item: Dict[str, Any], version: int) -> None:
+        """Registro cambiado por otro proceso (bus de --workers): refresca la caché si `version` es más nueva."""
+        if self._cache is not None and item.get("id") is not None:
+            self._cache.fill(item["id"], dict(item), version)
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self._cache.stats() if self._cache is not None else None
+
+    def list_all(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        if self.backend == "mock":
+            self._refresh()
+            with self._write_lock:
+                items = list(self._items.values())
+            return [_project(it, fields) for it in items]
+        return [it for page in self.iter_pages(fields) for it in page]
+
+    def list_page(self, limit: int, start_key: Optional[Dict[str, Any]] = None,
+                  fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Una página de hasta `limit` registros a partir de `start_key` (exclusiva) y la clave
+        para pedir la siguiente (None si no hay más).
+        Mock: orden estable por id. AWS: scan con Limit/ExclusiveStartKey → LastEvaluatedKey.
+        """
+        if self.backend == "mock":
+            self._refresh()
+            after = start_key["id"] if start_key else None
+            with self._write_lock:
+                ids = heapq.nsmallest(limit + 1, (k for k in self._items if after is None or k > after))
+                items = [_project(self._items[k], fields) for k in ids[:limit]]
+            return items, ({"id": ids[limit - 1]} if len(ids) > limit else None)
+        scan_kwargs: Dict[str, Any] = {"Limit": limit, **_projection(fields)}
+        if start_key:
+            scan_kwargs["ExclusiveStartKey"] = start_key
+        resp = self.table.scan(**scan_kwargs)
+        items = [_project(it, None) for it in _to_native(resp.get("Items", []))]
+        return items, _to_native(resp.get("LastEvaluatedKey"))
+
+    def iter_pages(self, fields: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Todos los registros por páginas, a medida que llegan (para respuestas en streaming).
+        AWS con scan_segments>1: las páginas de los segmentos se intercalan en orden de llegada.
+        """
+        if self.backend == "mock":
+            # solo los ids se toman de una vez; los registros se copian de a una página
+            self._refresh()
+            with self._write_lock:
+                ids = list(self._items)
+            for i in range(0, len(ids), MOCK_PAGE_SIZE):
+                with self._write_lock:
+                    page = [_project(self._items[k], fields) for k in ids[i:i + MOCK_PAGE_SIZE] if k in self._items]
+                yield page
+        elif self.scan_segments == 1:
+            yield from self._scan_pages(**_projection(fields))
+        else:
+            yield from self._parallel_scan(fields)
+
+    def _scan_pages(self, **scan_args) -> Iterator[List[Dict[str, Any]]]:
+        scan_kwargs: Dict[str, Any] = dict(scan_args)
         while True:
             resp = self.table.scan(**scan_kwargs)
-            items.extend(resp.get("Items", []))
-            if "LastEvaluatedKey" in resp:
-                scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
-            else:
-                break
-        return _to_native(items)
+            yield [_project(it, None) for it in _to_native(resp.get("Items", []))]
+            if "LastEvaluatedKey" not in resp:
+                return
+            scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    def _parallel_scan(self, fields: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        total = self.scan_segments
+        pages: "queue.Queue" = queue.Queue(maxsize=2 * total)  # acotada: si el consumidor es lento, los hilos esperan
+        stop = threading.Event()
+        done_marker = object()
+
+        def offer(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False  # el consumidor abandonó el recorrido
+
+        def run(segment: int):
+            try:
+                for page in self._scan_pages(Segment=segment, TotalSegments=total, **_projection(fields)):
+                    if not offer(page):
+                        return
+                offer(done_marker)
+            except Exception as e:
+                offer(e)
+
+        pool = ThreadPoolExecutor(max_workers=total, thread_name_prefix="scan")
+        try:
+            for segment in range(total):
+                pool.submit(run, segment)
+            finished = 0
+            while finished < total:
+                item = pages.get()
+                if item is done_marker:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            pool.shutdown(wait=False)
 
     def upsert(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return self.upsert_delta(item)[0]
+
+    def upsert_delta(self, item: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Merge parcial por id. Devuelve el registro guardado (sin la versión) y el cambio
+        aplicado (campos cambiados y versión), calculado contra el registro previo.
+        """
         if self.backend == "mock":
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            existing = None
-            for i, it in enumerate(data):
-                if it.get("id") == item.get("id"):
-                    existing = i
-                    break
-            if existing is None:
-                data.append(item)
-            else:
-                data[existing].update(item)
-                item = data[existing]
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return item
+            with self._shared_write():
+                with self._write_lock:
+                    merged, delta = _merge(self._items.get(item.get("id")), item)
+                    if delta["changed"]:  # un set que no cambia nada no se escribe
+                        # los registros guardados no se modifican en el lugar: get los lee sin lock
+                        self._items[merged["id"]] = merged
+                        self._dirty = True
+                if self.flush_interval <= 0:
+                    self.flush()  # write-through: persistido antes de responder
+            return _project(merged, None), delta
 
-        # AWS: merge parcial
-        existing = self.get(item["id"])
-        if existing:
-            merged = dict(existing)
-            merged.update(item)
-            self.table.put_item(Item=merged)
-            return merged
-        else:
-            self.table.put_item(Item=item)
-            return item
+        # AWS: un solo UpdateItem atómico. ALL_OLD devuelve el registro previo exacto a esta
+        # escritura; con él se arman el registro resultante y el delta sin otra lectura.
+        # Si no cambiaba nada la condición falla y el registro previo llega en la excepción.
+        update = _update_expression(item)
+        try:
+            resp = self.table.update_item(Key={"id": item["id"]}, ReturnValues="ALL_OLD",
+                                          ReturnValuesOnConditionCheckFailure="ALL_OLD", **update)
+            old = resp.get("Attributes")
+        except Exception as e:
+            if not _condition_failed(e):
+                if self._cache is not None:
+                    # la escritura pudo aplicarse igual (p. ej. timeout de red): no confiar en la caché
+                    self._cache.invalidate(item["id"])
+                raise
+            old = e.response.get("Item")
+        merged, delta = _merge(_to_native(old) if old else None, item)
+        if self._cache is not None:
+            self._cache.fill(merged["id"], dict(merged), merged[VERSION_FIELD])
+        return _project(merged, None), delta
+
+    def upsert_many(self, items: List[Dict[str, Any]]) -> List[Any]:
+        """
+        upsert_delta de varios registros. Devuelve, en el mismo orden, (registro, delta) o la
+        excepción de ese registro (los demás se guardan igual).
+        Mock: una pasada bajo el lock y un único volcado. AWS: un UpdateItem por registro
+        (BatchWriteItem solo reemplaza registros completos: no sirve para el merge parcial ni
+        para la versión condicionada), hasta UPSERT_MANY_WORKERS en paralelo. Los registros con
+        el mismo id se aplican uno tras otro en el orden recibido, como en el mock.
+        """
+        if self.backend == "mock":
+            results: List[Any] = []
+            with self._shared_write():
+                with self._write_lock:
+                    for item in items:
+                        merged, delta = _merge(self._items.get(item.get("id")), item)
+                        if delta["changed"]:
+                            self._items[merged["id"]] = merged
+                            self._dirty = True
+                        results.append((_project(merged, None), delta))
+                if self.flush_interval <= 0:
+                    self.flush()
+            return results
+
+        results = [None] * len(items)
+        groups: Dict[Any, List[int]] = {}
+        for i, item in enumerate(items):
+            groups.setdefault(item.get("id"), []).append(i)
+
+        def run(positions: List[int]):
+            for i in positions:
+                try:
+                    results[i] = self.upsert_delta(items[i])
+                except Exception as e:
+                    results[i] = e
+        if len(groups) == 1:
+            run(next(iter(groups.values())))
+            return results
+        with ThreadPoolExecutor(max_workers=min(UPSERT_MANY_WORKERS, len(groups)),
+                                thread_name_prefix="upsert") as pool:
+            list(pool.map(run, groups.values()))
+        return results
+
+    # ---------- persistencia del mock ----------
+
+    def _load(self) -> None:
+        """Carga el archivo en memoria y recuerda qué versión del archivo se leyó."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            st = os.fstat(f.fileno())
+            self._items = {it["id"]: it for it in json.load(f) if "id" in it}
+        self._file_sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _refresh(self) -> None:
+        """shared: recarga el archivo si otro proceso lo reemplazó desde la última lectura o volcado."""
+        if not self.shared:
+            return
+        st = os.stat(self.path)
+        if (st.st_ino, st.st_mtime_ns, st.st_size) != self._file_sig:
+            with self._write_lock:
+                self._load()
+
+    @contextmanager
+    def _shared_write(self):
+        """shared: lock de archivo entre procesos durante leer-modificar-volcar (si no, no hace nada)."""
+        if not self.shared:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def flush(self) -> None:
+        """Vuelca el contenido en memoria al archivo si hubo cambios (mock; en AWS no hace nada)."""
+        if self.backend != "mock":
+            return
+        with self._file_lock:
+            with self._write_lock:
+                if not self._dirty:
+                    return
+                data = list(self._items.values())
+                self._dirty = False
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)  # el archivo siempre queda completo: el anterior o el nuevo
+            st = os.stat(self.path)
+            self._file_sig = (st.st_ino, st.st_mtime_ns, st.st_size)  # no recargar el volcado propio
+
+    def close(self) -> None:
+        """Detiene el volcado periódico y persiste lo pendiente (llamar al apagar el servidor)."""
+        if self.backend != "mock":
+            return
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5.0)
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                self._dirty = True  # se reintenta en el próximo ciclo
 
 
 # ========================= CorporateLog =========================
 
+def log_segments(active_path: str) -> List[str]:
+    """Segmentos del log mock en orden cronológico: los rotados (.NNNNNN.jsonl) y al final el activo."""
+    base = active_path[:-len(".jsonl")]
+    rotated = sorted(glob.glob(glob.escape(base) + ".[0-9][0-9][0-9][0-9][0-9][0-9].jsonl"))
+    return rotated + ([active_path] if os.path.exists(active_path) else [])
+
+
+def iter_log_entries(active_path: str) -> Iterator[Dict[str, Any]]:
+    """Recorre el log mock segmento por segmento, una línea a la vez (sin cargarlo entero en memoria)."""
+    for segment in log_segments(active_path):
+        with open(segment, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # última línea truncada por un corte: se ignora
+
+
 class CorporateLog(metaclass=_Singleton):
-    def __init__(self):
+    """
+    Mock: log append-only en JSONL (una entrada por línea) en mock_db/corporate_log.jsonl.
+    Cada append escribe solo su línea; al superar `segment_bytes` el segmento activo se
+    renombra a corporate_log.NNNNNN.jsonl y se empieza uno nuevo. iter_entries() recorre
+    todos los segmentos en orden. Un corporate_log.json (arreglo, formato anterior) se
+    migra una sola vez al arrancar.
+    """
+    def __init__(self, segment_bytes: Optional[int] = None):
         if _MOCK or boto3 is None:
-            self.path = os.path.join(os.path.dirname(__file__), "..", "mock_db", "corporate_log.json")
+            self.path = os.path.join(os.path.dirname(__file__), "..", "mock_db", "corporate_log.jsonl")
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            if not os.path.exists(self.path):
-                with open(self.path, "w", encoding="utf-8") as f:
-                    json.dump([], f)
             self.backend = "mock"
             self._hash_key_cache: Optional[str] = None
+            if segment_bytes is None:
+                segment_bytes = int(os.getenv("MOCK_LOG_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+            self.segment_bytes = segment_bytes
+            self._lock = threading.Lock()
+            self._migrate_legacy()
+            self._fh = open(self.path, "a", encoding="utf-8")
+            self._size = self._fh.tell()
         else:
             self.dynamodb = boto3.resource("dynamodb")
             table_name = os.getenv("CORPORATELOG_TABLE", "CorporateLog")
@@ -142,43 +604,106 @@ class CorporateLog(metaclass=_Singleton):
                 except Exception:
                     self._hash_key_cache = None
 
-    def _aws_hash_key_name(self) -> Optional[str]:
-        return self._hash_key_cache
+    # ---------- mock: JSONL con rotación ----------
 
-    # ---------- subscribe usa append_exact ----------
-    def append_exact(self, record: Dict[str, Any]) -> None:
-        item = dict(record)
-        # Consigna mínima
-        for k in ("UUID", "session", "action", "ts"):
-            if k not in item:
-                raise ValueError(f"CorporateLog.append_exact: falta '{k}'")
+    def _migrate_legacy(self):
+        """Pasa el corporate_log.json (arreglo) al segmento .000000.jsonl, que queda primero en el orden."""
+        legacy = self.path[:-len(".jsonl")] + ".json"
+        claimed = f"{legacy}.{os.getpid()}.migrating"
+        try:
+            os.rename(legacy, claimed)  # atómico: con --workers solo un proceso migra
+        except FileNotFoundError:
+            return
+        with open(claimed, "r", encoding="utf-8") as f:
+            try:
+                entries = json.load(f)
+            except ValueError:
+                entries = []
+        target = self.path[:-len(".jsonl")] + ".000000.jsonl"
+        with open(target, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(claimed, legacy + ".migrated")
+
+    def _write_lines(self, items: List[Dict[str, Any]]) -> None:
+        chunk = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        with self._lock:
+            self._fh.write(chunk)
+            self._fh.flush()
+            self._size += len(chunk.encode("utf-8"))
+            if self._size >= self.segment_bytes:
+                self._rotate()
 
+    def _rotate(self):
+        """Cierra el segmento activo y lo renombra con el siguiente número (llamar con el lock tomado)."""
+        self._fh.close()
+        base = self.path[:-len(".jsonl")]
+        rotated = log_segments(self.path)[:-1]
+        n = int(rotated[-1][len(base) + 1:-len(".jsonl")]) + 1 if rotated else 1
+        os.replace(self.path, f"{base}.{n:06d}.jsonl")
+        self._fh = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Todas las entradas en orden, en streaming (mock: segmentos JSONL; AWS: scan paginado)."""
         if self.backend == "mock":
-            # En mock: no guardamos 'id' para subscribe
-            item.pop("id", None)
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            data.append(item)
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            yield from iter_log_entries(self.path)
             return
+        scan_kwargs: Dict[str, Any] = {}
+        while True:
+            resp = self.table.scan(**scan_kwargs)
+            for item in resp.get("Items", []):
+                yield _to_native(item)
+            if "LastEvaluatedKey" not in resp:
+                break
+            scan_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
 
-        # AWS: si la tabla exige PK, poner una PK técnica estable para subscribe
-        hash_key = (self._aws_hash_key_name() or "id")
-        item[hash_key] = f"{item['UUID']}#subscribe#{item['session']}"
-        if hash_key != "id":
-            item.pop("id", None)
-        self.table.put_item(Item=item)
+    def close(self) -> None:
+        if self.backend == "mock":
+            with self._lock:
+                self._fh.close()
+
+    def _aws_hash_key_name(self) -> Optional[str]:
+        return self._hash_key_cache
+
+    # ---------- subscribe usa append_exact ----------
+    def append_exact(self, record: Dict[str, Any]) -> None:
+        self.write_batch([self.prepare(record, exact=True)])
 
     # ---------- get/list/set usan append ----------
     def append(self, record: Dict[str, Any]) -> None:
+        self.write_batch([self.prepare(record)])
+
+    def prepare(self, record: Dict[str, Any], exact: bool = False) -> Dict[str, Any]:
         """
+        Normaliza una entrada tal como se guardará (sin escribirla).
+        exact=True (subscribe / append_exact): exige UUID, session, action y ts.
+        exact=False (append):
         - GET  : conserva 'id' (ID solicitado).
+        - MGET/MSET: conservan 'ids' (IDs pedidos) y, como LIST, no llevan 'id' de negocio.
         - SET/LIST/SUBSCRIBE: no registran 'id' de negocio.
             * mock: no hay 'id'
             * aws : si la tabla exige PK, se completa con PK técnica (UUID#accion#ts)
         """
         item = dict(record)
+        if exact:
+            # Consigna mínima
+            for k in ("UUID", "session", "action", "ts"):
+                if k not in item:
+                    raise ValueError(f"CorporateLog.append_exact: falta '{k}'")
+
+            if self.backend == "mock":
+                # En mock: no guardamos 'id' para subscribe
+                item.pop("id", None)
+                return item
+
+            # AWS: si la tabla exige PK, poner una PK técnica estable para subscribe
+            hash_key = (self._aws_hash_key_name() or "id")
+            item[hash_key] = f"{item['UUID']}#subscribe#{item['session']}"
+            if hash_key != "id":
+                item.pop("id", None)
+            return item
+
         item["ts"] = item.get("ts") or int(time.time() * 1000)
 
         # limpiar bandera interna
@@ -187,7 +712,7 @@ class CorporateLog(metaclass=_Singleton):
         action = (item.get("action") or "").lower()
         is_get = (action == "get")
         is_set = (action == "set")
-        is_list = (action == "list")
+        is_list = (action in ("list", "mget", "mset"))
         is_subscribe = (action == "subscribe")
 
         if self.backend == "mock":
@@ -196,12 +721,7 @@ class CorporateLog(metaclass=_Singleton):
             # - SET/LIST/SUBSCRIBE: no guardamos 'id'.
             if not is_get:
                 item.pop("id", None)
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            data.append(item)
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return
+            return item
 
         # AWS:
         hash_key = (self._aws_hash_key_name() or "id")
@@ -217,5 +737,20 @@ class CorporateLog(metaclass=_Singleton):
         else:
             # Fallback
             item.setdefault(hash_key, str(item.get("id", item["ts"])))
+        return item
 
-        self.table.put_item(Item=item)
+    def write_batch(self, items: List[Dict[str, Any]]) -> None:
+        """Escribe entradas ya normalizadas con prepare(), en orden."""
+        if not items:
+            return
+        if self.backend == "mock":
+            self._write_lines(items)
+            return
+        if len(items) == 1:
+            self.table.put_item(Item=items[0])
+            return
+        # overwrite_by_pkeys: dos entradas con la misma PK técnica (mismo ms) se pisan como con put_item
+        hash_key = (self._aws_hash_key_name() or "id")
+        with self.table.batch_writer(overwrite_by_pkeys=[hash_key]) as batch:
+            for item in items:
+                batch.put_item(Item=item)
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Marca de "no existe" guardada cuando el cacheo negativo está activo
+NOT_FOUND = object()
+
+
+class LRUCache:
+    """
+    Caché acotada (LRU) con TTL opcional, thread-safe.
+      - max_entries: al superarlo se descarta el menos usado (evictions)
+      - ttl:         segundos de validez de cada entrada (None/0 = sin vencimiento)
+      - negative:    si True también se cachea NotFound (get devuelve NOT_FOUND)
+    Los valores se devuelven tal cual: quien los guarda no debe modificarlos después.
+    Cada entrada puede llevar una versión: fill() (lecturas) no pisa una entrada más nueva
+    que haya guardado put() (escrituras) mientras la lectura estaba en curso.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, negative: bool = False):
+        if max_entries < 1:
+            raise ValueError("El tamaño de la caché debe ser >= 1")
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.negative = negative
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()  # valor, vence, versión
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: str) -> Any:
+        """Valor cacheado, NOT_FOUND (cacheo negativo) o None si no está (miss)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires, _ = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._data[key]
+                self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Any, version: int = 0):
+        """Guarda el valor; value=None registra NotFound (solo si el cacheo negativo está activo)."""
+        with self._lock:
+            self._store(key, value, version)
+
+    def fill(self, key: str, value: Any, version: int = 0):
+        """Como put, pero no reemplaza una entrada con versión mayor (p. ej. guardada por un upsert)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[2] > version:
+                return
+            self._store(key, value, version)
+
+    def _store(self, key: str, value: Any, version: int):
+        # llamar con el lock tomado
+        if value is None:
+            if not self.negative:
+                self._data.pop(key, None)
+                return
+            value = NOT_FOUND
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (value, expires, version)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._data), "max_entries": self.max_entries, "ttl": self.ttl,
+                    "negative": self.negative, **self._counters}
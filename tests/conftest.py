@@ -14,6 +14,8 @@ from pathlib import Path
 # Asegurar que usamos mock DB
 os.environ["MOCK_DB"] = "1"
 
+from storage.adapter import iter_log_entries  # noqa: E402 (después de MOCK_DB)
+
 # Directorio base del proyecto
 PROJECT_ROOT = Path(__file__).parent.parent
 MOCK_DB_DIR = PROJECT_ROOT / "mock_db"
@@ -23,10 +25,11 @@ CLIENT_OBSERVER = PROJECT_ROOT / "clients" / "observerclient.py"
 
 
 def cleanup_mock_db():
-    """Limpia los archivos JSON del mock DB."""
+    """Limpia los archivos del mock DB (JSON de datos, segmentos JSONL del log, migrados y el lock)."""
     if MOCK_DB_DIR.exists():
-        for file in MOCK_DB_DIR.glob("*.json"):
-            file.unlink()
+        for pattern in ("*.json", "*.jsonl", "*.migrated", "*.lock"):
+            for file in MOCK_DB_DIR.glob(pattern):
+                file.unlink()
 
 
 @pytest.fixture(scope="function")
@@ -37,20 +40,14 @@ def clean_mock_db():
     cleanup_mock_db()
 
 
-@pytest.fixture(scope="function")
-def server_process(clean_mock_db):
-    """Fixture que inicia el servidor y lo detiene después."""
-    # clean_mock_db ya limpia la BD antes de ejecutar este fixture
-    # Iniciar servidor en un puerto disponible
-    port = find_free_port()
-    
-    # Iniciar proceso del servidor
+def start_server(port, *extra_args):
+    """Inicia el servidor en el puerto indicado (con argumentos extra) y espera a que esté listo."""
     env = os.environ.copy()
     env["MOCK_DB"] = "1"
     env["PYTHONPATH"] = str(PROJECT_ROOT)
     python_exe = sys.executable
     process = subprocess.Popen(
-        [python_exe, str(SERVER_SCRIPT), "-p", str(port), "-v"],
+        [python_exe, str(SERVER_SCRIPT), "-p", str(port), "-v", *extra_args],
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
@@ -59,10 +56,11 @@ def server_process(clean_mock_db):
     
     # Esperar a que el servidor esté listo
     wait_for_server(port, timeout=5)
-    
-    yield port, process
-    
-    # Detener servidor
+    return process
+
+
+def stop_server(process):
+    """Detiene el proceso del servidor."""
     try:
         process.terminate()
         process.wait(timeout=3)
@@ -73,6 +71,40 @@ def server_process(clean_mock_db):
         pass
 
 
+@pytest.fixture(scope="function")
+def server_process(clean_mock_db):
+    """Fixture que inicia el servidor y lo detiene después."""
+    # clean_mock_db ya limpia la BD antes de ejecutar este fixture
+    # Iniciar servidor en un puerto disponible
+    port = find_free_port()
+    process = start_server(port)
+    
+    yield port, process
+    
+    # Detener servidor
+    stop_server(process)
+
+
+@pytest.fixture(scope="function")
+def async_server_process(clean_mock_db):
+    """Igual que server_process pero con el motor asyncio (--engine asyncio)."""
+    port = find_free_port()
+    process = start_server(port, "--engine", "asyncio")
+    
+    yield port, process
+    
+    stop_server(process)
+
+
+@pytest.fixture(params=["threads", "asyncio"])
+def engine_server(request, clean_mock_db):
+    """Servidor con cada motor (el test corre una vez por motor); devuelve el puerto."""
+    port = find_free_port()
+    process = start_server(port, "--engine", request.param)
+    yield port
+    stop_server(process)
+
+
 def find_free_port():
     """Encuentra un puerto disponible."""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -116,15 +148,63 @@ def read_corporate_data():
 
 
 def read_corporate_log():
-    """Lee el contenido de CorporateLog desde el mock DB."""
-    log_file = MOCK_DB_DIR / "corporate_log.json"
-    if not log_file.exists():
-        return []
-    with open(log_file, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Lee el contenido de CorporateLog desde el mock DB (todos los segmentos JSONL, en orden)."""
+    return list(iter_log_entries(str(MOCK_DB_DIR / "corporate_log.jsonl")))
 
 
 def generate_uuid():
     """Genera un UUID válido de 12 hex."""
     return format(uuid.getnode(), "012x")
 
+
+
+def send_pipelined(host, port, payloads):
+    """Envía varias peticiones por una conexión KEEPALIVE sin esperar respuestas y las lee en orden."""
+    from common.net import send_json, recv_json
+
+    with socket.create_connection((host, port), timeout=5) as sock:
+        for i, payload in enumerate(payloads):
+            send_json(sock, {**payload, "KEEPALIVE": i < len(payloads) - 1})
+        return [recv_json(sock) for _ in payloads]
+
+
+def subscribe(host, port, uuid_cli, **extra):
+    """Abre una suscripción (campos extra: IDS, MODE, SINCE, ...), verifica el acuse y devuelve el socket."""
+    from common.net import send_json, recv_json
+
+    sock = socket.create_connection((host, port), timeout=5)
+    send_json(sock, {"UUID": uuid_cli, "ACTION": "subscribe", **extra})
+    assert recv_json(sock)["OK"] is True
+    return sock
+
+
+def roundtrip(frame):
+    """Pasa una trama ya codificada por un par de sockets y devuelve (objeto, codec) de recv_message."""
+    from common.net import recv_message
+
+    a, b = socket.socketpair()
+    try:
+        a.sendall(frame)
+        return recv_message(b)
+    finally:
+        a.close()
+        b.close()
+
+
+class FakeSocket:
+    """Socket en memoria para ObserverRegistry: guarda las tramas enviadas; con fail=True sendall falla."""
+    def __init__(self, fail=False):
+        self.frames = []
+        self.fail = fail
+        self.closed = False
+
+    def sendall(self, data):
+        if self.fail:
+            raise OSError("roto")
+        self.frames.append(data)
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,157 @@
+"""
+Tabla DynamoDB falsa (en memoria) para probar el backend AWS de storage/adapter.py sin boto3.
+Implementa solo lo que usa el adapter y cuenta las llamadas; `latency` (segundos)
+simula la demora de red de cada llamada.
+"""
+import copy
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from storage.adapter import CorporateData
+
+
+def _project(item, expression, names):
+    """Copia del item, con solo los atributos de ProjectionExpression si la hay."""
+    if expression is None:
+        return copy.deepcopy(item)
+    attrs = [(names or {}).get(p.strip(), p.strip()) for p in expression.split(",")]
+    return {k: copy.deepcopy(item[k]) for k in attrs if k in item}
+
+
+class ConditionalCheckFailed(Exception):
+    """Como el ConditionalCheckFailedException de botocore: el código y el registro previo en `response`."""
+    def __init__(self, item):
+        super().__init__("The conditional request failed")
+        self.response = {"Error": {"Code": "ConditionalCheckFailedException"}}
+        if item is not None:
+            self.response["Item"] = copy.deepcopy(item)
+
+
+def _holds(condition, item, names, values):
+    """Evalúa un OR de términos attribute_not_exists(#a), NOT attribute_type(#a, :t) y #a <> :v."""
+    item = item or {}
+    for term in (t.strip() for t in condition.split(" OR ")):
+        m = re.fullmatch(r"attribute_not_exists\((#\w+)\)", term)
+        if m:
+            if names[m.group(1)] not in item:
+                return True
+            continue
+        m = re.fullmatch(r"NOT attribute_type\((#\w+), (:\w+)\)", term)
+        if m:
+            assert values[m.group(2)] == "NULL"
+            name = names[m.group(1)]
+            if name not in item or item[name] is not None:
+                return True
+            continue
+        m = re.fullmatch(r"(#\w+) <> (:\w+)", term)
+        assert m, term
+        name = names[m.group(1)]
+        if name in item and item[name] != values[m.group(2)]:
+            return True
+    return False
+
+
+class FakeTable:
+    name = "CorporateData"
+
+    def __init__(self, items=None, page_size=100, latency=0.0):
+        self.items = {it["id"]: copy.deepcopy(it) for it in (items or [])}
+        self.page_size = page_size
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None):
+        self._call("get_item")
+        item = self.items.get(Key["id"])
+        if item is None:
+            return {}
+        return {"Item": _project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item):
+        self._call("put_item")
+        self.items[Item["id"]] = copy.deepcopy(Item)
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues,
+                    ReturnValues="NONE", ConditionExpression=None, ReturnValuesOnConditionCheckFailure="NONE"):
+        """
+        Soporta las cláusulas SET a = :v, REMOVE a y ADD a :n y la ConditionExpression
+        que genera el adapter (ver _holds).
+        """
+        self._call("update_item")
+        old = self.items.get(Key["id"])
+        names, values = ExpressionAttributeNames, ExpressionAttributeValues
+        if ConditionExpression is not None and not _holds(ConditionExpression, old, names, values):
+            raise ConditionalCheckFailed(old if ReturnValuesOnConditionCheckFailure == "ALL_OLD" else None)
+        new = copy.deepcopy(old) if old is not None else dict(Key)
+        for clause, body in re.findall(r"(SET|REMOVE|ADD) (.*?)(?= SET | REMOVE | ADD |$)", UpdateExpression.strip()):
+            for part in (p.strip() for p in body.split(",")):
+                if clause == "SET":
+                    name, value = (x.strip() for x in part.split("="))
+                    new[names[name]] = copy.deepcopy(values[value])
+                elif clause == "REMOVE":
+                    new.pop(names[part], None)
+                else:
+                    name, value = part.split()
+                    new[names[name]] = new.get(names[name], 0) + values[value]
+        self.items[Key["id"]] = new
+        if ReturnValues == "ALL_OLD":
+            return {"Attributes": copy.deepcopy(old)} if old is not None else {}
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": copy.deepcopy(new)}
+        return {}
+
+    def scan(self, ExclusiveStartKey=None, Segment=None, TotalSegments=None, Limit=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None):
+        self._call("scan")
+        keys = sorted(self.items)
+        if TotalSegments:
+            keys = [k for k in keys if zlib.crc32(k.encode()) % TotalSegments == Segment]
+        if ExclusiveStartKey is not None:
+            keys = [k for k in keys if k > ExclusiveStartKey["id"]]
+        size = min(self.page_size, Limit or self.page_size)
+        page = keys[:size]
+        resp = {"Items": [_project(self.items[k], ProjectionExpression, ExpressionAttributeNames) for k in page]}
+        if len(keys) > size:
+            resp["LastEvaluatedKey"] = {"id": page[-1]}
+        return resp
+
+
+class FakeDynamoDB:
+    """Recurso falso: batch_get_item sobre FakeTable. Las primeras `throttled` llamadas devuelven
+    la mitad de las claves en UnprocessedKeys (como DynamoDB al limitar el throughput)."""
+    def __init__(self, table, throttled=0):
+        self.table = table
+        self.throttled = throttled
+
+    def batch_get_item(self, RequestItems):
+        self.table._call("batch_get_item")   # se cuenta en table.calls
+        (name, request), = RequestItems.items()
+        keys = request["Keys"]
+        assert len(keys) <= 100
+        split = len(keys)
+        if self.throttled > 0:
+            self.throttled -= 1
+            split = len(keys) // 2
+        done, left = keys[:split], keys[split:]
+        items = [_project(self.table.items[k["id"]], request.get("ProjectionExpression"),
+                          request.get("ExpressionAttributeNames"))
+                 for k in done if k["id"] in self.table.items]
+        resp = {"Responses": {name: items}, "UnprocessedKeys": {}}
+        if left:
+            resp["UnprocessedKeys"] = {name: dict(request, Keys=left)}
+        return resp
+
+
+def aws_corporate_data(table, **kwargs) -> CorporateData:
+    """CorporateData con backend AWS sobre `table`, sin pasar por el Singleton."""
+    return type.__call__(CorporateData, table=table, **kwargs)
@@ -0,0 +1,77 @@
+"""
+Tests del motor asyncio (--engine asyncio).
+Verifica que el protocolo y el impacto en las tablas sean los mismos que con el motor por hilos.
+"""
+import socket
+from tests.conftest import (
+    send_request, read_corporate_data, read_corporate_log,
+    generate_uuid
+)
+
+
+class TestAsyncEngine:
+    """Tests de las acciones contra el servidor en modo asyncio."""
+
+    def test_set_get_list(self, async_server_process):
+        """SET, GET y LIST responden igual que en el motor por hilos."""
+        port, _ = async_server_process
+        uuid_cli = generate_uuid()
+        item_id = "TEST-ASYNC-001"
+
+        response = send_request("127.0.0.1", port, {
+            "UUID": uuid_cli,
+            "ACTION": "set",
+            "ID": item_id,
+            "DATA": {"id": item_id, "nombre": "Async Item"}
+        })
+        assert response["OK"] is True
+        assert response["DATA"]["id"] == item_id
+
+        response = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "get", "ID": item_id})
+        assert response["OK"] is True
+        assert response["DATA"]["nombre"] == "Async Item"
+
+        response = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "list"})
+        assert response["OK"] is True
+        assert len(response["DATA"]) == 1
+
+        data = read_corporate_data()
+        assert data[0]["id"] == item_id
+        actions_in_log = [entry.get("action") for entry in read_corporate_log()]
+        assert "set" in actions_in_log
+        assert "get" in actions_in_log
+        assert "list" in actions_in_log
+
+    def test_invalid_uuid(self, async_server_process):
+        """Las validaciones devuelven el mismo error estructurado."""
+        port, _ = async_server_process
+        response = send_request("127.0.0.1", port, {"UUID": "xyz", "ACTION": "list"})
+        assert response["OK"] is False
+        assert "uuid" in response.get("Error", "").lower()
+
+    def test_subscribe_receives_change(self, async_server_process):
+        """Un subscriptor del event loop recibe el evento 'change' de un SET."""
+        from common.net import send_json, recv_json
+
+        port, _ = async_server_process
+        uuid_cli = generate_uuid()
+
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        try:
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "subscribe"})
+            ack = recv_json(sock)
+            assert ack["OK"] is True
+            assert ack.get("ACTION") == "subscribe"
+
+            send_request("127.0.0.1", port, {
+                "UUID": generate_uuid(),
+                "ACTION": "set",
+                "ID": "TEST-ASYNC-NOTIFY",
+                "DATA": {"nombre": "Notificación"}
+            })
+
+            notification = recv_json(sock)
+            assert notification["ACTION"] == "change"
+            assert notification["DATA"]["id"] == "TEST-ASYNC-NOTIFY"
+        finally:
+            sock.close()
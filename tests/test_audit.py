@@ -0,0 +1,96 @@
+"""
+Tests del AuditWriter (auditoría en lotes fuera del camino de la solicitud).
+"""
+import threading
+import time
+import pytest
+from server.audit import AuditWriter
+from tests.conftest import send_request, generate_uuid, read_corporate_log
+
+
+class _FakeLog:
+    """CorporateLog mínimo: guarda los lotes; write_batch puede bloquearse con `gate`."""
+    def __init__(self, gate=None, fail=False):
+        self.batches = []
+        self.gate = gate
+        self.fail = fail
+
+    def prepare(self, record, exact=False):
+        if exact and "session" not in record:
+            raise ValueError("falta 'session'")
+        return dict(record)
+
+    def write_batch(self, items):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise OSError("disco lleno")
+        self.batches.append(list(items))
+
+
+class TestAuditWriter:
+    """Tests unitarios del AuditWriter."""
+
+    def test_durable_groups_concurrent_entries_into_batches(self):
+        gate = threading.Event()
+        fake = _FakeLog(gate)
+        writer = AuditWriter(fake, max_batch=50)
+        threads = [threading.Thread(target=writer.submit, args=({"n": i},)) for i in range(20)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)      # el primer lote está bloqueado; el resto se acumula en la cola
+        gate.set()
+        for t in threads:
+            t.join(5)
+        writer.stop()
+        assert sum(len(b) for b in fake.batches) == 20
+        assert len(fake.batches) < 20
+        stats = writer.stats()
+        assert stats["flushed"] == 20
+        assert stats["batches"] == len(fake.batches)
+
+    def test_durable_propagates_write_errors(self):
+        writer = AuditWriter(_FakeLog(fail=True))
+        with pytest.raises(OSError):
+            writer.submit({"n": 1})
+        assert writer.stats()["failed"] == 1
+        writer.stop()
+
+    def test_fast_mode_drops_when_queue_is_full(self):
+        gate = threading.Event()
+        fake = _FakeLog(gate)
+        writer = AuditWriter(fake, mode="fast", max_pending=2)
+        for i in range(6):
+            writer.submit({"n": i})   # no espera
+        gate.set()
+        writer.stop()
+        stats = writer.stats()
+        assert stats["dropped"] >= 1
+        assert stats["flushed"] + stats["dropped"] == 6
+
+    def test_max_batch_is_respected(self):
+        fake = _FakeLog()
+        writer = AuditWriter(fake, max_batch=3, mode="fast")
+        for i in range(10):
+            writer.submit({"n": i})
+        writer.stop()
+        assert all(len(b) <= 3 for b in fake.batches)
+        assert [e["n"] for b in fake.batches for e in b] == list(range(10))
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            AuditWriter(_FakeLog(), mode="x")
+
+
+class TestAuditStats:
+    """Auditoría del servidor en modo durable (default)."""
+
+    def test_response_is_sent_after_entry_is_written(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "list"})
+        assert [e["action"] for e in read_corporate_log()] == ["list"]
+        stats = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "stats"})["DATA"]["audit"]
+        assert stats["mode"] == "durable"
+        assert stats["flushed"] == 1
+        assert stats["dropped"] == 0
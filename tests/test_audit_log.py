@@ -0,0 +1,51 @@
+"""
+Tests del log de auditoría mock (JSONL append-only con rotación por tamaño).
+"""
+import json
+from tests.conftest import (
+    send_request, generate_uuid, find_free_port, start_server, stop_server,
+    read_corporate_log, MOCK_DB_DIR
+)
+
+
+class TestAuditLog:
+    """CorporateLog en modo mock."""
+
+    def test_entries_are_appended_as_lines(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "list"})
+        send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "get", "ID": "NO-EXISTE"})
+        with open(MOCK_DB_DIR / "corporate_log.jsonl", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert [e["action"] for e in lines] == ["list", "get"]
+        assert lines[1]["id"] == "NO-EXISTE"
+
+    def test_segments_rotate_and_are_read_in_order(self, clean_mock_db, monkeypatch):
+        monkeypatch.setenv("MOCK_LOG_SEGMENT_BYTES", "300")
+        port = find_free_port()
+        process = start_server(port)
+        try:
+            for i in range(8):
+                send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "get", "ID": f"ID-{i}"})
+        finally:
+            stop_server(process)
+        assert len(list(MOCK_DB_DIR.glob("corporate_log.0*.jsonl"))) >= 2
+        assert [e["id"] for e in read_corporate_log()] == [f"ID-{i}" for i in range(8)]
+
+    def test_legacy_json_array_is_migrated_once(self, clean_mock_db):
+        MOCK_DB_DIR.mkdir(exist_ok=True)
+        legacy = [{"UUID": "a1b2c3d4e5f6", "session": "s", "action": "list", "ts": 1}]
+        with open(MOCK_DB_DIR / "corporate_log.json", "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+        port = find_free_port()
+        process = start_server(port)
+        try:
+            send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "list"})
+        finally:
+            stop_server(process)
+        assert not (MOCK_DB_DIR / "corporate_log.json").exists()
+        assert (MOCK_DB_DIR / "corporate_log.json.migrated").exists()
+        log = read_corporate_log()
+        assert log[0] == legacy[0]
+        assert [e["action"] for e in log] == ["list", "list"]
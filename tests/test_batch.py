@@ -0,0 +1,94 @@
+"""
+Tests de la acción batch (varias solicitudes en una sola trama).
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from server.service import Service
+from tests.conftest import (
+    send_request, read_corporate_log, generate_uuid, PROJECT_ROOT, CLIENT_SINGLETON
+)
+
+
+class TestBatch:
+
+    def test_responses_in_order_and_reads_see_previous_writes(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        resp = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "batch", "DATA": [
+            {"ACTION": "get", "ID": "TEST-BATCH-1"},
+            {"ACTION": "set", "ID": "TEST-BATCH-1", "DATA": {"n": 1}},
+            {"ACTION": "get", "ID": "TEST-BATCH-1"},
+            {"ACTION": "list", "FIELDS": ["n"]},
+            {"ACTION": "mget", "IDS": ["TEST-BATCH-1", "NO-EXISTE"]},
+        ]})
+        assert resp["OK"] is False            # el primer get no encuentra el registro
+        first, set_resp, get_resp, list_resp, mget_resp = resp["DATA"]
+        assert first == {"OK": False, "Error": "NotFound"}
+        assert set_resp["DATA"] == {"id": "TEST-BATCH-1", "n": 1}
+        assert get_resp["DATA"]["n"] == 1
+        assert list_resp["DATA"] == [{"id": "TEST-BATCH-1", "n": 1}]
+        assert mget_resp["MISSING"] == ["NO-EXISTE"]
+
+        actions = [e["action"] for e in read_corporate_log() if e.get("UUID") == uuid_cli]
+        assert sorted(actions) == ["get", "get", "list", "mget", "set"]
+
+    def test_invalid_items_fail_alone(self, server_process):
+        port, _ = server_process
+        resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "batch", "DATA": [
+            {"ACTION": "subscribe"}, {"ACTION": "get"}, "x", {"ACTION": "list", "STREAM": True}, {"ACTION": "list"},
+        ]})
+        assert [r["OK"] for r in resp["DATA"]] == [False, False, False, False, True]
+        assert "ID" in resp["DATA"][1]["Error"]
+
+    def test_invalid_envelope(self, server_process):
+        port, _ = server_process
+        for data in (None, [], {"ACTION": "get"}, [{"ACTION": "list"}] * 101):
+            resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "batch", "DATA": data})
+            assert resp["OK"] is False and "batch" in resp["Error"]
+
+    def test_singleton_client_batch_flag(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump([
+                {"UUID": uuid_cli, "ACTION": "set", "ID": "TEST-BATCH-CLI", "nombre": "cli"},
+                {"UUID": uuid_cli, "ACTION": "get", "ID": "TEST-BATCH-CLI"},
+            ], f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(port), "--batch"],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0, result.stdout + result.stderr
+            responses = json.loads(result.stdout)
+            assert responses[1]["DATA"]["nombre"] == "cli"
+        finally:
+            os.unlink(input_file)
+
+
+class TestBatchParallelism:
+    """Las lecturas seguidas corren en paralelo (Service con storage lento, sin servidor)."""
+
+    def test_reads_run_concurrently(self):
+        class _SlowData:
+            def get(self, id_, fields=None):
+                time.sleep(0.1)
+                return {"id": id_}
+
+        class _Audit:
+            def submit(self, record, exact=False):
+                pass
+
+        service = Service(_SlowData(), None, None, logging.getLogger("test"), audit=_Audit())
+        start = time.perf_counter()
+        resp = service.do_batch(generate_uuid(), [{"ACTION": "get", "ID": f"X{i}"} for i in range(8)])
+        assert time.perf_counter() - start < 0.5
+        assert [r["DATA"]["id"] for r in resp["DATA"]] == [f"X{i}" for i in range(8)]
@@ -0,0 +1,142 @@
+"""
+Tests de la caché LRU/TTL de CorporateData.get (backend DynamoDB, con tabla falsa).
+"""
+import time
+import pytest
+from storage.cache import LRUCache, NOT_FOUND
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+
+class TestLRUCache:
+    """Tests unitarios de LRUCache."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1      # "a" pasa a ser el más reciente
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3 and stats["misses"] == 1
+
+    def test_ttl_expires_entries(self):
+        cache = LRUCache(ttl=0.05)
+        cache.put("a", 1)
+        time.sleep(0.1)
+        assert cache.get("a") is None
+        assert cache.stats()["expired"] == 1
+
+    def test_negative_caching_is_optional(self):
+        plain, negative = LRUCache(), LRUCache(negative=True)
+        plain.put("x", None)
+        negative.put("x", None)
+        assert plain.get("x") is None
+        assert negative.get("x") is NOT_FOUND
+
+    def test_fill_does_not_overwrite_newer_version(self):
+        cache = LRUCache()
+        cache.put("a", {"v": 2}, version=2)
+        cache.fill("a", {"v": 1}, version=1)   # lectura vieja que terminó tarde
+        assert cache.get("a") == {"v": 2}
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            LRUCache(max_entries=0)
+
+
+class TestCorporateDataCache:
+    """CorporateData (AWS) con caché delante de get."""
+
+    def test_hot_get_hits_cache(self):
+        table = FakeTable([{"id": "UADER-FCyT-IS1", "nombre": "IS1"}])
+        data = aws_corporate_data(table)
+        for _ in range(5):
+            assert data.get("UADER-FCyT-IS1")["nombre"] == "IS1"
+        assert table.calls["get_item"] == 1
+        assert data.cache_stats()["hits"] == 4
+
+    def test_upsert_updates_cached_entry(self):
+        table = FakeTable([{"id": "A", "nombre": "viejo"}])
+        data = aws_corporate_data(table)
+        data.get("A")
+        data.upsert({"id": "A", "nombre": "nuevo"})
+        reads = table.calls["get_item"]
+        assert data.get("A")["nombre"] == "nuevo"
+        assert table.calls["get_item"] == reads   # servido desde la caché ya actualizada
+
+    def test_returned_items_are_copies(self):
+        data = aws_corporate_data(FakeTable([{"id": "A", "nombre": "x"}]))
+        data.get("A")["nombre"] = "modificado"
+        assert data.get("A")["nombre"] == "x"
+
+    def test_not_found_cached_only_when_enabled(self):
+        table = FakeTable()
+        plain = aws_corporate_data(table)
+        negative = aws_corporate_data(table, cache_negative=True)
+        for store in (plain, negative):
+            assert store.get("NO") is None
+            assert store.get("NO") is None
+        assert table.calls["get_item"] == 3
+
+    def test_cache_can_be_disabled(self):
+        table = FakeTable([{"id": "A"}])
+        data = aws_corporate_data(table, cache_size=0)
+        data.get("A")
+        data.get("A")
+        assert table.calls["get_item"] == 2
+        assert data.cache_stats() is None
+
+    def test_change_from_other_worker_refreshes_cache(self):
+        data = aws_corporate_data(FakeTable([{"id": "A", "nombre": "viejo", "_version": 1}]))
+        data.get("A")
+        data.cache_update({"id": "A", "nombre": "otro worker"}, 2)
+        assert data.get("A")["nombre"] == "otro worker"
+
+
+class TestCorporateDataUpsert:
+    """upsert en DynamoDB: un único UpdateItem atómico."""
+
+    def test_upsert_is_a_single_update_item(self):
+        from decimal import Decimal
+        table = FakeTable([{"id": "A", "nombre": "viejo", "tel": "1", "seq": Decimal("3"), "_version": Decimal("1")}])
+        data = aws_corporate_data(table, cache_size=0)
+        saved, delta = data.upsert_delta({"id": "A", "nombre": "nuevo", "tel": None})
+        assert table.calls == {"update_item": 1}
+        assert saved == {"id": "A", "nombre": "nuevo", "tel": None, "seq": 3}   # null se guarda; sin _version
+        assert isinstance(saved["seq"], int)                 # Decimal -> nativo
+        assert delta == {"id": "A", "version": 2, "changed": {"nombre": "nuevo", "tel": None}}
+        assert table.items["A"] == {"id": "A", "nombre": "nuevo", "tel": None, "seq": 3, "_version": 2}
+
+    def test_upsert_creates_missing_item(self):
+        table = FakeTable()
+        saved = aws_corporate_data(table).upsert({"id": "NUEVO", "nombre": "x"})
+        assert saved == {"id": "NUEVO", "nombre": "x"}
+        assert table.items["NUEVO"] == {**saved, "_version": 1}
+
+    def test_upsert_without_changes_keeps_version(self):
+        table = FakeTable([{"id": "A", "nombre": "x", "tel": None, "_version": 3}])
+        data = aws_corporate_data(table)
+        saved, delta = data.upsert_delta({"id": "A", "nombre": "x", "tel": None})
+        assert table.calls == {"update_item": 1}             # la condición rechaza la escritura
+        assert saved == {"id": "A", "nombre": "x", "tel": None}
+        assert delta == {"id": "A", "version": 3, "changed": {}}
+        assert table.items["A"]["_version"] == 3
+        assert data.get("A") == saved and table.calls["get_item"] == 0   # la caché quedó con el registro
+
+    def test_failed_update_invalidates_cached_entry(self):
+        table = FakeTable([{"id": "A", "nombre": "viejo", "_version": 1}])
+        data = aws_corporate_data(table)
+        data.get("A")
+        update_item = table.update_item
+
+        def applied_then_timeout(**kwargs):
+            update_item(**kwargs)                          # DynamoDB aplicó la escritura...
+            raise TimeoutError("read timeout")             # ...pero la respuesta no llegó
+        table.update_item = applied_then_timeout
+        with pytest.raises(TimeoutError):
+            data.upsert({"id": "A", "nombre": "nuevo"})
+        assert data.get("A")["nombre"] == "nuevo"          # se vuelve a leer de la tabla
+        assert table.calls["get_item"] == 2
@@ -0,0 +1,115 @@
+"""
+Tests del historial de eventos (SEQ) y del replay al reconectarse con SINCE.
+"""
+import pytest
+from common.net import recv_json
+from server.changefeed import ChangeFeed
+from tests.conftest import send_request, generate_uuid, find_free_port, start_server, stop_server, \
+    subscribe
+
+
+def _set(port, item_id, nombre):
+    return send_request("127.0.0.1", port, {
+        "UUID": generate_uuid(), "ACTION": "set", "ID": item_id, "DATA": {"nombre": nombre}
+    })
+
+
+class TestChangeFeed:
+    """Tests unitarios de ChangeFeed."""
+
+    def test_assigns_monotonic_seq_and_replays_gap(self):
+        feed = ChangeFeed(capacity=3)
+        for i in range(5):
+            assert feed.append({"ACTION": "change", "n": i})["SEQ"] == i + 1
+        assert [e["n"] for e in feed.since(2)] == [2, 3, 4]
+        assert feed.since(5) == []
+        assert feed.since(1) is None      # SEQ 2 ya salió del buffer
+        assert feed.since(9) is None      # SEQ del futuro: historial reiniciado
+
+    def test_keeps_seq_assigned_by_bus(self):
+        feed = ChangeFeed()
+        assert feed.append({"SEQ": 7})["SEQ"] == 7
+        assert feed.append({})["SEQ"] == 8
+
+    def test_persisted_feed_survives_restart_and_compacts(self, tmp_path):
+        path = str(tmp_path / "feed.jsonl")
+        feed = ChangeFeed(capacity=2, path=path)
+        for i in range(10):
+            feed.append({"n": i})
+        reloaded = ChangeFeed(capacity=2, path=path)
+        assert reloaded.last_seq == 10
+        assert [e["n"] for e in reloaded.since(8)] == [8, 9]
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) <= 4
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            ChangeFeed(capacity=0)
+
+
+class TestReplay:
+    """Subscribe con SINCE: reenvío de eventos perdidos o aviso de resync."""
+
+    def test_reconnecting_subscriber_gets_missed_events(self, server_process):
+        port, _ = server_process
+        sock = subscribe("127.0.0.1", port, "000000000101")
+        _set(port, "TEST-FEED-001", "uno")
+        last_seq = recv_json(sock)["SEQ"]
+        sock.close()
+
+        _set(port, "TEST-FEED-002", "dos")
+        _set(port, "TEST-FEED-003", "tres")
+
+        sock = subscribe("127.0.0.1", port, "000000000101", SINCE=last_seq)
+        try:
+            replayed = [recv_json(sock), recv_json(sock)]
+            assert [e["DATA"]["id"] for e in replayed] == ["TEST-FEED-002", "TEST-FEED-003"]
+            assert [e["SEQ"] for e in replayed] == [last_seq + 1, last_seq + 2]
+
+            _set(port, "TEST-FEED-004", "cuatro")  # después del replay siguen los eventos en vivo
+            assert recv_json(sock)["SEQ"] == last_seq + 3
+        finally:
+            sock.close()
+
+    def test_gap_older_than_history_asks_for_resync(self, clean_mock_db):
+        port = find_free_port()
+        process = start_server(port, "--feed-size", "2")
+        try:
+            for i in range(4):
+                _set(port, f"TEST-FEED-1{i}", str(i))
+            sock = subscribe("127.0.0.1", port, "000000000102", SINCE=0)
+            try:
+                assert recv_json(sock) == {"ACTION": "resync", "SEQ": 4}
+            finally:
+                sock.close()
+        finally:
+            stop_server(process)
+
+    @pytest.mark.parametrize("engine", ["threads", "asyncio"])
+    @pytest.mark.parametrize("overflow", ["drop_oldest", "disconnect"])
+    def test_replay_larger_than_max_pending_is_complete(self, clean_mock_db, engine, overflow):
+        port = find_free_port()
+        process = start_server(port, "--engine", engine, "--max-pending", "8", "--on-overflow", overflow)
+        try:
+            send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "batch", "DATA": [
+                {"ACTION": "set", "ID": f"TEST-FEED-2{i:02d}", "DATA": {"n": i}} for i in range(60)
+            ]})
+            sock = subscribe("127.0.0.1", port, "000000000103", SINCE=0)
+            try:
+                # el replay (60 eventos) no pasa por el límite de la cola: no se descarta ni desconecta
+                assert [recv_json(sock)["SEQ"] for _ in range(60)] == list(range(1, 61))
+                _set(port, "TEST-FEED-300", "en vivo")
+                assert recv_json(sock)["SEQ"] == 61
+            finally:
+                sock.close()
+            stats = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "stats"})
+            assert stats["DATA"]["subscribers"]["dropped"] == 0
+            assert stats["DATA"]["subscribers"]["disconnected"] == 0
+        finally:
+            stop_server(process)
+
+    def test_invalid_since_rejected(self, server_process):
+        port, _ = server_process
+        response = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "subscribe", "SINCE": "x"})
+        assert response["OK"] is False
+        assert "SINCE" in response["Error"]
@@ -0,0 +1,85 @@
+"""
+Tests del codec de las tramas (JSON por defecto, msgpack con el flag del header).
+"""
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import pytest
+from common.net import pack, pack_json, recv_message, send_json, recv_json, codec_available, \
+    FLAG_MSGPACK
+from tests.conftest import generate_uuid, roundtrip, PROJECT_ROOT, CLIENT_SINGLETON
+
+requires_msgpack = pytest.mark.skipif(not codec_available("msgpack"), reason="msgpack no instalado")
+
+
+class TestFraming:
+
+    def test_json_frame_is_unchanged(self):
+        obj = {"ACTION": "get", "ID": "X", "n": [1, 2.5, None, True]}
+        body = json.dumps(obj).encode("utf-8")
+        assert pack_json(obj) == struct.pack(">I", len(body)) + body   # lo que esperan los clientes viejos
+        assert roundtrip(pack_json(obj)) == (obj, "json")
+
+    @requires_msgpack
+    def test_msgpack_frame_sets_flag(self):
+        obj = {"ACTION": "list", "DATA": [{"id": "A", "n": 1}]}
+        frame = pack(obj, "msgpack")
+        (value,) = struct.unpack(">I", frame[:4])
+        assert value & FLAG_MSGPACK and len(frame) - 4 == value & ~FLAG_MSGPACK
+        assert roundtrip(frame) == (obj, "msgpack")
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            pack({}, "xml")
+
+
+@requires_msgpack
+class TestNegotiation:
+    """El servidor responde en el codec de cada solicitud."""
+
+    def test_msgpack_and_json_on_same_connection(self, engine_server):
+        uuid_cli = generate_uuid()
+        with socket.create_connection(("127.0.0.1", engine_server), timeout=5) as sock:
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "set", "ID": "TEST-CODEC-1", "DATA": {"n": 1},
+                             "KEEPALIVE": True}, "msgpack")
+            resp, codec = recv_message(sock)
+            assert codec == "msgpack" and resp["DATA"]["n"] == 1
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "get", "ID": "TEST-CODEC-1"})
+            resp, codec = recv_message(sock)
+            assert codec == "json" and resp["DATA"]["n"] == 1
+
+    def test_stream_chunks_use_request_codec(self, engine_server):
+        uuid_cli = generate_uuid()
+        with socket.create_connection(("127.0.0.1", engine_server), timeout=5) as sock:
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "mset", "KEEPALIVE": True,
+                             "DATA": [{"id": f"TEST-CODEC-{i}"} for i in range(5)]})
+            assert recv_json(sock)["OK"] is True
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "list", "STREAM": True, "CHUNK": 2}, "msgpack")
+            codecs = []
+            while True:
+                frame, codec = recv_message(sock)
+                codecs.append(codec)
+                if frame.get("END"):
+                    break
+            assert frame["COUNT"] == 5 and set(codecs) == {"msgpack"}
+
+    def test_singleton_client_codec_flag(self, engine_server):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"UUID": generate_uuid(), "ACTION": "list"}, f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(engine_server),
+                 "--codec", "msgpack"],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0, result.stderr
+            assert json.loads(result.stdout)["OK"] is True
+        finally:
+            os.unlink(input_file)
@@ -0,0 +1,162 @@
+"""
+Tests de la compresión de tramas (flag zlib del header, solo para quien envía COMPRESS).
+"""
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import zlib
+import pytest
+from common.net import pack, pack_json, compress_frame, recv_frame, send_json, recv_json, _decode, \
+    codec_available, FLAG_MSGPACK, FLAG_ZLIB, LENGTH_MASK, MAX_REQUEST_INFLATED
+from server.observer import ObserverRegistry
+from tests.conftest import generate_uuid, roundtrip, send_request, FakeSocket, PROJECT_ROOT, CLIENT_SINGLETON
+
+# forma de samples/list_out.json: las mismas claves en cada registro
+RECORDS = [{"id": f"TEST-ZIP-{i:03d}", "cp": "3260", "domicilio": "25 de Mayo 385-1P",
+            "localidad": "Concepción del Uruguay", "provincia": "Entre Rios", "sede": "FCyT"}
+           for i in range(50)]
+
+
+def _header(frame: bytes) -> int:
+    return struct.unpack(">I", frame[:4])[0]
+
+
+class TestFraming:
+
+    def test_large_frame_is_compressed(self):
+        obj = {"OK": True, "DATA": RECORDS}
+        frame = pack(obj, compress_min=1024)
+        value = _header(frame)
+        assert value & FLAG_ZLIB and len(frame) - 4 == value & LENGTH_MASK
+        assert len(frame) < len(pack_json(obj)) / 4
+        assert roundtrip(frame) == (obj, "json")
+
+    def test_small_or_disabled_is_plain(self):
+        obj = {"OK": True, "DATA": RECORDS}
+        assert pack({"OK": True}, compress_min=1024) == pack_json({"OK": True})
+        assert pack(obj) == pack_json(obj)               # sin compress_min nunca se comprime
+
+    def test_frame_that_does_not_shrink_is_sent_plain(self):
+        obj = {"a": 1}                                   # zlib agrega más de lo que ahorra
+        assert pack(obj, compress_min=1) == pack_json(obj)
+
+    def test_compress_frame_keeps_codec_flag(self):
+        frame = compress_frame(pack_json({"DATA": RECORDS}), 1024)
+        assert _header(frame) & FLAG_ZLIB and not _header(frame) & FLAG_MSGPACK
+        assert compress_frame(frame, 1024) is frame      # ya comprimida
+        if codec_available("msgpack"):
+            zipped = compress_frame(pack({"DATA": RECORDS}, "msgpack"), 1024)
+            assert _header(zipped) & FLAG_MSGPACK and _header(zipped) & FLAG_ZLIB
+            assert roundtrip(zipped) == ({"DATA": RECORDS}, "msgpack")
+
+    def test_corrupt_compressed_frame_is_rejected(self):
+        with pytest.raises(ValueError):
+            roundtrip(struct.pack(">I", FLAG_ZLIB | 2) + b"{}")
+        truncated = zlib.compress(b'{"OK": true}')[:-3]
+        with pytest.raises(ValueError):
+            roundtrip(struct.pack(">I", FLAG_ZLIB | len(truncated)) + truncated)
+
+    def test_inflated_size_is_capped(self):
+        body = zlib.compress(json.dumps({"DATA": "x" * 5000}).encode("utf-8"))
+        assert _decode(FLAG_ZLIB | len(body), body, 6000)[0] == {"DATA": "x" * 5000}
+        with pytest.raises(ValueError, match="demasiado grande"):
+            _decode(FLAG_ZLIB | len(body), body, 4096)
+
+
+def _bomb() -> bytes:
+    """Solicitud de pocos KB que descomprimida supera MAX_REQUEST_INFLATED."""
+    raw = b'{"UUID": "0000000000d1", "ACTION": "get", "ID": "' + b"A" * (MAX_REQUEST_INFLATED + 1024) + b'"}'
+    body = zlib.compress(raw, 9)
+    return struct.pack(">I", FLAG_ZLIB | len(body)) + body
+
+
+class TestObserverCompression:
+
+    def test_compressed_variant_is_built_once(self):
+        registry = ObserverRegistry()
+        plain, zipped_a, zipped_b = FakeSocket(), FakeSocket(), FakeSocket()
+        registry.add("0000000000b1", plain)
+        registry.add("0000000000b2", zipped_a, compress_min=1024)
+        registry.add("0000000000b3", zipped_b, compress_min=1024)
+        frame = pack_json({"ACTION": "batch", "EVENTS": RECORDS})
+        registry.broadcast_frame(frame)
+        assert plain.frames == [frame]
+        assert zipped_a.frames[0] is zipped_b.frames[0]
+        assert _header(zipped_a.frames[0]) & FLAG_ZLIB
+
+        small = pack_json({"ACTION": "change", "DATA": {"id": "X"}})
+        registry.broadcast_frame(small, key="X")
+        assert zipped_a.frames[1] == small               # bajo el umbral sale igual
+
+
+class TestServerCompression:
+    """El servidor comprime solo para quien envía COMPRESS (ambos motores)."""
+
+    def test_list_reply_and_stream_chunks(self, engine_server):
+        uuid_cli = generate_uuid()
+        with socket.create_connection(("127.0.0.1", engine_server), timeout=5) as sock:
+            # la solicitud grande también viaja comprimida
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "mset", "DATA": RECORDS, "KEEPALIVE": True}, "json", 1024)
+            assert recv_json(sock)["OK"] is True
+
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "list", "KEEPALIVE": True})
+            plain = recv_frame(sock)
+            assert not _header(plain) & FLAG_ZLIB
+
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "list", "COMPRESS": True, "KEEPALIVE": True})
+            zipped = recv_frame(sock)
+            assert _header(zipped) & FLAG_ZLIB and len(zipped) < len(plain) / 4
+            assert roundtrip(zipped)[0] == json.loads(plain[4:])
+
+            send_json(sock, {"UUID": uuid_cli, "ACTION": "list", "STREAM": True, "CHUNK": 25, "COMPRESS": True})
+            frames = [recv_frame(sock) for _ in range(3)]
+            assert [bool(_header(f) & FLAG_ZLIB) for f in frames] == [True, True, False]   # END es chico
+            assert roundtrip(frames[2])[0] == {"OK": True, "END": True, "COUNT": 50}
+
+    def test_subscriber_opt_in(self, engine_server):
+        plain = socket.create_connection(("127.0.0.1", engine_server), timeout=5)
+        zipped = socket.create_connection(("127.0.0.1", engine_server), timeout=5)
+        try:
+            send_json(plain, {"UUID": "0000000000c1", "ACTION": "subscribe"})
+            send_json(zipped, {"UUID": "0000000000c2", "ACTION": "subscribe", "COMPRESS": True})
+            assert recv_json(plain)["OK"] is True and recv_json(zipped)["OK"] is True
+            with socket.create_connection(("127.0.0.1", engine_server), timeout=5) as sock:
+                send_json(sock, {"UUID": generate_uuid(), "ACTION": "mset", "DATA": RECORDS})
+                assert recv_json(sock)["OK"] is True
+            a, b = recv_frame(plain), recv_frame(zipped)
+            assert not _header(a) & FLAG_ZLIB and _header(b) & FLAG_ZLIB
+            assert roundtrip(b)[0] == json.loads(a[4:])
+        finally:
+            plain.close()
+            zipped.close()
+
+    def test_singleton_client_compress_flag(self, engine_server):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"UUID": generate_uuid(), "ACTION": "mset", "DATA": RECORDS}, f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(engine_server), "--compress"],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0, result.stderr
+            assert json.loads(result.stdout)["FAILED"] == 0
+        finally:
+            os.unlink(input_file)
+
+    def test_decompression_bomb_is_rejected(self, engine_server):
+        frame = _bomb()
+        assert len(frame) < 64 * 1024
+        with socket.create_connection(("127.0.0.1", engine_server), timeout=5) as sock:
+            sock.sendall(frame)
+            resp = recv_json(sock)
+            assert resp["OK"] is False and "demasiado grande" in resp["Error"]
+            assert recv_json(sock) is None                  # el servidor cierra esa conexión
+        resp = send_request("127.0.0.1", engine_server, {"UUID": generate_uuid(), "ACTION": "list"})
+        assert resp["OK"] is True
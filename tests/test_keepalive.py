@@ -0,0 +1,87 @@
+"""
+Tests de conexiones persistentes (KEEPALIVE) y pipelining.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import pytest
+from common.net import send_json, recv_json
+from tests.conftest import (
+    send_pipelined, generate_uuid, find_free_port, start_server, stop_server,
+    PROJECT_ROOT, CLIENT_SINGLETON
+)
+
+
+@pytest.fixture(params=["threads", "asyncio"])
+def short_idle_server(request, clean_mock_db):
+    """Servidor (ambos motores) con idle timeout corto."""
+    port = find_free_port()
+    process = start_server(port, "--engine", request.param, "--idle-timeout", "0.5")
+    yield port
+    stop_server(process)
+
+
+class TestKeepAlive:
+    """Tests de KEEPALIVE sobre ambos motores."""
+
+    def test_pipelined_requests_answered_in_order(self, short_idle_server):
+        """Solicitudes encadenadas sin esperar respuesta se responden en orden."""
+        port = short_idle_server
+        uuid_cli = generate_uuid()
+        responses = send_pipelined("127.0.0.1", port, [
+            {"UUID": uuid_cli, "ACTION": "set", "ID": "TEST-KA-1", "DATA": {"nombre": "uno"}},
+            {"UUID": uuid_cli, "ACTION": "get", "ID": "TEST-KA-1"},
+            {"UUID": "invalido", "ACTION": "get", "ID": "TEST-KA-1"},
+            {"UUID": uuid_cli, "ACTION": "get", "ID": "NO-EXISTE"},
+            {"UUID": uuid_cli, "ACTION": "list"},
+        ])
+        assert responses[0]["OK"] is True
+        assert responses[1]["DATA"]["nombre"] == "uno"
+        assert responses[2]["OK"] is False and "uuid" in responses[2]["Error"].lower()
+        assert responses[3] == {"OK": False, "Error": "NotFound"}
+        assert [item["id"] for item in responses[4]["DATA"]] == ["TEST-KA-1"]
+
+    def test_without_keepalive_connection_closes(self, short_idle_server):
+        """Sin KEEPALIVE el servidor cierra después de la primera respuesta."""
+        port = short_idle_server
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            send_json(sock, {"UUID": generate_uuid(), "ACTION": "list"})
+            assert recv_json(sock)["OK"] is True
+            assert recv_json(sock) is None
+
+    def test_idle_connection_is_reclaimed(self, short_idle_server):
+        """Una conexión KEEPALIVE inactiva se cierra al vencer el idle timeout."""
+        port = short_idle_server
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            send_json(sock, {"UUID": generate_uuid(), "ACTION": "list", "KEEPALIVE": True})
+            assert recv_json(sock)["OK"] is True
+            start = time.time()
+            assert recv_json(sock) is None
+            assert time.time() - start < 3
+
+    def test_singleton_client_pipelines_array_input(self, short_idle_server):
+        """singletonclient envía un arreglo de solicitudes por una sola conexión."""
+        port = short_idle_server
+        uuid_cli = generate_uuid()
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump([
+                {"UUID": uuid_cli, "ACTION": "set", "ID": "TEST-KA-CLI", "nombre": "cli"},
+                {"UUID": uuid_cli, "ACTION": "get", "ID": "TEST-KA-CLI"},
+            ], f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(port)],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0
+            responses = json.loads(result.stdout)
+            assert responses[1]["DATA"]["nombre"] == "cli"
+        finally:
+            os.unlink(input_file)
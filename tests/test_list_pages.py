@@ -0,0 +1,179 @@
+"""
+Tests de list paginado (LIMIT / CURSOR / NEXT) y en streaming (STREAM: tramas CHUNK + END).
+"""
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import pytest
+from common.net import send_json, recv_json
+from server.service import Service
+from tests.conftest import (
+    send_request, generate_uuid, find_free_port, start_server, stop_server,
+    PROJECT_ROOT, CLIENT_SINGLETON, MOCK_DB_DIR
+)
+
+
+@pytest.fixture(params=["threads", "asyncio"])
+def seeded_server(request, clean_mock_db):
+    """Servidor (ambos motores) con 7 registros cargados."""
+    port = find_free_port()
+    process = start_server(port, "--engine", request.param)
+    uuid_cli = generate_uuid()
+    for i in range(7):
+        send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "set", "ID": f"TEST-PAGE-{i}", "DATA": {"n": i}})
+    yield port
+    stop_server(process)
+
+
+class TestListPages:
+
+    def test_pages_cover_every_record_once(self, seeded_server):
+        port = seeded_server
+        seen, cursor, pages = [], None, 0
+        while True:
+            req = {"UUID": generate_uuid(), "ACTION": "list", "LIMIT": 3}
+            if cursor:
+                req["CURSOR"] = cursor
+            resp = send_request("127.0.0.1", port, req)
+            assert resp["OK"] is True and len(resp["DATA"]) <= 3
+            seen += [it["id"] for it in resp["DATA"]]
+            pages += 1
+            cursor = resp["NEXT"]
+            if cursor is None:
+                break
+        assert pages == 3
+        assert seen == sorted(f"TEST-PAGE-{i}" for i in range(7))   # mock: orden estable por id
+
+    def test_list_without_limit_is_unchanged(self, seeded_server):
+        resp = send_request("127.0.0.1", seeded_server, {"UUID": generate_uuid(), "ACTION": "list"})
+        assert len(resp["DATA"]) == 7
+        assert "NEXT" not in resp
+
+    @pytest.mark.parametrize("extra", [{"LIMIT": 0}, {"LIMIT": "3"}, {"CURSOR": "no-es-un-cursor"}])
+    def test_invalid_limit_or_cursor(self, seeded_server, extra):
+        resp = send_request("127.0.0.1", seeded_server, {"UUID": generate_uuid(), "ACTION": "list", **extra})
+        assert resp["OK"] is False
+        assert "LIMIT" in resp["Error"] or "CURSOR" in resp["Error"]
+
+    def test_singleton_client_page_size(self, seeded_server):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"UUID": generate_uuid(), "ACTION": "list"}, f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(seeded_server), "--page-size", "2"],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0, result.stderr
+            resp = json.loads(result.stdout)
+            assert resp["OK"] is True and len(resp["DATA"]) == 7
+        finally:
+            os.unlink(input_file)
+
+
+def _stream(port, **extra):
+    frames = []
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        send_json(sock, {"UUID": generate_uuid(), "ACTION": "list", "STREAM": True, **extra})
+        while True:
+            frame = recv_json(sock)
+            frames.append(frame)
+            if frame is None or frame.get("END") or not frame.get("OK"):
+                return frames
+
+
+class TestListStream:
+
+    def test_stream_sends_chunks_then_end(self, seeded_server):
+        frames = _stream(seeded_server, CHUNK=3)
+        assert [len(f["CHUNK"]) for f in frames[:-1]] == [3, 3, 1]
+        assert frames[-1] == {"OK": True, "END": True, "COUNT": 7}
+        ids = [it["id"] for f in frames[:-1] for it in f["CHUNK"]]
+        assert sorted(ids) == sorted(f"TEST-PAGE-{i}" for i in range(7))
+
+    def test_stream_keeps_connection_usable(self, seeded_server):
+        with socket.create_connection(("127.0.0.1", seeded_server), timeout=5) as sock:
+            send_json(sock, {"UUID": generate_uuid(), "ACTION": "list", "STREAM": True, "KEEPALIVE": True})
+            while not recv_json(sock).get("END"):
+                pass
+            send_json(sock, {"UUID": generate_uuid(), "ACTION": "get", "ID": "TEST-PAGE-0"})
+            assert recv_json(sock)["DATA"]["n"] == 0
+
+    def test_stream_rejects_cursor(self, seeded_server):
+        frames = _stream(seeded_server, LIMIT=2)
+        assert frames[-1]["OK"] is False and "STREAM" in frames[-1]["Error"]
+
+    def test_singleton_client_stream(self, seeded_server):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+            json.dump({"UUID": generate_uuid(), "ACTION": "list"}, f)
+            input_file = f.name
+        try:
+            env = os.environ.copy()
+            env["PYTHONPATH"] = str(PROJECT_ROOT)
+            result = subprocess.run(
+                [sys.executable, str(CLIENT_SINGLETON), "-i", input_file, "-p", str(seeded_server),
+                 "--stream", "--page-size", "2"],
+                capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+            )
+            assert result.returncode == 0, result.stderr
+            assert len(json.loads(result.stdout)["DATA"]) == 7
+        finally:
+            os.unlink(input_file)
+
+
+@pytest.fixture(params=["threads", "asyncio"])
+def single_worker_server(request, clean_mock_db):
+    """Servidor con un solo hilo en el pool, idle timeout corto y ~10 MB de registros precargados."""
+    MOCK_DB_DIR.mkdir(exist_ok=True)
+    with open(MOCK_DB_DIR / "corporate_data.json", "w", encoding="utf-8") as f:
+        json.dump([{"id": f"TEST-BIG-{i:05d}", "relleno": "x" * 2000} for i in range(5000)], f)
+    port = find_free_port()
+    process = start_server(port, "--engine", request.param, "--pool-size", "1", "--idle-timeout", "0.5")
+    yield port
+    stop_server(process)
+
+
+class TestStalledStream:
+
+    def test_client_that_never_reads_releases_the_pool(self, single_worker_server):
+        port = single_worker_server
+        stalled = socket.create_connection(("127.0.0.1", port), timeout=5)
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        try:
+            send_json(stalled, {"UUID": generate_uuid(), "ACTION": "list", "STREAM": True, "CHUNK": 500})
+            # el único hilo del pool queda bloqueado escribiendo hasta que vence el timeout
+            with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+                send_json(sock, {"UUID": generate_uuid(), "ACTION": "get", "ID": "TEST-BIG-00000"})
+                resp = recv_json(sock)
+            assert resp["OK"] is True and resp["DATA"]["id"] == "TEST-BIG-00000"
+        finally:
+            stalled.close()
+
+    def test_send_timeout_stops_the_scan(self):
+        closed = []
+
+        class _Data:
+            def iter_pages(self, fields=None):
+                try:
+                    for i in range(100):
+                        yield [{"id": f"X{i}"}]
+                finally:
+                    closed.append(True)
+
+        class _Audit:
+            def submit(self, record, exact=False):
+                pass
+
+        def send(obj):
+            raise TimeoutError("el cliente no lee")
+
+        service = Service(_Data(), None, None, logging.getLogger("test"), audit=_Audit())
+        with pytest.raises(TimeoutError):
+            service.do_list_stream(generate_uuid(), 1, send)
+        assert closed == [True]
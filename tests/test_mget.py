@@ -0,0 +1,76 @@
+"""
+Tests de la acción mget (varios IDs en una solicitud).
+"""
+import pytest
+import storage.adapter as adapter
+from tests.conftest import send_request, read_corporate_log, generate_uuid
+from tests.fake_dynamodb import FakeTable, FakeDynamoDB, aws_corporate_data
+
+
+def _items(n):
+    return [{"id": f"ID-{i:03d}", "n": i} for i in range(n)]
+
+
+class TestMget:
+    """mget contra el servidor (mock)."""
+
+    def test_found_and_missing(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        for i in range(3):
+            send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "set", "ID": f"TEST-MGET-{i}", "DATA": {"n": i}})
+        ids = ["TEST-MGET-2", "NO-EXISTE", "TEST-MGET-0", "TEST-MGET-2"]
+        resp = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "mget", "IDS": ids, "FIELDS": ["n"]})
+        assert resp["OK"] is True
+        assert resp["DATA"] == [{"id": "TEST-MGET-2", "n": 2}, {"id": "TEST-MGET-0", "n": 0}]
+        assert resp["MISSING"] == ["NO-EXISTE"]
+
+        entries = [e for e in read_corporate_log() if e.get("action") == "mget"]
+        assert len(entries) == 1
+        assert entries[0]["ids"] == ["TEST-MGET-2", "NO-EXISTE", "TEST-MGET-0"]
+
+    @pytest.mark.parametrize("ids", [None, [], "ID-1", [""], [1]])
+    def test_invalid_ids(self, server_process, ids):
+        port, _ = server_process
+        req = {"UUID": generate_uuid(), "ACTION": "mget"}
+        if ids is not None:
+            req["IDS"] = ids
+        resp = send_request("127.0.0.1", port, req)
+        assert resp["OK"] is False and "IDS" in resp["Error"]
+
+
+class TestMgetDynamo:
+    """get_many con BatchGetItem (tabla y recurso falsos)."""
+
+    def test_chunks_of_100_keys(self):
+        table = FakeTable(_items(250))
+        data = aws_corporate_data(table, dynamodb=FakeDynamoDB(table), cache_size=0)
+        ids = [f"ID-{i:03d}" for i in range(260)]
+        found = data.get_many(ids, ["id"])
+        assert len(found) == 250 and found["ID-007"] == {"id": "ID-007"}
+        assert table.calls == {"batch_get_item": 3}
+
+    def test_unprocessed_keys_are_retried(self, monkeypatch):
+        monkeypatch.setattr(adapter, "BATCH_GET_BACKOFF", 0.001)
+        table = FakeTable(_items(10))
+        data = aws_corporate_data(table, dynamodb=FakeDynamoDB(table, throttled=2), cache_size=0)
+        assert len(data.get_many([it["id"] for it in _items(10)])) == 10
+        assert table.calls["batch_get_item"] == 3   # 10 claves → 5 sin procesar → 3 → listo
+
+    def test_gives_up_after_retries(self, monkeypatch):
+        monkeypatch.setattr(adapter, "BATCH_GET_BACKOFF", 0.001)
+        table = FakeTable(_items(1))
+        data = aws_corporate_data(table, dynamodb=FakeDynamoDB(table, throttled=100), cache_size=0)
+        with pytest.raises(RuntimeError):
+            data.get_many(["ID-000"])
+        assert table.calls["batch_get_item"] == adapter.BATCH_GET_RETRIES + 1
+
+    def test_cache_hits_skip_batch_get(self):
+        table = FakeTable(_items(5))
+        data = aws_corporate_data(table, dynamodb=FakeDynamoDB(table))
+        data.get("ID-000")
+        found = data.get_many(["ID-000", "ID-001", "NO-EXISTE"])
+        assert set(found) == {"ID-000", "ID-001"}
+        assert table.calls == {"get_item": 1, "batch_get_item": 1}
+        data.get_many(["ID-001"])
+        assert table.calls["batch_get_item"] == 1   # ya quedó en la caché
@@ -0,0 +1,45 @@
+"""
+Tests del backend mock de CorporateData (en memoria, write-through o write-behind).
+"""
+import json
+from tests.conftest import (
+    send_request, generate_uuid, find_free_port, start_server, stop_server,
+    read_corporate_data, MOCK_DB_DIR
+)
+
+
+def _set(port, item_id, **fields):
+    return send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "set", "ID": item_id, "DATA": fields})
+
+
+class TestMockStore:
+    """Persistencia del mock."""
+
+    def test_existing_file_is_served_from_memory(self, clean_mock_db):
+        MOCK_DB_DIR.mkdir(exist_ok=True)
+        with open(MOCK_DB_DIR / "corporate_data.json", "w", encoding="utf-8") as f:
+            json.dump([{"id": "TEST-MEM-001", "nombre": "Precargado"}], f)
+        port = find_free_port()
+        process = start_server(port)
+        try:
+            response = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "get", "ID": "TEST-MEM-001"})
+            assert response["DATA"]["nombre"] == "Precargado"
+        finally:
+            stop_server(process)
+
+    def test_write_through_persists_before_responding(self, server_process):
+        port, _ = server_process
+        assert _set(port, "TEST-MEM-002", nombre="Inmediato")["OK"] is True
+        assert [it["id"] for it in read_corporate_data()] == ["TEST-MEM-002"]
+
+    def test_write_behind_flushes_on_shutdown(self, clean_mock_db):
+        port = find_free_port()
+        process = start_server(port, "--flush-interval", "60")
+        try:
+            assert _set(port, "TEST-MEM-003", nombre="Diferido")["OK"] is True
+            response = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "get", "ID": "TEST-MEM-003"})
+            assert response["DATA"]["nombre"] == "Diferido"
+            assert read_corporate_data() == []      # todavía no se volcó
+        finally:
+            stop_server(process)                    # SIGTERM: apagado ordenado con volcado final
+        assert [it["id"] for it in read_corporate_data()] == ["TEST-MEM-003"]
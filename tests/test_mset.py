@@ -0,0 +1,121 @@
+"""
+Tests de la acción mset (varios set en una solicitud, un evento agregado).
+"""
+import threading
+import time
+from collections import Counter
+from common.net import recv_json
+from tests.conftest import send_request, read_corporate_data, read_corporate_log, generate_uuid, subscribe
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+
+class TestMset:
+    """mset contra el servidor (mock)."""
+
+    def test_per_item_status_and_single_audit_entry(self, server_process):
+        port, _ = server_process
+        send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "set", "ID": "TEST-MSET-1",
+                                         "DATA": {"nombre": "viejo", "tel": "1"}})
+        resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "mset", "DATA": [
+            {"id": "TEST-MSET-1", "nombre": "nuevo", "tel": None},
+            {"nombre": "sin id"},
+            {"ID": "TEST-MSET-2", "nombre": "otro"},
+        ]})
+        assert resp["OK"] is False and resp["FAILED"] == 1
+        assert resp["RESULTS"][0] == {"id": "TEST-MSET-1", "OK": True, "VERSION": 2}
+        assert resp["RESULTS"][1]["OK"] is False
+        assert resp["RESULTS"][2] == {"id": "TEST-MSET-2", "OK": True, "VERSION": 1}
+
+        data = {it["id"]: it for it in read_corporate_data()}
+        assert data["TEST-MSET-1"] == {"id": "TEST-MSET-1", "nombre": "nuevo", "tel": None, "_version": 2}
+        assert data["TEST-MSET-2"]["nombre"] == "otro"
+        entries = [e for e in read_corporate_log() if e.get("action") == "mset"]
+        assert len(entries) == 1 and entries[0]["ids"] == ["TEST-MSET-1", "TEST-MSET-2"]
+
+    def test_invalid_data(self, server_process):
+        port, _ = server_process
+        for data in (None, [], {"id": "X"}):
+            resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "mset", "DATA": data})
+            assert resp["OK"] is False and "mset" in resp["Error"]
+
+    def test_notification_is_aggregated_or_split_per_id(self, server_process):
+        port, _ = server_process
+        everyone = subscribe("127.0.0.1", port, "0000000000a1")
+        filtered = subscribe("127.0.0.1", port, "0000000000a2", IDS=["TEST-MSET-B*"])
+        delta = subscribe("127.0.0.1", port, "0000000000a3", MODE="delta")
+        try:
+            send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "mset", "DATA": [
+                {"id": "TEST-MSET-A", "n": 1}, {"id": "TEST-MSET-B1", "n": 2}, {"id": "TEST-MSET-B2", "n": 3},
+            ]})
+            batch = recv_json(everyone)
+            assert batch["ACTION"] == "batch" and batch["SEQ"] == 1
+            assert [e["DATA"]["id"] for e in batch["EVENTS"]] == ["TEST-MSET-A", "TEST-MSET-B1", "TEST-MSET-B2"]
+
+            singles = [recv_json(filtered), recv_json(filtered)]
+            assert [e["ACTION"] for e in singles] == ["change", "change"]
+            assert [e["DATA"]["id"] for e in singles] == ["TEST-MSET-B1", "TEST-MSET-B2"]
+            assert all(e["SEQ"] == 1 for e in singles)
+
+            deltas = recv_json(delta)
+            assert deltas["MODE"] == "delta" and [e["ID"] for e in deltas["EVENTS"]][0] == "TEST-MSET-A"
+        finally:
+            for sock in (everyone, filtered, delta):
+                sock.close()
+
+    def test_batch_is_replayed_with_since(self, server_process):
+        port, _ = server_process
+        send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "mset",
+                                         "DATA": [{"id": "TEST-MSET-R1"}, {"id": "TEST-MSET-R2"}]})
+        sock = subscribe("127.0.0.1", port, "0000000000a4", SINCE=0)
+        try:
+            replay = recv_json(sock)
+            assert replay["ACTION"] == "batch" and len(replay["EVENTS"]) == 2
+        finally:
+            sock.close()
+
+
+class TestMsetDynamo:
+    """upsert_many en DynamoDB: un UpdateItem por registro, fallas aisladas."""
+
+    def test_failure_of_one_item_does_not_stop_the_rest(self):
+        table = FakeTable()
+        update_item = table.update_item
+
+        def flaky(Key, **kwargs):
+            if Key["id"] == "MALO":
+                raise RuntimeError("ConditionalCheckFailed")
+            return update_item(Key=Key, **kwargs)
+        table.update_item = flaky
+        data = aws_corporate_data(table)
+        results = data.upsert_many([{"id": f"ID-{i}", "n": i} for i in range(5)] + [{"id": "MALO"}])
+        assert [r[1]["version"] for r in results[:5]] == [1] * 5
+        assert isinstance(results[5], RuntimeError)
+        assert set(table.items) == {f"ID-{i}" for i in range(5)}
+        assert data.get("ID-3") == {"id": "ID-3", "n": 3}   # la caché quedó actualizada
+
+    def test_repeated_ids_are_applied_in_request_order(self):
+        table = FakeTable()
+        update_item = table.update_item
+        in_flight, overlaps, lock = Counter(), [], threading.Lock()
+
+        def tracked(Key, **kwargs):
+            with lock:
+                in_flight[Key["id"]] += 1
+                if in_flight[Key["id"]] > 1:
+                    overlaps.append(Key["id"])
+            time.sleep(0.02)                               # latencia: da lugar a que se solapen
+            try:
+                return update_item(Key=Key, **kwargs)
+            finally:
+                with lock:
+                    in_flight[Key["id"]] -= 1
+        table.update_item = tracked
+        data = aws_corporate_data(table)
+        items = [{"id": "A", "n": 1}, {"id": "B", "n": 1}, {"id": "A", "n": 2},
+                 {"id": "A", "n": 3}, {"id": "B", "n": 2}]
+        results = data.upsert_many(items)
+        assert overlaps == []                              # un mismo id nunca en paralelo
+        assert [(saved["id"], saved["n"], delta["version"]) for saved, delta in results] == \
+            [("A", 1, 1), ("B", 1, 1), ("A", 2, 2), ("A", 3, 3), ("B", 2, 2)]
+        assert table.items["A"] == {"id": "A", "n": 3, "_version": 3}
+        assert table.items["B"] == {"id": "B", "n": 2, "_version": 2}
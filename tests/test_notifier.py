@@ -0,0 +1,94 @@
+"""
+Tests del Notifier (fan-out fuera del camino de la respuesta y ventana de coalescencia).
+"""
+import socket
+import threading
+from common.net import send_json, recv_json
+from server.notifier import Notifier
+from tests.conftest import send_request, generate_uuid, find_free_port, start_server, stop_server
+
+
+def _change(item_id, **fields):
+    return {"ACTION": "change", "DATA": {"id": item_id, **fields}}
+
+
+class _Collector:
+    def __init__(self):
+        self.events = []
+        self.done = threading.Event()
+
+    def __call__(self, event):
+        self.events.append(event)
+        self.done.set()
+
+
+class TestNotifier:
+    """Tests unitarios del Notifier."""
+
+    def test_without_window_every_event_is_sent(self):
+        sink = _Collector()
+        notifier = Notifier(sink)
+        for i in range(3):
+            notifier.submit(_change("X", n=i))
+        notifier.stop()
+        assert [e["DATA"]["n"] for e in sink.events] == [0, 1, 2]
+        assert notifier.suppressed == 0
+
+    def test_batch_is_sent_after_held_events(self):
+        sink = _Collector()
+        notifier = Notifier(sink, coalesce_window=5.0)
+        notifier.submit(_change("X", n=1))
+        notifier.submit({"ACTION": "batch", "EVENTS": [_change("X", n=2)]})
+        notifier.stop()
+        assert [e["ACTION"] for e in sink.events] == ["change", "batch"]   # sin esperar la ventana
+
+    def test_window_folds_writes_to_same_id(self):
+        sink = _Collector()
+        notifier = Notifier(sink, coalesce_window=0.2)
+        for i in range(5):
+            notifier.submit(_change("X", n=i))
+        notifier.submit(_change("Y", n=9))
+        assert sink.done.wait(2)   # vence la ventana sin esperar a stop()
+        notifier.stop()
+        by_id = {e["DATA"]["id"]: e for e in sink.events}
+        assert len(sink.events) == 2
+        assert by_id["X"]["DATA"]["n"] == 4
+        assert by_id["X"]["MERGED"] == 5
+        assert "MERGED" not in by_id["Y"]
+        assert notifier.suppressed == 4
+
+    def test_folded_delta_keeps_every_change(self):
+        sink = _Collector()
+        notifier = Notifier(sink, coalesce_window=0.1)
+        notifier.submit({**_change("X"), "DELTA": {"id": "X", "version": 2, "changed": {"a": 1, "b": 1}}})
+        notifier.submit({**_change("X"), "DELTA": {"id": "X", "version": 3, "changed": {"b": None, "c": 1}}})
+        notifier.stop()  # al detenerse se envía lo retenido
+        (event,) = sink.events
+        assert event["DELTA"] == {"id": "X", "version": 3, "changed": {"a": 1, "b": None, "c": 1}}
+
+
+class TestCoalescingServer:
+    """--coalesce-window en el servidor."""
+
+    def test_burst_of_sets_reaches_subscriber_as_one_event(self, clean_mock_db):
+        port = find_free_port()
+        process = start_server(port, "--coalesce-window", "1000")
+        try:
+            sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+            try:
+                send_json(sock, {"UUID": "000000000201", "ACTION": "subscribe"})
+                assert recv_json(sock)["OK"] is True
+                for i in range(4):
+                    send_request("127.0.0.1", port, {
+                        "UUID": generate_uuid(), "ACTION": "set", "ID": "TEST-HOT-001", "DATA": {"n": i}
+                    })
+                event = recv_json(sock)
+                assert event["DATA"]["n"] == 3
+                assert event["MERGED"] == 4
+
+                stats = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "stats"})
+                assert stats["DATA"]["subscribers"]["notifier_suppressed"] == 3
+            finally:
+                sock.close()
+        finally:
+            stop_server(process)
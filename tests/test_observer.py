@@ -0,0 +1,101 @@
+"""
+Tests unitarios de ObserverRegistry.
+"""
+import struct
+from common.net import pack_json
+from server.observer import ObserverRegistry
+from tests.conftest import FakeSocket
+
+
+class TestObserverRegistry:
+    """Tests del registro de subscriptores."""
+
+    def test_broadcast_frame_sends_same_bytes_to_all(self):
+        registry = ObserverRegistry()
+        socks = [FakeSocket() for _ in range(3)]
+        for i, sock in enumerate(socks):
+            registry.add(f"{i:012x}", sock)
+
+        frame = pack_json({"ACTION": "change", "DATA": {"id": "X"}})
+        registry.broadcast_frame(frame)
+
+        assert all(sock.frames == [frame] for sock in socks)
+        (length,) = struct.unpack(">I", frame[:4])
+        assert length == len(frame) - 4
+
+    def test_failed_subscriber_is_removed(self):
+        registry = ObserverRegistry()
+        good, bad = FakeSocket(), FakeSocket(fail=True)
+        registry.add("00000000000a", good)
+        registry.add("00000000000b", bad)
+
+        registry.broadcast_frame(pack_json({"ACTION": "change"}))
+        registry.broadcast_frame(pack_json({"ACTION": "change"}))
+
+        assert len(good.frames) == 2
+        assert bad.frames == []
+
+    def test_remove_only_matching_socket(self):
+        registry = ObserverRegistry()
+        old, new = FakeSocket(), FakeSocket()
+        registry.add("00000000000c", old)
+        registry.add("00000000000c", new)
+        assert old.closed
+
+        registry.remove("00000000000c", old)  # el anterior ya fue reemplazado
+        registry.broadcast_frame(pack_json({"ACTION": "change"}))
+        assert len(new.frames) == 1
+
+    def test_filtered_subscribers_only_get_matching_ids(self):
+        registry = ObserverRegistry()
+        everyone, exact, prefix = FakeSocket(), FakeSocket(), FakeSocket()
+        registry.add("00000000000d", everyone)
+        registry.add("00000000000e", exact, ids=["UADER-FCyT-IS1"])
+        registry.add("00000000000f", prefix, ids=["UNER-*"])
+
+        registry.broadcast_frame(b"a", key="UADER-FCyT-IS1")
+        registry.broadcast_frame(b"b", key="UNER-FCAL")
+        registry.broadcast_frame(b"c", key="OTRA")
+
+        assert everyone.frames == [b"a", b"b", b"c"]
+        assert exact.frames == [b"a"]
+        assert prefix.frames == [b"b"]
+
+    def test_resubscribe_replaces_filter(self):
+        registry = ObserverRegistry()
+        first, second = FakeSocket(), FakeSocket()
+        registry.add("000000000010", first, ids=["A"])
+        registry.add("000000000010", second, ids=["B"])
+        registry.broadcast_frame(b"a", key="A")
+        registry.broadcast_frame(b"b", key="B")
+        assert second.frames == [b"b"]
+
+        registry.remove("000000000010", second)
+        registry.broadcast_frame(b"b", key="B")
+        assert second.frames == [b"b"]
+
+    def test_delta_subscribers_get_delta_frame(self):
+        registry = ObserverRegistry()
+        full, delta = FakeSocket(), FakeSocket()
+        registry.add("000000000011", full)
+        registry.add("000000000012", delta, mode="delta")
+
+        registry.broadcast_frame(b"full", key="X", delta_frame=b"delta")
+        registry.broadcast_frame(b"full-sin-cambios", key="X")  # sin delta: nada para ese modo
+
+        assert full.frames == [b"full", b"full-sin-cambios"]
+        assert delta.frames == [b"delta"]
+
+    def test_batch_goes_whole_to_unfiltered_and_split_to_filtered(self):
+        registry = ObserverRegistry()
+        everyone, only_b, delta = FakeSocket(), FakeSocket(), FakeSocket()
+        registry.add("000000000013", everyone)
+        registry.add("000000000014", only_b, ids=["B"])
+        registry.add("000000000015", delta, mode="delta")
+
+        parts = [("A", b"a", b"da"), ("B", b"b", b"db"), ("C", b"c", None)]
+        registry.broadcast_batch(b"lote", b"lote-delta", parts)
+
+        assert everyone.frames == [b"lote"]
+        assert only_b.frames == [b"b"]
+        assert delta.frames == [b"lote-delta"]
@@ -0,0 +1,62 @@
+"""
+Tests de proyección de campos (FIELDS) en get y list.
+"""
+import pytest
+from tests.conftest import send_request, generate_uuid
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+RECORD = {"id": "TEST-PROJ-1", "nombre": "UADER", "localidad": "C. del Uruguay", "provincia": "Entre Rios"}
+
+
+def _seed(port):
+    data = {k: v for k, v in RECORD.items() if k != "id"}
+    send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "set", "ID": RECORD["id"], "DATA": data})
+
+
+class TestProjection:
+    """FIELDS contra el servidor (mock)."""
+
+    def test_get_with_fields(self, server_process):
+        port, _ = server_process
+        _seed(port)
+        resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "get", "ID": RECORD["id"],
+                                                "FIELDS": ["localidad", "provincia", "no_existe"]})
+        assert resp["DATA"] == {"id": RECORD["id"], "localidad": "C. del Uruguay", "provincia": "Entre Rios"}
+
+    def test_list_with_fields(self, server_process):
+        port, _ = server_process
+        _seed(port)
+        for extra in ({}, {"LIMIT": 10}):
+            resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "list",
+                                                    "FIELDS": ["provincia"], **extra})
+            assert resp["DATA"] == [{"id": RECORD["id"], "provincia": "Entre Rios"}]
+
+    @pytest.mark.parametrize("fields", [[], "", [1], {"a": 1}])
+    def test_invalid_fields(self, server_process, fields):
+        port, _ = server_process
+        resp = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "list", "FIELDS": fields})
+        assert resp["OK"] is False and "FIELDS" in resp["Error"]
+
+
+class TestProjectionDynamo:
+    """FIELDS como ProjectionExpression (tabla falsa)."""
+
+    def test_get_without_cache_uses_projection(self):
+        table = FakeTable([RECORD])
+        data = aws_corporate_data(table, cache_size=0)
+        assert data.get(RECORD["id"], ["id", "provincia"]) == {"id": RECORD["id"], "provincia": "Entre Rios"}
+
+    def test_get_with_cache_projects_cached_record(self):
+        table = FakeTable([RECORD])
+        data = aws_corporate_data(table)
+        assert data.get(RECORD["id"], ["id", "nombre"]) == {"id": RECORD["id"], "nombre": "UADER"}
+        assert data.get(RECORD["id"]) == RECORD          # la caché guardó el registro completo
+        assert table.calls["get_item"] == 1
+
+    @pytest.mark.parametrize("segments", [1, 3])
+    def test_scan_uses_projection(self, segments):
+        table = FakeTable([dict(RECORD, id=f"ID-{i}") for i in range(10)], page_size=4)
+        data = aws_corporate_data(table, scan_segments=segments)
+        assert all(set(it) == {"id", "localidad"} for it in data.list_all(["id", "localidad"]))
+        items, _ = data.list_page(5, None, ["id", "localidad"])
+        assert all(set(it) == {"id", "localidad"} for it in items)
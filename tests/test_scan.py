@@ -0,0 +1,71 @@
+"""
+Tests del scan de CorporateData.list_all en DynamoDB (secuencial y paralelo por segmentos).
+"""
+import time
+import pytest
+from tests.fake_dynamodb import FakeTable, aws_corporate_data
+
+
+def _table(n, **kwargs):
+    return FakeTable([{"id": f"ID-{i:04d}", "n": i} for i in range(n)], **kwargs)
+
+
+class TestParallelScan:
+
+    @pytest.mark.parametrize("segments", [1, 4])
+    def test_list_all_returns_every_item_once(self, segments):
+        table = _table(250, page_size=20)
+        data = aws_corporate_data(table, scan_segments=segments)
+        items = data.list_all()
+        assert sorted(it["id"] for it in items) == sorted(table.items)
+        assert len(items) == 250
+
+    def test_segments_run_concurrently(self):
+        table = _table(80, page_size=10, latency=0.02)
+        sequential = aws_corporate_data(table, scan_segments=1)
+        parallel = aws_corporate_data(table, scan_segments=8)
+        start = time.perf_counter()
+        sequential.list_all()
+        t_seq = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel.list_all()
+        t_par = time.perf_counter() - start
+        assert t_par < t_seq / 2
+
+    def test_iter_pages_streams_pages(self):
+        data = aws_corporate_data(_table(50, page_size=10), scan_segments=2)
+        pages = list(data.iter_pages())
+        assert len(pages) > 1
+        assert sum(len(p) for p in pages) == 50
+
+    def test_abandoned_iteration_does_not_block(self):
+        data = aws_corporate_data(_table(200, page_size=5), scan_segments=4)
+        pages = data.iter_pages()
+        next(pages)
+        pages.close()   # los hilos de los segmentos terminan solos
+        assert len(data.list_all()) == 200
+
+    def test_segment_error_is_raised(self):
+        table = _table(10)
+
+        def broken_scan(**kwargs):
+            raise RuntimeError("ProvisionedThroughputExceeded")
+        table.scan = broken_scan
+        with pytest.raises(RuntimeError):
+            aws_corporate_data(table, scan_segments=3).list_all()
+
+    def test_invalid_segments(self):
+        with pytest.raises(ValueError):
+            aws_corporate_data(FakeTable(), scan_segments=0)
+
+    def test_list_page_follows_last_evaluated_key(self):
+        table = _table(25)
+        data = aws_corporate_data(table)
+        seen, key = [], None
+        while True:
+            items, key = data.list_page(10, key)
+            seen += [it["id"] for it in items]
+            if key is None:
+                break
+        assert table.calls["scan"] == 3
+        assert seen == sorted(table.items)
@@ -0,0 +1,209 @@
+"""
+Tests del SubscriberManager (un único hilo selectors para todos los subscriptores).
+"""
+import socket
+import time
+from common.net import send_json, recv_json, pack_json
+from server.observer import ObserverRegistry
+from server.subscribers import SubscriberManager, OutboundPolicy
+from tests.conftest import send_request, generate_uuid, stop_server, subscribe
+
+
+class TestSubscriberManager:
+    """Tests de ciclo de vida de subscriptores en el motor por hilos."""
+
+    def test_several_subscribers_receive_change(self, server_process):
+        """Todos los subscriptores reciben el evento, con el acuse siempre primero."""
+        port, _ = server_process
+        socks = [subscribe("127.0.0.1", port, f"{i:012x}") for i in range(1, 4)]
+        try:
+            send_request("127.0.0.1", port, {
+                "UUID": generate_uuid(),
+                "ACTION": "set",
+                "ID": "TEST-SUBS-001",
+                "DATA": {"nombre": "Varios"}
+            })
+            for sock in socks:
+                event = recv_json(sock)
+                assert event["ACTION"] == "change"
+                assert event["DATA"]["id"] == "TEST-SUBS-001"
+        finally:
+            for sock in socks:
+                sock.close()
+
+    def test_disconnected_subscriber_is_reclaimed(self, server_process):
+        """Un subscriptor que cierra su socket se libera sin esperar a un broadcast."""
+        port, process = server_process
+        sock = subscribe("127.0.0.1", port, "0000000000aa")
+        sock.close()
+        time.sleep(0.5)
+
+        stop_server(process)
+        _, stderr = process.communicate()
+        assert b"0000000000aa desconectado" in stderr
+
+    def test_resubscribe_replaces_previous_socket(self, server_process):
+        """Mismo UUID suscripto dos veces: la conexión anterior se cierra."""
+        port, _ = server_process
+        first = subscribe("127.0.0.1", port, "0000000000bb")
+        second = subscribe("127.0.0.1", port, "0000000000bb")
+        try:
+            first.settimeout(2)
+            assert recv_json(first) is None  # el servidor cerró la anterior
+
+            send_request("127.0.0.1", port, {
+                "UUID": generate_uuid(),
+                "ACTION": "set",
+                "ID": "TEST-SUBS-002",
+                "DATA": {"nombre": "Reemplazo"}
+            })
+            event = recv_json(second)
+            assert event["DATA"]["id"] == "TEST-SUBS-002"
+        finally:
+            first.close()
+            second.close()
+
+
+class TestOutboundQueue:
+    """Tests unitarios de las colas acotadas por subscriptor y sus políticas."""
+
+    def test_drop_oldest(self):
+        q = OutboundPolicy(max_pending=2, on_overflow="drop_oldest").new_queue()
+        for frame in (b"a", b"b", b"c"):
+            assert q.push(frame)
+        assert [q.pop(), q.pop(), q.pop()] == [b"b", b"c", None]
+
+    def test_coalesce_replaces_pending_frame_of_same_id(self):
+        policy = OutboundPolicy(max_pending=2, on_overflow="coalesce")
+        q = policy.new_queue()
+        q.push(b"x1", key="X")
+        q.push(b"y1", key="Y")
+        q.push(b"x2", key="X")
+        assert [q.pop(), q.pop()] == [b"x2", b"y1"]
+        assert policy.stats()["coalesced"] == 1
+
+    def test_disconnect(self):
+        policy = OutboundPolicy(max_pending=1, on_overflow="disconnect")
+        q = policy.new_queue()
+        assert q.push(b"a")
+        assert q.push(b"b") is False
+        assert policy.stats()["disconnected"] == 1
+
+    def test_pinned_head_and_greeting_are_never_dropped(self):
+        q = OutboundPolicy(max_pending=1, on_overflow="drop_oldest").new_queue()
+        q.push(b"ack", droppable=False)
+        q.push(b"e1")
+        assert q.peek() == b"ack"      # empezó a escribirse
+        q.consume(1)
+        q.push(b"e2")                  # cola llena: se descarta e1, no el acuse
+        assert q.peek() == b"ck"
+        q.consume(2)
+        assert q.pop() == b"e2"
+
+    def test_non_droppable_frames_do_not_count_toward_the_limit(self):
+        policy = OutboundPolicy(max_pending=1, on_overflow="disconnect")
+        q = policy.new_queue()
+        for frame in (b"r1", b"r2", b"r3"):            # replay de SINCE
+            assert q.push(frame, droppable=False)
+        assert q.push(b"e1")                           # el límite sigue libre para lo en vivo
+        assert q.push(b"e2") is False
+        assert [q.pop() for _ in range(4)] == [b"r1", b"r2", b"r3", b"e1"]
+
+    def test_stalled_subscriber_is_disconnected_without_blocking(self):
+        """Un subscriptor que no lee llena su cola y se desconecta; sendall nunca bloquea."""
+        registry = ObserverRegistry()
+        manager = SubscriberManager(registry, policy=OutboundPolicy(max_pending=4, on_overflow="disconnect"))
+        manager.start()
+        server_end, client_end = socket.socketpair()
+        try:
+            registry.add("0000000000cc", manager.attach("0000000000cc", server_end))
+            frame = pack_json({"ACTION": "change", "DATA": {"id": "X", "blob": "z" * 65536}})
+            start = time.time()
+            for _ in range(200):
+                registry.broadcast_frame(frame, key="X")
+                if len(registry) == 0:
+                    break
+            assert time.time() - start < 2
+            assert len(registry) == 0
+            assert manager.policy.stats()["disconnected"] == 1
+        finally:
+            manager.stop()
+            client_end.close()
+
+
+class TestFilteredSubscriptions:
+    """Tests de subscribe con IDS."""
+
+    def test_subscriber_with_ids_only_receives_matching_changes(self, server_process):
+        port, _ = server_process
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        try:
+            send_json(sock, {"UUID": "0000000000dd", "ACTION": "subscribe", "IDS": ["TEST-FILTRO-*"]})
+            assert recv_json(sock)["OK"] is True
+
+            for item_id in ("OTRO-001", "TEST-FILTRO-001"):
+                send_request("127.0.0.1", port, {
+                    "UUID": generate_uuid(), "ACTION": "set", "ID": item_id, "DATA": {"nombre": item_id}
+                })
+            event = recv_json(sock)
+            assert event["DATA"]["id"] == "TEST-FILTRO-001"
+        finally:
+            sock.close()
+
+    def test_invalid_ids_rejected(self, server_process):
+        port, _ = server_process
+        response = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "subscribe", "IDS": [1]})
+        assert response["OK"] is False
+        assert "IDS" in response["Error"]
+
+
+class TestDeltaSubscriptions:
+    """Tests de subscribe con MODE=delta."""
+
+    def test_delta_event_carries_only_changed_fields_and_version(self, server_process):
+        port, _ = server_process
+        send_request("127.0.0.1", port, {
+            "UUID": generate_uuid(), "ACTION": "set", "ID": "TEST-DELTA-001",
+            "DATA": {"nombre": "Delta", "web": "a.example", "tel": "123"}
+        })
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        try:
+            send_json(sock, {"UUID": "0000000000ee", "ACTION": "subscribe", "MODE": "delta"})
+            assert recv_json(sock)["OK"] is True
+
+            response = send_request("127.0.0.1", port, {
+                "UUID": generate_uuid(), "ACTION": "set", "ID": "TEST-DELTA-001",
+                "DATA": {"nombre": "Delta", "web": "b.example", "tel": None}
+            })
+            assert "_version" not in response["DATA"]
+            assert response["DATA"]["tel"] is None           # null se guarda, como en un update
+
+            event = recv_json(sock)
+            assert event["MODE"] == "delta"
+            assert event["ID"] == "TEST-DELTA-001"
+            assert event["VERSION"] == 2
+            assert event["CHANGED"] == {"web": "b.example", "tel": None}
+            assert "DATA" not in event
+        finally:
+            sock.close()
+
+    def test_set_without_changes_keeps_version(self, server_process):
+        port, _ = server_process
+        set_req = {"UUID": generate_uuid(), "ACTION": "set", "ID": "TEST-DELTA-002", "DATA": {"n": 1}}
+        send_request("127.0.0.1", port, set_req)
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        try:
+            send_json(sock, {"UUID": "0000000000ef", "ACTION": "subscribe", "MODE": "delta"})
+            assert recv_json(sock)["OK"] is True
+            send_request("127.0.0.1", port, set_req)           # no cambia nada: sin evento delta
+            send_request("127.0.0.1", port, dict(set_req, DATA={"n": 2}))
+            event = recv_json(sock)
+            assert event["CHANGED"] == {"n": 2} and event["VERSION"] == 2
+        finally:
+            sock.close()
+
+    def test_invalid_mode_rejected(self, server_process):
+        port, _ = server_process
+        response = send_request("127.0.0.1", port, {"UUID": generate_uuid(), "ACTION": "subscribe", "MODE": "x"})
+        assert response["OK"] is False
+        assert "MODE" in response["Error"]
@@ -0,0 +1,76 @@
+"""
+Tests del pool de trabajo acotado (admisión, prioridades y métricas).
+"""
+import threading
+import pytest
+from server.workerpool import WorkerPool, Busy, parse_priorities
+from tests.conftest import send_request, generate_uuid
+
+
+@pytest.fixture
+def blocked_pool():
+    """Pool de 1 hilo ocupado hasta liberar el evento; cola de 2."""
+    pool = WorkerPool(workers=1, queue_size=2, priorities={"set": 0, "list": 5})
+    gate = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        gate.wait(5)
+        return "bloqueo"
+
+    first = pool.submit("get", block)
+    started.wait(5)
+    yield pool, gate, first
+    gate.set()
+    pool.shutdown()
+
+
+class TestWorkerPool:
+    """Tests unitarios del WorkerPool."""
+
+    def test_full_queue_rejects_with_busy(self, blocked_pool):
+        pool, gate, _ = blocked_pool
+        pool.submit("list", lambda: 1)
+        pool.submit("list", lambda: 2)
+        with pytest.raises(Busy):
+            pool.submit("list", lambda: 3)
+        stats = pool.stats()
+        assert stats["depth"] == 2
+        assert stats["rejected"] == 1
+
+    def test_priority_order_and_shedding(self, blocked_pool):
+        pool, gate, first = blocked_pool
+        order = []
+        low1 = pool.submit("list", order.append, "list-1")
+        low2 = pool.submit("list", order.append, "list-2")
+        # cola llena: 'set' desplaza al 'list' más nuevo y se atiende primero
+        high = pool.submit("set", order.append, "set")
+        with pytest.raises(Busy):
+            low2.result(timeout=1)
+        gate.set()
+        high.result(timeout=5)
+        low1.result(timeout=5)
+        assert first.result(timeout=5) == "bloqueo"
+        assert order == ["set", "list-1"]
+        assert pool.stats()["shed"] == 1
+
+    def test_parse_priorities(self):
+        assert parse_priorities("set=0, LIST=2") == {"set": 0, "list": 2}
+        with pytest.raises(ValueError):
+            parse_priorities("set")
+
+
+class TestStatsAction:
+    """Tests de la acción 'stats' expuesta por el servidor."""
+
+    def test_stats_reports_pool_metrics(self, server_process):
+        port, _ = server_process
+        uuid_cli = generate_uuid()
+        send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "list"})
+        response = send_request("127.0.0.1", port, {"UUID": uuid_cli, "ACTION": "stats"})
+        assert response["OK"] is True
+        pool = response["DATA"]["pool"]
+        assert pool["submitted"] >= 1
+        assert pool["rejected"] == 0
+        assert {"depth", "queue_size", "workers", "completed"} <= set(pool)
@@ -0,0 +1,110 @@
+"""
+Tests del modo multiproceso (--workers N con SO_REUSEPORT y bus de eventos).
+"""
+import os
+import socket
+import subprocess
+import sys
+import pytest
+from common.net import send_json, recv_json
+from server import workers
+from tests.conftest import (
+    send_request, generate_uuid, find_free_port, start_server, stop_server, read_corporate_data,
+    SERVER_SCRIPT, PROJECT_ROOT
+)
+
+pytestmark = pytest.mark.skipif(not workers.supported(), reason="requiere fork() y SO_REUSEPORT")
+
+
+@pytest.fixture
+def multi_worker_server(clean_mock_db):
+    port = find_free_port()
+    process = start_server(port, "--workers", "2")
+    yield port, process
+    stop_server(process)
+
+
+def _connection_per_worker(port, wanted=2, attempts=40):
+    """Abre conexiones KEEPALIVE hasta tener una atendida por cada worker (según el pid de 'stats')."""
+    by_pid = {}
+    for _ in range(attempts):
+        sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        send_json(sock, {"UUID": generate_uuid(), "ACTION": "stats", "KEEPALIVE": True})
+        pid = recv_json(sock)["DATA"]["pid"]
+        if pid in by_pid:
+            sock.close()
+        else:
+            by_pid[pid] = sock
+        if len(by_pid) == wanted:
+            break
+    return list(by_pid.values())
+
+
+class TestWorkers:
+    """Tests de --workers."""
+
+    def test_set_notifies_subscribers_on_every_worker(self, multi_worker_server):
+        port, _ = multi_worker_server
+        socks = _connection_per_worker(port)
+        try:
+            assert len(socks) == 2, "SO_REUSEPORT debería repartir conexiones entre ambos workers"
+            for i, sock in enumerate(socks):
+                send_json(sock, {"UUID": f"{i + 1:012x}", "ACTION": "subscribe"})
+                assert recv_json(sock)["OK"] is True
+
+            response = send_request("127.0.0.1", port, {
+                "UUID": generate_uuid(),
+                "ACTION": "set",
+                "ID": "TEST-WORKERS-001",
+                "DATA": {"nombre": "Multiproceso"}
+            })
+            assert response["OK"] is True
+
+            events = [recv_json(sock) for sock in socks]
+            for event in events:
+                assert event["ACTION"] == "change"
+                assert event["DATA"]["id"] == "TEST-WORKERS-001"
+            # el proceso principal numera los eventos: mismo SEQ en todos los workers
+            assert events[0]["SEQ"] == events[1]["SEQ"]
+        finally:
+            for sock in socks:
+                sock.close()
+
+    def test_second_instance_same_port_fails(self, multi_worker_server):
+        port, _ = multi_worker_server
+        env = {**os.environ, "MOCK_DB": "1", "PYTHONPATH": str(PROJECT_ROOT)}
+        result = subprocess.run(
+            [sys.executable, str(SERVER_SCRIPT), "-p", str(port), "--workers", "2"],
+            capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+        )
+        assert result.returncode != 0
+
+    def test_mock_writes_from_every_worker_are_kept_and_visible(self, multi_worker_server):
+        port, _ = multi_worker_server
+        socks = _connection_per_worker(port)
+        try:
+            assert len(socks) == 2
+            for round_ in range(3):
+                for i, sock in enumerate(socks):
+                    send_json(sock, {"UUID": generate_uuid(), "ACTION": "set", "ID": f"TEST-WORKERS-{i}",
+                                     "DATA": {"n": round_}, "KEEPALIVE": True})
+                    assert recv_json(sock)["OK"] is True
+            for sock in socks:
+                # cada worker ve lo que escribió el otro
+                send_json(sock, {"UUID": generate_uuid(), "ACTION": "list", "KEEPALIVE": True})
+                assert sorted((it["id"], it["n"]) for it in recv_json(sock)["DATA"]) == \
+                    [("TEST-WORKERS-0", 2), ("TEST-WORKERS-1", 2)]
+        finally:
+            for sock in socks:
+                sock.close()
+        assert sorted(it["id"] for it in read_corporate_data()) == ["TEST-WORKERS-0", "TEST-WORKERS-1"]
+
+    def test_mock_write_behind_is_refused(self, clean_mock_db):
+        env = {**os.environ, "MOCK_DB": "1", "PYTHONPATH": str(PROJECT_ROOT)}
+        result = subprocess.run(
+            [sys.executable, str(SERVER_SCRIPT), "-p", str(find_free_port()), "--workers", "2",
+             "--flush-interval", "5"],
+            capture_output=True, text=True, timeout=10, env=env, cwd=str(PROJECT_ROOT)
+        )
+        assert result.returncode == 2
+        assert "write-behind" in result.stderr
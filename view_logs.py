@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para ver los logs de CorporateLog en modo mock (mock_db/corporate_log*.jsonl).
+Lee los segmentos en orden y en streaming: no carga el log entero en memoria.
+"""
+import json
+import os
+import sys
+
+from storage.adapter import iter_log_entries, log_segments
+
+# Configurar stdout para UTF-8 en Windows
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_db", "corporate_log.jsonl")
+
+
+def view_logs():
+    """Muestra las entradas del log mock, una por línea."""
+    segments = log_segments(LOG_PATH)
+    if not segments:
+        print(f"[INFO] No hay logs en {LOG_PATH}")
+        return
+    print(f"[INFO] {len(segments)} segmento(s): {', '.join(os.path.basename(s) for s in segments)}")
+    total = 0
+    for entry in iter_log_entries(LOG_PATH):
+        print(json.dumps(entry, ensure_ascii=False))
+        total += 1
+    print(f"[INFO] Total de entradas: {total}")
+
+
+if __name__ == "__main__":
+    view_logs()